@@ -0,0 +1,51 @@
+"""create import jobs table
+
+Revision ID: 4c1e7a9b2d58
+Revises: 9fe33fa344a3
+Create Date: 2026-10-18 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e7a9b2d58'
+down_revision: Union[str, None] = '9fe33fa344a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('import_jobs',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'SUCCEEDED',
+                                                'FAILED', name='importjobstatus'), nullable=False),
+                    sa.Column('payload', sa.JSON(), nullable=False),
+                    sa.Column('property_id', sa.Integer(), nullable=True),
+                    sa.Column('counts', sa.JSON(), nullable=True),
+                    sa.Column('error', sa.Text(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True),
+                              server_default=sa.text('now()'), nullable=False),
+                    sa.Column('started_at', sa.DateTime(
+                        timezone=True), nullable=True),
+                    sa.Column('finished_at', sa.DateTime(
+                        timezone=True), nullable=True),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.ForeignKeyConstraint(
+                        ['property_id'], ['properties.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_import_jobs_user_created',
+                    'import_jobs', ['user_id', 'created_at'])
+    op.create_index('ix_import_jobs_status', 'import_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_jobs_status', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_user_created', table_name='import_jobs')
+    op.drop_table('import_jobs')
+    op.execute("DROP TYPE IF EXISTS importjobstatus")
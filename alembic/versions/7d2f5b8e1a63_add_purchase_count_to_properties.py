@@ -0,0 +1,49 @@
+"""add purchase count to properties
+
+Revision ID: 7d2f5b8e1a63
+Revises: 4c1e7a9b2d58
+Create Date: 2026-10-18 11:02:17.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f5b8e1a63'
+down_revision: Union[str, None] = '4c1e7a9b2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1. カラムの追加
+    op.add_column('properties', sa.Column(
+        'purchase_count', sa.Integer(), server_default='0', nullable=False))
+
+    # 2. 完了した取引の件数でバックフィル
+    op.execute("""
+        UPDATE properties p
+        SET purchase_count = c.purchase_count
+        FROM (
+            SELECT li.property_id, COUNT(t.id) AS purchase_count
+            FROM transactions t
+            JOIN listing_items li ON t.listing_id = li.id
+            WHERE t.transaction_status = 'COMPLETED'
+            GROUP BY li.property_id
+        ) c
+        WHERE p.id = c.property_id
+    """)
+
+    # 3. 一覧のソート用インデックスの作成
+    op.create_index('ix_properties_purchase_count_created',
+                    'properties', ['purchase_count', 'created_at'],
+                    postgresql_where=sa.text('is_deleted = false'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_purchase_count_created',
+                  table_name='properties')
+    op.drop_column('properties', 'purchase_count')
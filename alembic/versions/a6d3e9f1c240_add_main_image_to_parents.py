@@ -0,0 +1,61 @@
+"""add main image pointer to properties, rooms and products
+
+Revision ID: a6d3e9f1c240
+Revises: f4c1b8e2d963
+Create Date: 2026-10-18 19:47:26.118390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e9f1c240'
+down_revision: Union[str, None] = 'f4c1b8e2d963'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (テーブル, imagesの外部キー列)
+PARENTS = (
+    ('properties', 'property_id'),
+    ('rooms', 'room_id'),
+    ('products', 'product_id'),
+)
+
+
+def upgrade() -> None:
+    for table, column in PARENTS:
+        op.add_column(table, sa.Column(
+            'main_image_id', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column(
+            'main_image_url', sa.String(), nullable=True))
+
+    # 既存のMAIN画像からバックフィル（completedのMAIN画像のうちIDが最大のもの）
+    for table, column in PARENTS:
+        latest_main = f"""
+            SELECT {{select}} FROM images
+            WHERE images.{column} = {table}.id
+              AND images.image_type = 'MAIN'
+              AND images.status = 'completed'
+            ORDER BY images.id DESC
+            LIMIT 1
+        """
+        op.execute(f"""
+            UPDATE {table}
+            SET main_image_id = ({latest_main.format(select='images.id')}),
+                main_image_url = ({latest_main.format(select='images.url')})
+            WHERE EXISTS (
+                SELECT 1 FROM images
+                WHERE images.{column} = {table}.id
+                  AND images.image_type = 'MAIN'
+                  AND images.status = 'completed'
+            )
+        """)
+
+
+def downgrade() -> None:
+    for table, _ in PARENTS:
+        op.drop_column(table, 'main_image_url')
+        op.drop_column(table, 'main_image_id')
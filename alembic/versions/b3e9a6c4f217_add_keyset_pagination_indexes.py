@@ -0,0 +1,45 @@
+"""add keyset pagination indexes
+
+Revision ID: b3e9a6c4f217
+Revises: 7d2f5b8e1a63
+Create Date: 2026-10-18 13:40:05.882143
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9a6c4f217'
+down_revision: Union[str, None] = '7d2f5b8e1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 物件一覧のソートキーにidを追加（カーソルの行値比較をインデックスで処理するため）
+    op.drop_index('ix_properties_purchase_count_created',
+                  table_name='properties')
+    op.create_index('ix_properties_purchase_count_created',
+                    'properties', ['purchase_count', 'created_at', 'id'],
+                    postgresql_where=sa.text('is_deleted = false'))
+
+    op.create_index('ix_properties_user_created',
+                    'properties', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_rooms_property_id', 'rooms', ['property_id', 'id'])
+    op.create_index('ix_drawings_property_id',
+                    'drawings', ['property_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_drawings_property_id', table_name='drawings')
+    op.drop_index('ix_rooms_property_id', table_name='rooms')
+    op.drop_index('ix_properties_user_created', table_name='properties')
+
+    op.drop_index('ix_properties_purchase_count_created',
+                  table_name='properties')
+    op.create_index('ix_properties_purchase_count_created',
+                    'properties', ['purchase_count', 'created_at'],
+                    postgresql_where=sa.text('is_deleted = false'))
@@ -0,0 +1,27 @@
+"""add attempts to import_jobs
+
+Revision ID: b5e2f7a9c413
+Revises: e7b4d2c9a816
+Create Date: 2026-10-18 23:12:40.517306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e2f7a9c413'
+down_revision: Union[str, None] = 'e7b4d2c9a816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('import_jobs', sa.Column(
+        'attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('import_jobs', 'attempts')
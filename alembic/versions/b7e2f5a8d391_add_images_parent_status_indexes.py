@@ -0,0 +1,44 @@
+"""add images parent status indexes
+
+Revision ID: b7e2f5a8d391
+Revises: a6d3e9f1c240
+Create Date: 2026-10-18 20:31:54.772109
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f5a8d391'
+down_revision: Union[str, None] = 'a6d3e9f1c240'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARENT_COLUMNS = {
+    'ix_images_property_status': 'property_id',
+    'ix_images_room_status': 'room_id',
+    'ix_images_product_status': 'product_id',
+    'ix_images_product_specification_status': 'product_specification_id',
+    'ix_images_drawing_status': 'drawing_id',
+}
+
+
+def upgrade() -> None:
+    # imagesは最も行数の多いテーブルのため、書き込みをブロックしないようCONCURRENTLYで作成する
+    with op.get_context().autocommit_block():
+        for name, column in PARENT_COLUMNS.items():
+            op.create_index(
+                name, 'images', [column, 'status'],
+                postgresql_where=sa.text(f"{column} IS NOT NULL"),
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in PARENT_COLUMNS:
+            op.drop_index(name, table_name='images',
+                          postgresql_concurrently=True)
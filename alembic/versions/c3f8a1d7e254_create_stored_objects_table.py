@@ -0,0 +1,40 @@
+"""create stored_objects table
+
+Revision ID: c3f8a1d7e254
+Revises: b7e2f5a8d391
+Create Date: 2026-10-18 21:04:17.530862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1d7e254'
+down_revision: Union[str, None] = 'b7e2f5a8d391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_objects',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('content_hash', sa.String(length=64), nullable=False),
+                    sa.Column('s3_key', sa.String(), nullable=False),
+                    sa.Column('size', sa.Integer(), nullable=True),
+                    sa.Column('ref_count', sa.Integer(),
+                              server_default='0', nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True),
+                              server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('content_hash')
+                    )
+    op.add_column('images', sa.Column(
+        'content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'content_hash')
+    op.drop_table('stored_objects')
@@ -0,0 +1,26 @@
+"""add images s3_key index
+
+Revision ID: c5f1d8a2e934
+Revises: b3e9a6c4f217
+Create Date: 2026-10-18 16:12:47.305518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1d8a2e934'
+down_revision: Union[str, None] = 'b3e9a6c4f217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_images_s3_key', 'images', ['s3_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_images_s3_key', table_name='images')
@@ -0,0 +1,40 @@
+"""create storage deletions table
+
+Revision ID: d8b2f4c61a07
+Revises: c5f1d8a2e934
+Create Date: 2026-10-18 17:05:22.914836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2f4c61a07'
+down_revision: Union[str, None] = 'c5f1d8a2e934'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('storage_deletions',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('bucket', sa.String(), nullable=False),
+                    sa.Column('s3_key', sa.String(), nullable=False),
+                    sa.Column('reason', sa.String(), nullable=False),
+                    sa.Column('attempts', sa.Integer(),
+                              server_default='0', nullable=False),
+                    sa.Column('last_error', sa.Text(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True),
+                              server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_images_pending_created', 'images', ['created_at'],
+                    postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_images_pending_created', table_name='images')
+    op.drop_table('storage_deletions')
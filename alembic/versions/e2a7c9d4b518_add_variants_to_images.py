@@ -0,0 +1,26 @@
+"""add variants to images
+
+Revision ID: e2a7c9d4b518
+Revises: d8b2f4c61a07
+Create Date: 2026-10-18 18:12:40.301527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c9d4b518'
+down_revision: Union[str, None] = 'd8b2f4c61a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'variants')
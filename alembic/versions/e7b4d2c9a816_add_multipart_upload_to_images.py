@@ -0,0 +1,27 @@
+"""add multipart_upload to images
+
+Revision ID: e7b4d2c9a816
+Revises: c3f8a1d7e254
+Create Date: 2026-10-18 21:47:02.118534
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b4d2c9a816'
+down_revision: Union[str, None] = 'c3f8a1d7e254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column(
+        'multipart_upload', sa.JSON(none_as_null=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'multipart_upload')
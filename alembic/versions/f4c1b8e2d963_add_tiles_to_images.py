@@ -0,0 +1,26 @@
+"""add tiles to images
+
+Revision ID: f4c1b8e2d963
+Revises: e2a7c9d4b518
+Create Date: 2026-10-18 19:03:11.582044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c1b8e2d963'
+down_revision: Union[str, None] = 'e2a7c9d4b518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('tiles', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'tiles')
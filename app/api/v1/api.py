@@ -13,7 +13,10 @@ from app.api.v1.endpoints import (
     constants_endpoints,
     transaction_endpoints,
     product_category_endpoints,
-    drawing_endpoints
+    drawing_endpoints,
+    cache_endpoints,
+    ownership_endpoints,
+    event_endpoints
 )
 
 api_router = APIRouter()
@@ -33,3 +36,6 @@ api_router.include_router(constants_endpoints.router)
 api_router.include_router(transaction_endpoints.router)
 api_router.include_router(product_category_endpoints.router)
 api_router.include_router(drawing_endpoints.router)
+api_router.include_router(cache_endpoints.router)
+api_router.include_router(ownership_endpoints.router)
+api_router.include_router(event_endpoints.router)
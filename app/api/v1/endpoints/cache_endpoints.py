@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from typing import Any, Dict
+from app.auth.dependencies import get_current_user
+from app.cache.property_details import property_detail_cache
+from app.cache.signed_urls import signed_url_cache
+from app.cache.users import user_cache
+from app.crud.counting import count_cache
+from app.schemas.user_schemas import UserSchema
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["cache"]
+)
+
+
+@router.get("/stats", summary="キャッシュの統計情報を取得する")
+def get_cache_stats(
+    current_user: UserSchema = Depends(get_current_user)
+) -> Dict[str, Dict[str, Any]]:
+    """
+    各キャッシュのヒット・ミス件数、無効化件数、エントリ数を取得します。
+    キャッシュサイズの調整に使用するため、ログインしたユーザーのみ取得できます。
+    """
+    return {
+        "property_details": property_detail_cache.get_stats(),
+        "counts": count_cache.get_stats(),
+        "users": user_cache.get_stats(),
+        "signed_urls": signed_url_cache.get_stats()
+    }
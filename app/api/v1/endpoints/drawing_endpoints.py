@@ -1,12 +1,14 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_optional
 from app.crud.drawing import drawing as drawing_crud
-from app.schemas.drawing_schemas import DrawingSchema
+from app.schemas.drawing_schemas import DrawingSchema, DrawingTileSourceSchema
 from app.schemas.user_schemas import UserSchema
 from app.services.drawing_service import drawing_service
+from app.services.tile_service import tile_service
 
 router = APIRouter(
     prefix="/drawings",
@@ -36,6 +38,55 @@ def get_drawing(
     return drawing
 
 
+@router.get("/{drawing_id}/tiles", response_model=List[DrawingTileSourceSchema], summary="図面の画像のタイル情報を取得する")
+def get_drawing_tiles(
+    drawing_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
+):
+    """
+    図面の画像ごとのタイルのグリッド（Deep Zoom形式）を取得します。
+
+    ビューアは表示範囲のタイルのみを取得できます。
+    descriptor_url（.dzi）はOpenSeadragonなどのビューアにそのまま渡せます。
+    有料画像は、購入済みのユーザー（と物件の登録者）にのみ返します。
+    有料画像の元画像とdescriptor_urlは署名付きURLで、tile_url_templateは
+    タイルの署名付きURLにリダイレクトするエンドポイントです（x-clerk-user-idヘッダーが必要なため、
+    OpenSeadragonではloadTilesWithAjaxとajaxHeadersを指定してtile_url_templateから取得してください）。
+    """
+    drawing = drawing_crud.get(db, id=drawing_id)
+    if not drawing:
+        raise HTTPException(status_code=404, detail="Drawing not found")
+    return tile_service.get_tile_sources(
+        db,
+        drawing_id,
+        current_user.id if current_user else None,
+        paid_tile_base_url=str(request.url_for(
+            "get_drawing_tiles", drawing_id=drawing_id))
+    )
+
+
+@router.get("/{drawing_id}/tiles/{image_id}/{level}/{column}_{row}.{extension}", summary="図面の画像のタイルを取得する")
+def get_drawing_tile(
+    drawing_id: int,
+    image_id: int,
+    level: int,
+    column: int,
+    row: int,
+    extension: str,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    有料画像のタイルの署名付きURLにリダイレクトします。
+
+    購入済みのユーザー（と物件の登録者）以外は403を返します。
+    """
+    return RedirectResponse(tile_service.get_tile_url(
+        db, drawing_id, image_id, level, column, row, extension, current_user.id))
+
+
 @router.get("/{drawing_id}/is-mine", response_model=bool, summary="指定された図面が自分のものかを確認する")
 def is_my_drawing(
     drawing_id: int,
@@ -57,12 +108,23 @@ def is_my_drawing(
 @router.get("/property/{property_id}", response_model=List[DrawingSchema], summary="物件の図面一覧を取得する")
 def get_drawings_by_property(
     property_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値（指定時はskipより優先）"),
     db: Session = Depends(get_db)
 ):
-    """指定された物件IDに紐づく図面一覧を取得します。"""
-    return drawing_crud.get_by_property(db, property_id=property_id, skip=skip, limit=limit)
+    """
+    指定された物件IDに紐づく図面一覧を取得します。
+
+    次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します。
+    """
+    items = drawing_crud.get_by_property(
+        db, property_id=property_id, skip=skip, limit=limit, cursor=cursor)
+    if items.next_cursor:
+        response.headers["X-Next-Cursor"] = items.next_cursor
+    return items
 
 
 @router.patch("/{drawing_id}", response_model=DrawingSchema, summary="図面を更新する")
@@ -0,0 +1,85 @@
+import json
+from typing import Any, AsyncIterator, Dict
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.auth.dependencies import get_current_user
+from app.config import get_settings
+from app.events.broker import EventBroker, event_broker
+from app.schemas.user_schemas import UserSchema
+
+settings = get_settings()
+
+# 切断されたクライアントが再接続するまでの待ち時間（ミリ秒）
+RETRY_MILLISECONDS = 5000
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"]
+)
+
+
+def format_event(message: Dict[str, Any]) -> str:
+    """イベントをSSEの形式（event行とdata行）に変換する"""
+    data = json.dumps(message["data"], ensure_ascii=False, default=str)
+    return f"event: {message['type']}\ndata: {data}\n\n"
+
+
+async def stream_events(
+    request: Request,
+    user_id: int,
+    broker: EventBroker = event_broker,
+    heartbeat: float = settings.EVENT_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """
+    ユーザーのイベントをSSEとして送り続ける
+
+    イベントがない間もheartbeat秒ごとにコメント行を送り、
+    プロキシに接続を切られないようにすると同時にクライアントの切断を検知します。
+    """
+    subscription = broker.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while not await request.is_disconnected():
+            message = await subscription.get(timeout=heartbeat)
+            yield format_event(message) if message else ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@router.get("/stream", summary="状態変更の通知を受け取る（Server-Sent Events）")
+async def get_event_stream(
+    request: Request,
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    現在のユーザーに関する状態の変更をServer-Sent Eventsで配信します。
+    画面ごとにステータスをポーリングする代わりに、1本の接続で次のイベントを受け取れます。
+
+    - image.status: 自分の物件の画像のステータスが変わった（アップロードの完了など）
+    - import_job.status: 物件一括作成ジョブの状態が変わった（running / succeeded / failed）
+    - checkout.completed: 購入した・出品した商品の決済が完了した
+
+    認証にx-clerk-user-idヘッダーが必要なため、ヘッダーを指定できるfetchなどで接続してください。
+    イベントは接続中にcommitされた変更のみが届くため、接続（再接続）した直後は
+    各エンドポイントで現在の状態を取得してください。
+    """
+    return StreamingResponse(
+        stream_events(request, current_user.id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginxなどのプロキシでバッファリングさせない
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.get("/stats", summary="イベント配信の統計情報を取得する")
+def get_event_stats(
+    current_user: UserSchema = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    接続中の購読者数と、送信・配信・破棄したイベントの件数を取得します。
+    運用状況の確認用のため、ログインしたユーザーのみ取得できます。
+    """
+    return event_broker.get_stats()
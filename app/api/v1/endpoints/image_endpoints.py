@@ -1,15 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+import hmac
+import json
+from urllib.parse import urlparse
+from urllib.request import urlopen
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.schemas.image_schemas import (
     ImageSchema,
     CreatePresignedUrlRequest,
+    CreatePresignedUrlsRequest,
     CreatePresignedUrlResponse,
+    CompleteImagesRequest,
+    CreateMultipartUploadRequest,
+    CompleteMultipartUploadRequest,
+    MultipartUploadResponse,
     ImageStatus,
-    ImageType
+    ImageType,
+    ImageOrder,
+    ImageOwnerGroupSchema
 )
 from app.services.image_service import image_service
+from app.services.derivative_service import ImageSize, ImageFormat
+from app.services.s3_event_service import s3_event_service
+from app.services.multipart_upload_service import multipart_upload_service
+from app.services.signed_url_service import signed_url_service
+from app.config import settings
 from app.database import get_db
+from app.auth.dependencies import get_current_user, get_current_user_optional
+from app.schemas.user_schemas import UserSchema
 
 router = APIRouter(
     prefix="/images",
@@ -20,7 +39,8 @@ router = APIRouter(
 @router.post("/presigned-url", response_model=CreatePresignedUrlResponse, summary="画像のアップロードURLを取得する")
 def get_presigned_url(
     request: CreatePresignedUrlRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
 ):
     """
     S3へのアップロード用のプリサインドURLを取得します。
@@ -34,15 +54,159 @@ def get_presigned_url(
         - room_id: 部屋ID（オプション）
         - product_id: 製品ID（オプション）
         - image_type: 画像タイプ（main/sub/temp）
+
+    アップロード先は自分の物件（またはその部屋・製品など）である必要があります。
+    """
+    return image_service.create_presigned_url(db, request, current_user.id)
+
+
+@router.post("/presigned-urls", response_model=List[CreatePresignedUrlResponse], summary="複数の画像のアップロードURLをまとめて取得する")
+def get_presigned_urls(
+    request: CreatePresignedUrlsRequest,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    複数の画像のS3へのアップロード用プリサインドURLをまとめて取得します。
+    画像のメタデータ（ステータスはpending）も1回のINSERTでまとめて作成されます。
+
+    Parameters:
+    - request: プリサインドURL生成リクエスト
+        - files: /presigned-urlと同じ形式のファイル情報のリスト（最大100件）
+
+    Returns:
+    - ファイルと同じ順序の署名付きURL・画像IDのリスト
+    """
+    return image_service.create_presigned_urls(db, request, current_user.id)
+
+
+@router.post("/complete", response_model=List[ImageSchema], summary="複数の画像のアップロード完了をまとめて登録する")
+def complete_uploads(
+    request: CompleteImagesRequest,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    S3へのアップロードが完了した複数の画像のステータスを、1回の更新でまとめてcompletedにします。
+    画像ごとに/{image_id}/statusを呼び出す代わりに使用します。
+
+    Parameters:
+    - request:
+        - image_ids: 画像IDのリスト（最大500件）
+
+    Returns:
+    - 更新された画像のリスト（自分の物件に属さない画像・存在しない画像は含まれません）
+    """
+    return image_service.complete_uploads(db, request, current_user.id)
+
+
+@router.post("/multipart", response_model=MultipartUploadResponse, summary="マルチパートアップロードを開始する")
+def create_multipart_upload(
+    request: CreateMultipartUploadRequest,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    大きな図面・写真を分割してアップロードするため、マルチパートアップロードを開始します。
+    画像のメタデータ（ステータスはpending）も作成されます。
+
+    Parameters:
+    - request: /presigned-urlと同じ形式のファイル情報と、ファイルサイズ（file_size）
+
+    Returns:
+    - パートのサイズ・数と、パートごとの署名付きURL（PUTで並列にアップロードできます）
+    """
+    return multipart_upload_service.initiate(db, request, current_user.id)
+
+
+@router.get("/{image_id}/multipart", response_model=MultipartUploadResponse, summary="マルチパートアップロードの状態を取得する")
+def get_multipart_upload(
+    image_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    中断したアップロードを再開するため、アップロード済みのパートと、
+    残りのパートの署名付きURL（期限切れの場合も新しく発行されます）を取得します。
     """
-    return image_service.create_presigned_url(db, request)
+    return multipart_upload_service.get_status(db, image_id, current_user.id)
+
+
+@router.post("/{image_id}/multipart/complete", response_model=ImageSchema, summary="マルチパートアップロードを完了する")
+def complete_multipart_upload(
+    image_id: int,
+    request: CompleteMultipartUploadRequest = Body(
+        CompleteMultipartUploadRequest()),
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    アップロードしたパートを結合し、画像のステータスをcompletedにします。
+
+    Parameters:
+    - request:
+        - parts: パート番号とETagのリスト（省略した場合はS3に記録されているパートを使用します）
+    """
+    return multipart_upload_service.complete(db, image_id, request, current_user.id)
+
+
+@router.delete("/{image_id}/multipart", summary="マルチパートアップロードを中止する")
+def abort_multipart_upload(
+    image_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """アップロードを中止し、アップロード済みのパートとpendingの画像を削除します。"""
+    return multipart_upload_service.abort(db, image_id, current_user.id)
+
+
+@router.post("/events/s3", summary="S3のアップロード完了通知を受け取る")
+async def receive_s3_events(
+    request: Request,
+    token: str,
+    db: Session = Depends(get_db)
+):
+    """
+    S3のObjectCreatedイベント（SNSのHTTP(S)サブスクリプション経由）を受け取り、
+    アップロードされた画像のステータスをcompletedにします。
+
+    Parameters:
+    - token: S3_EVENT_WEBHOOK_TOKENに設定した認証トークン
+
+    Note:
+    - SNSのサブスクリプション確認（SubscriptionConfirmation）にも応答します
+    - S3イベント通知のJSONを直接送信することもできます
+    """
+    if not settings.S3_EVENT_WEBHOOK_TOKEN:
+        raise HTTPException(
+            status_code=404, detail="S3 event webhook is not configured")
+    if not hmac.compare_digest(token, settings.S3_EVENT_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid token")
+
+    try:
+        # SNSはContent-Type: text/plainで送信するため、本文を直接読み込む
+        message = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    if message.get("Type") == "SubscriptionConfirmation":
+        subscribe_url = message.get("SubscribeURL", "")
+        host = urlparse(subscribe_url).hostname or ""
+        if not (subscribe_url.startswith("https://") and host.startswith("sns.") and host.endswith(".amazonaws.com")):
+            raise HTTPException(
+                status_code=400, detail="Invalid SubscribeURL")
+        await run_in_threadpool(lambda: urlopen(subscribe_url, timeout=10).read())
+        return {"status": "confirmed"}
+
+    return {"updated": await run_in_threadpool(s3_event_service.ingest, db, message)}
 
 
 @router.patch("/{image_id}/status", response_model=ImageSchema, summary="画像のステータスを更新する")
 def update_image_status(
     image_id: int,
     status_data: dict = Body(..., example={"status": "completed"}),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     画像のステータスを更新します。
@@ -53,7 +217,9 @@ def update_image_status(
     - status_data: 新しいステータス情報
     """
     status = ImageStatus(status_data["status"])
-    return image_service.update_image_status(db, image_id, status)
+    image = image_service.update_image_status(db, image_id, status)
+    return signed_url_service.sign_image(
+        db, image, current_user.id if current_user else None)
 
 
 @router.delete("/{image_id}", summary="画像を削除する")
@@ -64,13 +230,22 @@ def delete_image(image_id: int, db: Session = Depends(get_db)):
 
 @router.get("", response_model=List[ImageSchema], summary="画像一覧を取得する")
 def get_images(
+    response: Response,
     property_id: Optional[int] = None,
     room_id: Optional[int] = None,
     product_id: Optional[int] = None,
     product_specification_id: Optional[int] = None,
     drawing_id: Optional[int] = None,
     include_children: bool = True,
-    db: Session = Depends(get_db)
+    order: ImageOrder = ImageOrder.ID,
+    limit: Optional[int] = Query(
+        None, ge=1, le=500, description="1ページの件数（省略時は全件）"),
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値"),
+    size: Optional[ImageSize] = None,
+    format: ImageFormat = ImageFormat.WEBP,
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     指定されたエンティティに関連する画像一覧を取得します。
@@ -83,33 +258,108 @@ def get_images(
     - product_specification_id: 製品仕様ID（オプション）
     - drawing_id: 図面ID（オプション）
     - include_children: 下位階層の画像を含めるか（デフォルト: True）
+    - order: 下位階層を含める場合の並び順（id: アップロード順 / owner: 物件 → 部屋 → 製品 → 製品仕様の順）
+    - limit: 下位階層を含める場合の1ページの件数。次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します
+    - cursor: 前のページのX-Next-Cursorヘッダーの値
+    - size: 派生画像のサイズ（thumb / card / full）。指定した場合はurlがそのサイズの画像になります
+    - format: 派生画像の形式（webp / jpeg、デフォルト: webp）
 
     Note:
     - property_idが指定された場合: 物件、その部屋、製品、製品仕様の画像を取得
     - room_idが指定された場合: 部屋とその製品、製品仕様の画像を取得
     - product_idが指定された場合: 製品とその製品仕様の画像を取得
     - product_specification_idが指定された場合: 製品仕様の画像のみを取得
-    - drawing_idが指定された場合: 図面の画像のみを取得
-    - 複数指定された場合は、より上位の階層（property > room > product > product_specification > drawing）が優先されます
+    - drawing_idが指定された場合: 図面の画像のみを取得（他のパラメータより優先されます）
+    - 複数指定された場合は、より上位の階層（property > room > product > product_specification）が優先されます
+    - 下位階層の画像は1回のクエリでまとめて取得します（論理削除された部屋・製品の画像は含みません）
+    - 有料画像は、購入済みのユーザー（と物件の登録者）にのみ署名付きURLで返します
     """
-    return image_service.get_images(
+    images = image_service.get_images(
         db,
         property_id=property_id,
         room_id=room_id,
         product_id=product_id,
         product_specification_id=product_specification_id,
         drawing_id=drawing_id,
-        include_children=include_children
+        include_children=include_children,
+        order=order,
+        limit=limit,
+        cursor=cursor
     )
+    if getattr(images, "next_cursor", None):
+        response.headers["X-Next-Cursor"] = images.next_cursor
+    images = signed_url_service.sign_images(
+        db,
+        [ImageSchema.model_validate(image) for image in images],
+        current_user.id if current_user else None
+    )
+    return [image_service.with_size(image, size, format) for image in images]
+
+
+@router.get("/by-owner", response_model=List[ImageOwnerGroupSchema], summary="画像を所有者ごとにまとめて取得する")
+def get_images_by_owner(
+    response: Response,
+    property_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    product_specification_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500, description="1ページの画像の件数"),
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値"),
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
+):
+    """
+    指定された階層とその下位階層の画像を、所有者（物件 → 部屋 → 製品 → 製品仕様）ごとにまとめて取得します。
+
+    部屋・製品ごとに画像一覧を呼び出す代わりに使用できます。
+    1つの所有者の画像がページの境界で分かれた場合、次のページの最初のグループは
+    前のページの最後のグループと同じ所有者になります。
+    次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します。
+    有料画像は、購入済みのユーザー（と物件の登録者）にのみ署名付きURLで返します。
+    """
+    groups, next_cursor = image_service.get_images_by_owner(
+        db,
+        property_id=property_id,
+        room_id=room_id,
+        product_id=product_id,
+        product_specification_id=product_specification_id,
+        limit=limit,
+        cursor=cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    # ページ内の全ての有料画像をまとめて署名する
+    images = iter(signed_url_service.sign_images(
+        db,
+        [image for group in groups for image in group.images],
+        current_user.id if current_user else None
+    ))
+    for group in groups:
+        group.images = [next(images) for _ in group.images]
+    return groups
 
 
 @router.get("/{image_id}", response_model=ImageSchema, summary="指定されたIDの画像を取得する")
-def get_image(image_id: int, db: Session = Depends(get_db)):
-    """指定されたIDの画像を取得する"""
+def get_image(
+    image_id: int,
+    size: Optional[ImageSize] = None,
+    format: ImageFormat = ImageFormat.WEBP,
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
+):
+    """
+    指定されたIDの画像を取得する
+
+    sizeを指定した場合、urlはそのサイズの派生画像になります（未生成の場合は元画像）。
+    有料画像は、購入済みのユーザー（と物件の登録者）にのみ署名付きURLで返します。
+    """
     image = image_service.get_image(db, image_id)
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
-    return image
+    image = signed_url_service.sign_image(
+        db, image, current_user.id if current_user else None)
+    return image_service.with_size(image, size, format)
 
 
 @router.patch("/{image_id}/set-main", response_model=ImageSchema, summary="画像をメインに設定する")
@@ -119,7 +369,8 @@ def set_as_main_image(
     room_id: Optional[int] = None,
     product_id: Optional[int] = None,
     product_specification_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     指定された画像をメイン画像として設定します。
@@ -139,7 +390,7 @@ def set_as_main_image(
             detail="Exactly one of property_id, room_id, product_id, or product_specification_id must be specified"
         )
 
-    return image_service.set_as_main_image(
+    image = image_service.set_as_main_image(
         db,
         image_id=image_id,
         property_id=property_id,
@@ -147,13 +398,16 @@ def set_as_main_image(
         product_id=product_id,
         product_specification_id=product_specification_id
     )
+    return signed_url_service.sign_image(
+        db, image, current_user.id if current_user else None)
 
 
 @router.patch("/{image_id}/type", response_model=ImageSchema, summary="画像タイプを更新する")
 def update_image_type(
     image_id: int,
     image_type: ImageType = Body(..., example={"image_type": "SUB"}),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     画像のタイプを更新します。
@@ -162,4 +416,6 @@ def update_image_type(
     - image_id: 画像ID
     - image_type: 新しい画像タイプ（MAIN/SUB/PAID）
     """
-    return image_service.update_image_type(db, image_id, image_type)
+    image = image_service.update_image_type(db, image_id, image_type)
+    return signed_url_service.sign_image(
+        db, image, current_user.id if current_user else None)
@@ -8,6 +8,8 @@ from app.auth.dependencies import get_current_user
 from app.models import User, Property, ListingItem, SellerProfile
 from app.schemas.listing_item_schemas import ListingItem as ListingItemSchema
 from app.crud.listing_item import listing_item
+from app.crud.counting import CountStrategy
+from app.config import settings
 from app.enums import ListingStatus, Visibility
 
 router = APIRouter(
@@ -56,33 +58,47 @@ def create_listing(
 
 @router.get("", response_model=List[ListingItemSchema])
 def get_listings(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値（指定時はskipより優先）")
 ):
-    """出品一覧を取得"""
+    """
+    出品一覧を取得
+
+    次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します。
+    """
     if not current_user.seller_profile:
         raise HTTPException(
             status_code=403,
             detail="Seller profile is required to view listings"
         )
-    return listing_item.get_multi_by_seller(
+    items = listing_item.get_multi_by_seller(
         db=db,
         seller_user_id=current_user.id,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
+    if items.next_cursor:
+        response.headers["X-Next-Cursor"] = items.next_cursor
+    return items
 
 
 @router.get("/my-listings", response_model=List[ListingItemSchema])
 def get_my_listings(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status: Optional[str] = Query(
-        None, description="DRAFT, PUBLISHED, RESERVED, SOLD, CANCELLEDのいずれか")
+        None, description="DRAFT, PUBLISHED, RESERVED, SOLD, CANCELLEDのいずれか"),
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値（指定時はskipより優先）")
 ):
     """
     ログインユーザーの出品一覧を取得する
@@ -91,6 +107,7 @@ def get_my_listings(
     - skip: スキップする件数
     - limit: 取得する最大件数
     - status: フィルタリングするステータス（オプション）
+    - cursor: 前のページのX-Next-Cursorヘッダーの値（オプション）
     """
     if not current_user.seller_profile:
         raise HTTPException(
@@ -111,16 +128,20 @@ def get_my_listings(
                 detail=f"Invalid status value. Must be one of: {', '.join(ListingStatus.__members__.keys())}"
             )
 
-    # 作成日時の降順でソート
-    query = query.order_by(ListingItem.created_at.desc())
-
-    # ページネーション
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
+    # ページネーション（作成日時の降順）
+    items = listing_item.paginate(
+        query,
+        keys=(ListingItem.created_at, ListingItem.id),
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        count_strategy=CountStrategy(settings.MY_LISTINGS_COUNT_STRATEGY)
+    )
 
-    # ヘッダーに総件数を追加
-    response = Response()
-    response.headers["X-Total-Count"] = str(total)
+    # ヘッダーに総件数と次のページのカーソルを追加
+    response.headers["X-Total-Count"] = str(items.total)
+    if items.next_cursor:
+        response.headers["X-Next-Cursor"] = items.next_cursor
 
     return items
 
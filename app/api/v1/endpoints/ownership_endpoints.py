@@ -0,0 +1,42 @@
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.auth.dependencies import get_current_user
+from app.crud.ownership import OwnedEntity
+from app.schemas.user_schemas import UserSchema
+from app.services.ownership_service import ownership_service
+
+# 1回のリクエストで確認できるIDの上限
+MAX_IDS = 200
+
+router = APIRouter(
+    prefix="/ownership",
+    tags=["ownership"]
+)
+
+
+@router.get("/{entity_type}/is-mine", response_model=Dict[int, bool], summary="複数のエンティティが自分のものかをまとめて確認する")
+def is_mine_batch(
+    entity_type: OwnedEntity,
+    ids: List[int] = Query(..., description="確認するエンティティのID（複数指定可）"),
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    指定されたエンティティが現在のユーザーのものかを1回のクエリでまとめて確認します。
+    一覧画面で編集ボタンを表示するかどうかの判定に使用します。
+
+    Parameters:
+    - entity_type: property / room / product / specification / dimension / drawing / image
+    - ids: エンティティID（例: ?ids=1&ids=2）
+
+    Returns:
+    - Dict[int, bool]: IDごとの判定結果（存在しないIDはFalse）
+    """
+    if len(ids) > MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many ids (max {MAX_IDS})"
+        )
+    return ownership_service.check_many(db, entity_type, ids, current_user.id)
@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy.orm import Session
+from typing import List, Optional
 from app.schemas.product_schemas import (
     ProductSchema,
+    ProductResponseSchema,
     ProductDetailsSchema,
     PropertyProductsResponse
 )
 from app.schemas.product_specification_schemas import ProductSpecificationSchema
 from app.schemas.product_dimension_schemas import ProductDimensionSchema
 from app.services.product_service import product_service
+from app.services.signed_url_service import signed_url_service
 from app.database import get_db
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_optional
 from app.schemas.user_schemas import UserSchema
-from app.models import Product, Room, ProductCategory, ProductSpecification
+from app.models import ProductCategory, ProductSpecification
 from app.crud.product import product as product_crud
 
 router = APIRouter(
@@ -21,7 +23,7 @@ router = APIRouter(
 )
 
 
-@router.post("", response_model=ProductSchema, summary="製品情報を作成する")
+@router.post("", response_model=ProductResponseSchema, summary="製品情報を作成する")
 def create_product(
     room_id: int,
     product_data: ProductSchema,
@@ -32,7 +34,7 @@ def create_product(
     return product_service.create_product(db, product_data)
 
 
-@router.get("", response_model=List[ProductSchema], summary="製品一覧を取得する")
+@router.get("", response_model=List[ProductResponseSchema], summary="製品一覧を取得する")
 def get_products(
     room_id: int,
     skip: int = 0,
@@ -43,7 +45,7 @@ def get_products(
     return product_service.get_products_by_room(db, room_id=room_id, skip=skip, limit=limit)
 
 
-@router.get("/{product_id}", response_model=ProductSchema, summary="指定されたIDの製品を取得する")
+@router.get("/{product_id}", response_model=ProductResponseSchema, summary="指定されたIDの製品を取得する")
 def get_product(product_id: int, db: Session = Depends(get_db)):
     """指定されたIDの製品を取得"""
     product = product_service.get_product(db, product_id)
@@ -70,7 +72,7 @@ def is_my_product(
     return product_service.is_my_product(db, product_id, current_user.id)
 
 
-@router.patch("/{product_id}", response_model=ProductSchema, summary="製品情報を更新する")
+@router.patch("/{product_id}", response_model=ProductResponseSchema, summary="製品情報を更新する")
 async def update_product(
     product_id: int,
     product_data: ProductSchema,
@@ -94,7 +96,8 @@ async def delete_product(
 @router.get("/{product_id}/details", response_model=ProductDetailsSchema, summary="製品の詳細情報を取得する")
 def get_product_details(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     製品の詳細情報を、関連する全ての情報（仕様、寸法、画像）と共に取得します。
@@ -111,8 +114,15 @@ def get_product_details(
         - 製品寸法一覧
         - 部屋の基本情報
         - 物件の基本情報
+
+    有料画像は、購入済みのユーザー（と物件の登録者）にのみ署名付きURLで返します。
     """
-    return product_service.get_product_details(db, product_id)
+    details = product_service.get_product_details(db, product_id)
+    document = ProductDetailsSchema.model_validate(details).model_dump(mode="json")
+    # レスポンスには物件IDが含まれないため、祖先として渡す
+    return signed_url_service.sign_tree(
+        db, document, current_user.id if current_user else None,
+        ancestry=(details["property_id"], details["room_id"], None))
 
 
 @router.get("/property/{property_id}", response_model=List[PropertyProductsResponse], summary="物件に紐づく全製品情報を取得する")
@@ -130,16 +140,7 @@ def get_products_by_property(
     Returns:
     - 製品情報のリスト（部屋情報、カテゴリ情報、製造者情報、仕様、寸法を含む）
     """
-    products = db.query(Product).options(
-        joinedload(Product.room),
-        joinedload(Product.product_category),
-        joinedload(Product.specifications),
-        joinedload(Product.dimensions)
-    ).join(
-        Room, Product.room_id == Room.id
-    ).filter(
-        Room.property_id == property_id
-    ).all()
+    products = product_service.get_products_by_property(db, property_id)
 
     if not products:
         return []
@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from app.schemas.property_schemas import (
     PropertySchema,
-    PropertyDetailsSchema
+    PropertyResponseSchema,
+    PropertyDetailsSchema,
+    PropertyWholeSchema
 )
 from app.schemas.user_schemas import UserSchema
+from app.schemas.import_job_schemas import ImportJobSchema
 from app.services.property_service import property_service
+from app.services.import_job_service import import_job_service
+from app.services.signed_url_service import signed_url_service
 from app.database import get_db
-from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.crud.counting import CountStrategy
+from app.auth.dependencies import get_current_user, get_current_user_optional
 from app.services.user_service import user_service
 from fastapi import status, Response
 
@@ -18,7 +25,7 @@ router = APIRouter(
 )
 
 
-@router.post("", response_model=PropertySchema, summary="物件情報を作成する")
+@router.post("", response_model=PropertyResponseSchema, summary="物件情報を作成する")
 def create_property(
     property_data: PropertySchema,
     db: Session = Depends(get_db),
@@ -30,17 +37,28 @@ def create_property(
     return property_service.create_property(db, PropertySchema(**property_data_dict))
 
 
-@router.get("", response_model=List[PropertySchema], summary="物件一覧を取得する")
+@router.get("", response_model=List[PropertyResponseSchema], summary="物件一覧を取得する")
 def get_properties(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値（指定時はskipより優先）"),
     db: Session = Depends(get_db)
 ):
-    """物件一覧を取得"""
-    return property_service.get_properties(db, skip=skip, limit=limit)
+    """
+    物件一覧を取得
 
+    次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します。
+    """
+    items = property_service.get_properties(
+        db, skip=skip, limit=limit, cursor=cursor)
+    if items.next_cursor:
+        response.headers["X-Next-Cursor"] = items.next_cursor
+    return items
 
-@router.get("/{property_id}", response_model=PropertySchema, summary="指定されたIDの物件情報を取得する")
+
+@router.get("/{property_id}", response_model=PropertyResponseSchema, summary="指定されたIDの物件情報を取得する")
 def get_property(
     property_id: int,
     db: Session = Depends(get_db)
@@ -73,7 +91,8 @@ def is_my_property(
 @router.get("/{property_id}/details", response_model=PropertyDetailsSchema, summary="物件の詳細情報を取得する")
 def get_property_details(
     property_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     物件の詳細情報を、関連する全ての情報（部屋、製品、仕様、寸法、画像）と共に取得します。
@@ -93,23 +112,53 @@ def get_property_details(
                 - 製品の画像一覧
                 - 製品仕様一覧
                 - 製品寸法一覧
+
+    有料画像は、購入済みのユーザー（と物件の登録者）にのみ署名付きURLで返します。
     """
-    return property_service.get_property_details(db, property_id)
+    document = property_service.get_property_details_document(db, property_id)
+    return signed_url_service.sign_tree(
+        db, document, current_user.id if current_user else None)
 
 
-@router.post("/whole", response_model=int, summary="物件全体の情報を作成する")
+@router.post("/whole", response_model=Union[int, ImportJobSchema], summary="物件全体の情報を作成する")
 def create_property_whole(
-    property_data: PropertySchema,
+    property_data: PropertyWholeSchema,
+    response: Response,
+    async_mode: bool = Query(False, description="trueの場合はバックグラウンドで作成し、ジョブ情報を返す"),
     db: Session = Depends(get_db),
     current_user: UserSchema = Depends(get_current_user)
 ):
-    """物件の全情報を作成"""
-    property_data_dict = property_data.model_dump()
-    property_data_dict["user_id"] = current_user.id
-    return property_service.create_property_whole(db, PropertySchema(**property_data_dict))
+    """
+    物件の全情報（部屋・製品・仕様・寸法・画像）を1つのトランザクションで作成
+
+    エンティティ種別ごとに複数行INSERTでまとめて作成し、作成した物件IDを返します。
+    async_mode=trueの場合はジョブを登録して202を返し、作成はバックグラウンドで行います。
+    進捗は GET /properties/jobs/{job_id} で確認できます。
+    """
+    if async_mode:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return import_job_service.submit(db, current_user.id, property_data)
+
+    property_data.user_id = current_user.id
+    return property_service.create_property_whole(db, property_data)
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobSchema, summary="物件一括作成ジョブの状態を取得する")
+def get_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSchema = Depends(get_current_user)
+):
+    """
+    物件一括作成ジョブの状態を取得
+
+    Returns:
+        ImportJobSchema: ステータス、作成された物件ID、エンティティ種別ごとの作成件数、エラー内容
+    """
+    return import_job_service.get_job(db, job_id, current_user.id)
 
 
-@router.patch("/{property_id}", response_model=PropertySchema, summary="物件情報を更新する")
+@router.patch("/{property_id}", response_model=PropertyResponseSchema, summary="物件情報を更新する")
 async def update_property(
     property_id: int,
     property_data: PropertySchema,
@@ -140,7 +189,7 @@ async def delete_property(
     return await property_service.delete_property(db, property_id)
 
 
-@router.get("/by-user/{user_id}", response_model=List[PropertySchema])
+@router.get("/by-user/{user_id}", response_model=List[PropertyResponseSchema])
 def get_properties_by_user(
     user_id: int,
     response: Response,
@@ -148,9 +197,15 @@ def get_properties_by_user(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     property_type: str = None,
-    prefecture: str = None
+    prefecture: str = None,
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値（指定時はskipより優先）")
 ):
-    """指定されたユーザーIDの物件一覧を取得"""
+    """
+    指定されたユーザーIDの物件一覧を取得
+
+    次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します。
+    """
     filters = {}
     if property_type:
         filters["property_type"] = property_type
@@ -162,10 +217,14 @@ def get_properties_by_user(
         user_id=user_id,
         skip=skip,
         limit=limit,
-        filters=filters
+        filters=filters,
+        cursor=cursor,
+        count_strategy=CountStrategy(settings.PROPERTIES_BY_USER_COUNT_STRATEGY)
     )
 
     response.headers["X-Total-Count"] = str(total)
+    if items.next_cursor:
+        response.headers["X-Next-Cursor"] = items.next_cursor
     return items
 
 # ... 他の物件関連エンドポイント
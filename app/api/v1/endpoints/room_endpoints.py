@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.schemas.room_schemas import (
     RoomSchema,
+    RoomResponseSchema,
     RoomDetailsSchema
 )
 from app.schemas.user_schemas import UserSchema
 from app.services.room_service import room_service
+from app.services.signed_url_service import signed_url_service
 from app.database import get_db
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_optional
 
 router = APIRouter(
     prefix="/rooms",
@@ -16,7 +18,7 @@ router = APIRouter(
 )
 
 
-@router.post("", response_model=RoomSchema, summary="部屋情報を作成する")
+@router.post("", response_model=RoomResponseSchema, summary="部屋情報を作成する")
 def create_room(
     room_data: RoomSchema,
     db: Session = Depends(get_db),
@@ -26,18 +28,29 @@ def create_room(
     return room_service.create_room(db, room_data)
 
 
-@router.get("", response_model=List[RoomSchema], summary="部屋情報（複数）を取得する")
+@router.get("", response_model=List[RoomResponseSchema], summary="部屋情報（複数）を取得する")
 def get_rooms(
     property_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(
+        None, description="前のページのX-Next-Cursorヘッダーの値（指定時はskipより優先）"),
     db: Session = Depends(get_db)
 ):
-    """指定された物件の部屋一覧を取得"""
-    return room_service.get_rooms(db, property_id=property_id, skip=skip, limit=limit)
+    """
+    指定された物件の部屋一覧を取得
+
+    次のページがある場合はX-Next-Cursorヘッダーにカーソルを返します。
+    """
+    items = room_service.get_rooms(
+        db, property_id=property_id, skip=skip, limit=limit, cursor=cursor)
+    if items.next_cursor:
+        response.headers["X-Next-Cursor"] = items.next_cursor
+    return items
 
 
-@router.get("/{room_id}", response_model=RoomSchema, summary="部屋情報を取得する")
+@router.get("/{room_id}", response_model=RoomResponseSchema, summary="部屋情報を取得する")
 def get_room(room_id: int, db: Session = Depends(get_db)):
     """指定されたIDの部屋を取得"""
     room = room_service.get_room(db, room_id)
@@ -64,7 +77,7 @@ def is_my_room(
     return room_service.is_my_room(db, room_id, current_user.id)
 
 
-@router.patch("/{room_id}", response_model=RoomSchema, summary="部屋情報を更新する")
+@router.patch("/{room_id}", response_model=RoomResponseSchema, summary="部屋情報を更新する")
 async def update_room(
     room_id: int,
     room_data: RoomSchema,
@@ -88,7 +101,8 @@ async def delete_room(
 @router.get("/{room_id}/details", response_model=RoomDetailsSchema, summary="部屋の詳細情報を取得する")
 def get_room_details(
     room_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
     """
     部屋の詳細情報を、関連する全ての情報（製品、仕様、寸法、画像）と共に取得します。
@@ -107,5 +121,10 @@ def get_room_details(
             - 製品仕様一覧
             - 製品寸法一覧
         - 物件の基本情報
+
+    有料画像は、購入済みのユーザー（と物件の登録者）にのみ署名付きURLで返します。
     """
-    return room_service.get_room_details(db, room_id)
+    details = room_service.get_room_details(db, room_id)
+    document = RoomDetailsSchema.model_validate(details).model_dump(mode="json")
+    return signed_url_service.sign_tree(
+        db, document, current_user.id if current_user else None)
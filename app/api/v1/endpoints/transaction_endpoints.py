@@ -5,7 +5,8 @@ from sqlalchemy import and_
 from datetime import datetime
 from typing import Dict, Any
 
-from app.auth.dependencies import get_db, get_current_user, get_current_user_optional
+from app.database import get_db
+from app.auth.dependencies import get_current_user, get_current_user_optional
 from app.models import User, Property, ListingItem, Transaction, BuyerProfile, TransactionAuditLog, TransactionErrorLog
 from app.enums import TransactionStatus, ListingStatus, TransferStatus, ChangeType, ErrorType, PaymentStatus
 from app.schemas.transaction_schemas import (
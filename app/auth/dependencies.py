@@ -1,19 +1,13 @@
 from fastapi import Depends, HTTPException, status, Header
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+# エンドポイントと同じget_dbを使用することで、FastAPIが1リクエスト内で依存関係をキャッシュし、
+# 認証とエンドポイントで1つのセッション（プールの接続1本）を共有する
+from app.database import get_db
 from app.services.user_service import user_service
 from app.schemas import UserSchema
 from typing import Optional
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 async def get_current_user(
     clerk_user_id: str = Header(..., description="ClerkのユーザーID",
                                 alias="x-clerk-user-id"),
@@ -0,0 +1,12 @@
+from .backends import CacheBackend, InMemoryLRUBackend, CacheStats, register_backend, create_backend
+from .invalidation import register_invalidator, invalidate_on_commit
+
+__all__ = [
+    "CacheBackend",
+    "InMemoryLRUBackend",
+    "CacheStats",
+    "register_backend",
+    "create_backend",
+    "register_invalidator",
+    "invalidate_on_commit",
+]
@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Type
+
+
+class CacheBackend:
+    """
+    キャッシュバックエンドの基底クラス
+
+    値はJSONに変換可能なオブジェクトとして渡されるため、
+    Redisなどプロセス外のストアを実装する場合もそのままシリアライズできます。
+    """
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """統計情報に含めるバックエンド固有の情報"""
+        return {"backend": self.name, "size": len(self)}
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """
+    プロセス内で保持するLRUキャッシュ（スレッドセーフ）
+
+    ttl（秒）を指定すると、保存から一定時間が経過したエントリは存在しないものとして扱います。
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 1000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (有効期限, 値)
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            expires_at, value = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "size": len(self), "maxsize": self.maxsize, "ttl": self.ttl}
+
+
+_backends: Dict[str, Type[CacheBackend]] = {
+    InMemoryLRUBackend.name: InMemoryLRUBackend,
+}
+
+
+def register_backend(name: str, backend_class: Type[CacheBackend]) -> None:
+    """設定値から選択できるバックエンドを登録する"""
+    _backends[name] = backend_class
+
+
+def create_backend(name: str, **kwargs) -> CacheBackend:
+    """
+    名前を指定してバックエンドを生成する
+
+    Raises:
+        ValueError: 未登録のバックエンド名が指定された場合
+    """
+    if name not in _backends:
+        raise ValueError(
+            f"Unknown cache backend: {name}. Must be one of: {', '.join(_backends)}")
+    return _backends[name](**kwargs)
+
+
+class CacheStats:
+    """ヒット・ミスの件数を集計する"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = Lock()
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def record_invalidation(self, count: int = 1) -> None:
+        with self._lock:
+            self.invalidations += count
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,65 @@
+from typing import Any, Callable, Iterable, List, Set, Tuple, Type
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# (対象モデル, 影響を受けるキーを求める関数, キーを無効化する関数)
+Resolver = Callable[[Session, List[Any]], Set[Any]]
+Invalidate = Callable[[Set[Any]], None]
+
+_invalidators: List[Tuple[Tuple[Type, ...], Resolver, Invalidate]] = []
+
+_PENDING_KEY = "cache_pending_invalidations"
+
+
+def register_invalidator(
+    models: Iterable[Type],
+    resolve: Resolver,
+    invalidate: Invalidate
+) -> None:
+    """
+    ORM経由の書き込みでキャッシュを無効化するフックを登録する
+
+    指定したモデルのオブジェクトがflushされるとresolveで無効化対象のキーを求め、
+    flush直後とcommit直後の2回invalidateを呼び出します。
+    commit直後にも無効化することで、flushからcommitまでの間に
+    他のリクエストが古いデータをキャッシュしてしまうことを防ぎます。
+    """
+    _invalidators.append((tuple(models), resolve, invalidate))
+
+
+def _collect(session: Session, objects: Iterable[Any]) -> None:
+    objects = list(objects)
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for models, resolve, invalidate in _invalidators:
+        targets = [obj for obj in objects if isinstance(obj, models)]
+        if not targets:
+            continue
+        keys = resolve(session, targets)
+        if keys:
+            invalidate(keys)
+            pending.append((invalidate, keys))
+
+
+def invalidate_on_commit(session: Session, *objects: Any) -> None:
+    """
+    flushを伴わない書き込み（query.delete()やCoreのUPDATEなど）の後に、
+    影響を受けるオブジェクトを明示的に無効化対象として登録する
+    """
+    _collect(session, objects)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    _collect(session, list(session.new) +
+             list(session.dirty) + list(session.deleted))
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    for invalidate, keys in session.info.pop(_PENDING_KEY, []):
+        invalidate(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
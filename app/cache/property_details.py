@@ -0,0 +1,150 @@
+from threading import Lock
+from typing import Any, Callable, Dict, List, Set
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cache.backends import CacheBackend, CacheStats, create_backend
+from app.cache.invalidation import register_invalidator
+from app.config import get_settings
+from app.models import (
+    Property,
+    Room,
+    Product,
+    ProductSpecification,
+    ProductDimension,
+    Image
+)
+
+settings = get_settings()
+
+
+class PropertyDetailCache:
+    """
+    物件詳細（/properties/{id}/details）のシリアライズ済みドキュメントを物件ごとに保持するキャッシュ
+
+    物件・部屋・製品・仕様・寸法・画像がORM経由で書き込まれると、
+    該当する物件のエントリが自動的に無効化されます。
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.stats = CacheStats()
+        # 構築中に無効化が発生した場合、古いドキュメントを保存しないための世代番号
+        self._generation = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(property_id: int) -> str:
+        return f"property_details:{property_id}"
+
+    def set_backend(self, backend: CacheBackend) -> None:
+        """バックエンドを差し替える（既存のエントリは引き継がれません）"""
+        with self._lock:
+            self.backend = backend
+            self._generation += 1
+
+    def get_or_build(
+        self,
+        property_id: int,
+        build: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        キャッシュ済みのドキュメントを返す。存在しない場合はbuildで構築して保存する
+        """
+        if not self.enabled:
+            return build()
+
+        key = self._key(property_id)
+        document = self.backend.get(key)
+        if document is not None:
+            self.stats.record_hit()
+            return document
+
+        self.stats.record_miss()
+        generation = self._generation
+        document = build()
+        with self._lock:
+            if generation == self._generation:
+                self.backend.set(key, document)
+        return document
+
+    def invalidate(self, property_ids: Set[int]) -> None:
+        """指定された物件のエントリを削除する"""
+        with self._lock:
+            self._generation += 1
+            for property_id in property_ids:
+                self.backend.delete(self._key(property_id))
+        self.stats.record_invalidation(len(property_ids))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            **self.backend.describe(),
+            **self.stats.as_dict()
+        }
+
+
+def _resolve_property_ids(session: Session, objects: List[Any]) -> Set[int]:
+    """書き込まれたオブジェクトが属する物件IDを求める"""
+    property_ids: Set[int] = set()
+    room_ids: Set[int] = set()
+    product_ids: Set[int] = set()
+    spec_ids: Set[int] = set()
+
+    for obj in objects:
+        if isinstance(obj, Property):
+            property_ids.add(obj.id)
+        elif isinstance(obj, Room):
+            property_ids.add(obj.property_id)
+        elif isinstance(obj, Product):
+            room_ids.add(obj.room_id)
+        elif isinstance(obj, (ProductSpecification, ProductDimension)):
+            product_ids.add(obj.product_id)
+        elif isinstance(obj, Image):
+            property_ids.add(obj.property_id)
+            room_ids.add(obj.room_id)
+            product_ids.add(obj.product_id)
+            spec_ids.add(obj.product_specification_id)
+
+    spec_ids.discard(None)
+    if spec_ids:
+        product_ids.update(session.execute(
+            select(ProductSpecification.product_id)
+            .where(ProductSpecification.id.in_(spec_ids))
+        ).scalars())
+
+    product_ids.discard(None)
+    if product_ids:
+        room_ids.update(session.execute(
+            select(Product.room_id).where(Product.id.in_(product_ids))
+        ).scalars())
+
+    room_ids.discard(None)
+    if room_ids:
+        property_ids.update(session.execute(
+            select(Room.property_id).where(Room.id.in_(room_ids))
+        ).scalars())
+
+    property_ids.discard(None)
+    return property_ids
+
+
+property_detail_cache = PropertyDetailCache(
+    backend=create_backend(
+        settings.PROPERTY_DETAIL_CACHE_BACKEND,
+        maxsize=settings.PROPERTY_DETAIL_CACHE_SIZE
+    ),
+    enabled=settings.PROPERTY_DETAIL_CACHE_ENABLED
+)
+
+register_invalidator(
+    (Property, Room, Product, ProductSpecification, ProductDimension, Image),
+    _resolve_property_ids,
+    property_detail_cache.invalidate
+)
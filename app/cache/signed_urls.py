@@ -0,0 +1,90 @@
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from app.cache.backends import CacheStats, InMemoryLRUBackend
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class SignedURLCache:
+    """
+    有料画像の署名付きURLを (s3_key, 購入者) ごとに保持するキャッシュ
+
+    各エントリは署名付きURLとその有効期限（UNIX時刻）を保持し、残りの有効期間が
+    refresh_margin秒を下回ったエントリは存在しないものとして扱って再発行させます。
+    そのため、返すURLには常にrefresh_margin秒以上の有効期間が残っています。
+    バックエンドのttlも同じ時点で切れるように設定し、期限の近いエントリはLRUから追い出します。
+    """
+
+    def __init__(
+        self,
+        expires_in: int = settings.PAID_IMAGE_URL_EXPIRES_SECONDS,
+        refresh_margin: int = settings.PAID_IMAGE_URL_REFRESH_MARGIN_SECONDS,
+        maxsize: int = settings.PAID_IMAGE_URL_CACHE_SIZE,
+        clock: Callable[[], float] = time.time
+    ):
+        if refresh_margin >= expires_in:
+            raise ValueError(
+                "refresh_margin must be shorter than expires_in")
+        self.expires_in = expires_in
+        self.refresh_margin = refresh_margin
+        self.backend = InMemoryLRUBackend(
+            maxsize=maxsize, ttl=expires_in - refresh_margin)
+        self.stats = CacheStats()
+        self.clock = clock
+
+    @staticmethod
+    def _key(s3_key: str, user_id: int) -> str:
+        return f"{user_id}:{s3_key}"
+
+    def get_many(
+        self,
+        s3_keys: Iterable[str],
+        user_id: int,
+        sign: Callable[[str, int], str]
+    ) -> Dict[str, str]:
+        """
+        キーごとの署名付きURLを返す。キャッシュにない・期限が近いキーだけをsignで署名する
+
+        Args:
+            s3_keys (Iterable[str]): 署名するオブジェクトのキー
+            user_id (int): 購入者のユーザーID
+            sign (Callable[[str, int], str]): (キー, 有効期間の秒数) から署名付きURLを返す関数
+
+        Returns:
+            Dict[str, str]: キーごとの署名付きURL
+        """
+        now = self.clock()
+        urls: Dict[str, str] = {}
+        missing: List[str] = []
+        for s3_key in dict.fromkeys(s3_keys):
+            cached: Tuple[str, float] = self.backend.get(
+                self._key(s3_key, user_id))
+            if cached is not None and cached[1] - now > self.refresh_margin:
+                self.stats.record_hit()
+                urls[s3_key] = cached[0]
+            else:
+                self.stats.record_miss()
+                missing.append(s3_key)
+
+        expires_at = now + self.expires_in
+        for s3_key in missing:
+            url = sign(s3_key, self.expires_in)
+            self.backend.set(self._key(s3_key, user_id), (url, expires_at))
+            urls[s3_key] = url
+        return urls
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.backend.describe(),
+            "expires_in": self.expires_in,
+            "refresh_margin": self.refresh_margin,
+            **self.stats.as_dict()
+        }
+
+
+signed_url_cache = SignedURLCache()
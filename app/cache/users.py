@@ -0,0 +1,122 @@
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+from app.cache.backends import CacheStats, InMemoryLRUBackend
+from app.cache.invalidation import register_invalidator
+from app.config import get_settings
+from app.models import User, SellerProfile, BuyerProfile
+
+settings = get_settings()
+
+
+class UserCache:
+    """
+    ClerkのユーザーIDから解決したUserをプロセス内に保持するキャッシュ
+
+    セッションから切り離したUser（読み込み済みのseller_profile・buyer_profileを含む）を保存し、
+    取得時にはmerge(load=False)でリクエストのセッションへSQLを発行せずに結び付けます。
+    ORMオブジェクトをそのまま保持するため、バックエンドはプロセス内のLRUに限られます。
+    User・SellerProfile・BuyerProfileがORM経由で書き込まれると該当ユーザーのエントリが無効化され、
+    他のプロセスでの書き込みはttlで反映されます。
+    """
+
+    def __init__(self, maxsize: int = 5000, ttl: Optional[float] = 60, enabled: bool = True):
+        self.backend = InMemoryLRUBackend(maxsize=maxsize, ttl=ttl)
+        self.enabled = enabled
+        self.stats = CacheStats()
+        # 読み込み中に無効化が発生した場合、古いユーザーを保存しないための世代番号
+        self._generation = 0
+        self._lock = Lock()
+
+    def get_or_load(
+        self,
+        db: Session,
+        clerk_user_id: str,
+        load: Callable[[], Optional[User]]
+    ) -> Optional[User]:
+        """
+        キャッシュ済みのユーザーをdbに結び付けて返す。存在しない場合はloadで読み込んで保存する
+
+        読み込んだインスタンスはキャッシュに保存するためdbから切り離されるので、
+        リクエストの最初（認証の依存関数）で呼び出してください。
+        """
+        if not self.enabled:
+            return load()
+
+        cached = self.backend.get(clerk_user_id)
+        if cached is not None:
+            self.stats.record_hit()
+            return db.merge(cached, load=False)
+
+        self.stats.record_miss()
+        generation = self._generation
+        user = load()
+        if user is None:
+            return None
+
+        # 読み込んだインスタンス（と読み込み済みのプロフィール）をセッションから切り離して保存し、
+        # 呼び出し元にはヒット時と同じくmergeしたインスタンスを返す
+        db.expunge(user)
+        with self._lock:
+            if generation == self._generation:
+                self.backend.set(clerk_user_id, user)
+        return db.merge(user, load=False)
+
+    def invalidate(self, clerk_user_ids: Set[str]) -> None:
+        """指定されたユーザーのエントリを削除する"""
+        with self._lock:
+            self._generation += 1
+            for clerk_user_id in clerk_user_ids:
+                self.backend.delete(clerk_user_id)
+        self.stats.record_invalidation(len(clerk_user_ids))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            **self.backend.describe(),
+            **self.stats.as_dict()
+        }
+
+
+def _resolve_clerk_user_ids(session: Session, objects: List[Any]) -> Set[str]:
+    """書き込まれたオブジェクトが属するユーザーのClerkユーザーIDを求める"""
+    clerk_user_ids: Set[str] = set()
+    user_ids: Set[int] = set()
+
+    for obj in objects:
+        if isinstance(obj, User):
+            clerk_user_ids.add(obj.clerk_user_id)
+            # ClerkユーザーIDが変更された場合は変更前のキーも無効化する
+            clerk_user_ids.update(
+                inspect(obj).attrs.clerk_user_id.history.deleted)
+        elif isinstance(obj, (SellerProfile, BuyerProfile)):
+            user_ids.add(obj.user_id)
+
+    user_ids.discard(None)
+    if user_ids:
+        clerk_user_ids.update(session.execute(
+            select(User.clerk_user_id).where(User.id.in_(user_ids))
+        ).scalars())
+
+    clerk_user_ids.discard(None)
+    return clerk_user_ids
+
+
+user_cache = UserCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    enabled=settings.USER_CACHE_ENABLED
+)
+
+register_invalidator(
+    (User, SellerProfile, BuyerProfile),
+    _resolve_clerk_user_ids,
+    user_cache.invalidate
+)
@@ -17,6 +17,49 @@ class Settings(BaseSettings):
     AWS_S3_BUCKET: Optional[str] = None
     AWS_REGION: str = "ap-northeast-1"
 
+    # S3のアップロード完了通知（ObjectCreatedイベント）
+    # SQSのキューURLを設定するとバックグラウンドでポーリングする
+    S3_EVENT_QUEUE_URL: Optional[str] = None
+    # SNSのHTTP(S)サブスクリプション（/images/events/s3?token=...）の認証トークン
+    S3_EVENT_WEBHOOK_TOKEN: Optional[str] = None
+    S3_EVENT_BATCH_SIZE: int = 500
+    S3_EVENT_POLL_WAIT_SECONDS: int = 20
+
+    # S3オブジェクトの削除（削除済み画像・アップロードされなかった画像）
+    # 署名付きURLの有効期限（3600秒）を過ぎてもpendingの画像を削除するまでの秒数
+    PENDING_IMAGE_TTL_SECONDS: float = 7200
+    STORAGE_CLEANUP_INTERVAL_SECONDS: float = 300
+    STORAGE_DELETION_MAX_ATTEMPTS: int = 5
+
+    # 大きな画像・図面のマルチパートアップロード
+    # パートのサイズ（S3の下限は5MiB。パート数が10000を超える場合は自動的に大きくする）
+    MULTIPART_UPLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    MULTIPART_UPLOAD_MAX_FILE_SIZE: int = 5 * 1024 * 1024 * 1024
+    # 途中から再開できるよう、通常のアップロードより長くpendingのまま残す秒数
+    MULTIPART_UPLOAD_TTL_SECONDS: float = 86400
+
+    # 画像の派生ファイル（サイズ別のサムネイル・WebP）
+    IMAGE_DERIVATIVES_ENABLED: bool = True
+    IMAGE_DERIVATIVE_MAX_WORKERS: int = 2
+    IMAGE_DERIVATIVE_FORMATS: List[str] = ["webp", "jpeg"]
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    # 派生ファイルの保存先（s3 / local）
+    IMAGE_STORAGE_BACKEND: str = "s3"
+    LOCAL_STORAGE_ROOT: str = "storage"
+    LOCAL_STORAGE_BASE_URL: str = "http://localhost:8000/storage"
+
+    # 図面の画像のタイル（Deep Zoom）
+    DRAWING_TILES_ENABLED: bool = True
+    DRAWING_TILE_SIZE: int = 254
+    DRAWING_TILE_OVERLAP: int = 1
+    DRAWING_TILE_FORMAT: str = "jpeg"
+    DRAWING_TILE_UPLOAD_CONCURRENCY: int = 8
+    # タイルを生成する図面の画像のピクセル数の上限（A1の600dpiのスキャン程度）
+    DRAWING_TILE_MAX_PIXELS: int = 300_000_000
+
+    # 同じ内容の画像の重複排除（内容のSHA-256で1つのオブジェクトを共有する）
+    IMAGE_DEDUP_ENABLED: bool = False
+
     # CORS設定
     CORS_ORIGINS: List[str] = [
         "http://localhost:5173",
@@ -54,6 +97,39 @@ class Settings(BaseSettings):
     # フロントエンドURL
     BASE_URL: str
 
+    # キャッシュ設定
+    PROPERTY_DETAIL_CACHE_ENABLED: bool = True
+    PROPERTY_DETAIL_CACHE_BACKEND: str = "memory"
+    PROPERTY_DETAIL_CACHE_SIZE: int = 1000
+    COUNT_CACHE_SIZE: int = 1000
+    COUNT_CACHE_TTL_SECONDS: float = 30
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_SIZE: int = 5000
+    USER_CACHE_TTL_SECONDS: float = 60
+    # 認証時にseller_profile・buyer_profileも同じクエリで読み込むかどうか
+    USER_CACHE_PRELOAD_PROFILES: bool = True
+    # 有料画像（PAID）の署名付きURLの有効期間と、期限切れ前に再発行する猶予
+    PAID_IMAGE_URL_EXPIRES_SECONDS: int = 3600
+    PAID_IMAGE_URL_REFRESH_MARGIN_SECONDS: int = 300
+    PAID_IMAGE_URL_CACHE_SIZE: int = 10000
+
+    # 一覧の総件数（X-Total-Count）の求め方（separate / window / cached）
+    PROPERTIES_BY_USER_COUNT_STRATEGY: str = "cached"
+    MY_LISTINGS_COUNT_STRATEGY: str = "window"
+
+    # バックグラウンドジョブ設定
+    IMPORT_JOB_MAX_WORKERS: int = 2
+    IMPORT_JOB_MAX_PENDING: int = 20
+
+    # 状態変更の通知（SSE）設定
+    # 複数のワーカーで実行する場合はredisを指定し、全てのワーカーの接続にイベントを届ける
+    EVENT_BACKPLANE: str = "local"
+    EVENT_REDIS_URL: Optional[str] = None
+    EVENT_REDIS_CHANNEL: str = "ielove:events"
+    # 接続ごとに保持する未送信のイベント数と、無通信時にコメントを送る間隔
+    EVENT_QUEUE_SIZE: int = 100
+    EVENT_HEARTBEAT_SECONDS: float = 15
+
     model_config = SettingsConfigDict(
         # 環境変数から設定ファイルを決定
         env_file=f".env.{os.getenv('ENVIRONMENT', 'development')}",
@@ -1,14 +1,73 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
+from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, tuple_
+from sqlalchemy.orm import Session, Query
 from app.database import Base
+from app.crud.counting import CountStrategy, count_rows
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class Page(List[ModelType]):
+    """
+    キーセットページネーションの結果
+
+    通常のリストとして扱えるため、従来のList[Model]を返すメソッドの戻り値としてそのまま使用できます。
+    next_cursorには次のページを取得するためのカーソルが入ります（最後のページの場合はNone）。
+    totalには総件数が入ります（count_strategyを指定しなかった場合はNone）。
+    """
+
+    def __init__(
+        self,
+        items: Sequence[ModelType] = (),
+        next_cursor: Optional[str] = None,
+        total: Optional[int] = None
+    ):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """ソートキーの値を不透明なカーソル文字列に変換する"""
+    def default(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        raise TypeError(f"Unsupported cursor value: {value!r}")
+
+    raw = json.dumps(list(values), default=default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """
+    カーソル文字列をソートキーの値に戻す
+
+    不正なカーソルの場合は400エラーを返します。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor length mismatch")
+        decoded = []
+        for key, value in zip(keys, values):
+            if value is not None and key.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, binascii.Error, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -35,6 +94,81 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(self, db: Session, *, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        複数のレコードを1回の複数行INSERT ... RETURNINGで作成し、作成されたIDを入力順に返す
+
+        commitは行わないため、トランザクションの管理は呼び出し側で行うこと。
+        全ての行は同じキーを持つ必要があります。
+        """
+        if not rows:
+            return []
+        result = db.execute(
+            insert(self.model).returning(
+                self.model.id, sort_by_parameter_order=True),
+            rows
+        )
+        return list(result.scalars())
+
+    def paginate(
+        self,
+        query: Query,
+        *,
+        keys: Sequence[Any],
+        limit: int,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        descending: bool = True,
+        count_strategy: Optional[CountStrategy] = None
+    ) -> Page[ModelType]:
+        """
+        キーセット（カーソル）ページネーションでqueryを取得する
+
+        keysの順でソートし、カーソルが指定された場合は (keys) < (カーソルの値)
+        （昇順の場合は >）の行から取得します。OFFSETと異なり、深いページでも
+        読み飛ばす行が発生しないため、keysに対応するインデックスがあれば一定の速度で取得できます。
+        keysの最後には一意な列（id）を含めてください。
+
+        カーソルが指定されていない場合は後方互換性のためskip（OFFSET）を使用します。
+        いずれの場合も、結果のnext_cursorで続きのページを取得できます。
+
+        count_strategyを指定すると、カーソル・OFFSETを適用する前の総件数をtotalに設定します。
+        WINDOWはOFFSETのページでのみ1回のクエリで求め、カーソル指定時
+        （カーソル以降の件数しか数えられないため）と範囲外のページではCOUNTクエリを発行します。
+        """
+        use_window = count_strategy == CountStrategy.WINDOW and not cursor
+        total = None
+        if count_strategy is not None and not use_window:
+            total = count_rows(query, count_strategy)
+
+        page_query = query.order_by(
+            *[key.desc() if descending else key.asc() for key in keys])
+        if cursor:
+            values = decode_cursor(cursor, keys)
+            row, bound = tuple_(*keys), tuple_(*values)
+            page_query = page_query.filter(
+                row < bound if descending else row > bound)
+        elif skip:
+            page_query = page_query.offset(skip)
+
+        if use_window:
+            rows = page_query.add_columns(
+                func.count().over()).limit(limit + 1).all()
+            items = [item for item, _ in rows]
+            if rows:
+                total = rows[0][1]
+            else:
+                total = count_rows(query, CountStrategy.SEPARATE) if skip else 0
+        else:
+            items = page_query.limit(limit + 1).all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(
+                [getattr(items[-1], key.key) for key in keys])
+        return Page(items, next_cursor, total)
+
     def update(
         self,
         db: Session,
@@ -0,0 +1,74 @@
+import hashlib
+from enum import Enum
+from typing import Any, Dict
+from sqlalchemy.orm import Query
+
+from app.cache.backends import CacheBackend, CacheStats, InMemoryLRUBackend
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class CountStrategy(str, Enum):
+    """
+    一覧の総件数（X-Total-Count）の求め方
+
+    - SEPARATE: ページの取得とは別にCOUNTクエリを発行する（従来の方式）
+    - WINDOW: ページの取得クエリに count(*) OVER() を追加し、1回のクエリで求める。
+      条件に一致する全行を読んでからLIMITを適用するため、件数が少ない一覧向け
+    - CACHED: COUNTクエリの結果を条件ごとに短時間キャッシュする。件数は最大TTL秒遅れる
+    """
+    SEPARATE = "separate"
+    WINDOW = "window"
+    CACHED = "cached"
+
+
+class CountCache:
+    """COUNTクエリの結果を、SQLとパラメータ（＝フィルター条件）ごとにTTL付きで保持する"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _key(query: Query) -> str:
+        compiled = query.statement.compile()
+        params = sorted((k, repr(v)) for k, v in compiled.params.items())
+        digest = hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()
+        return f"count:{digest}"
+
+    def count(self, query: Query) -> int:
+        key = self._key(query)
+        total = self.backend.get(key)
+        if total is not None:
+            self.stats.record_hit()
+            return total
+
+        self.stats.record_miss()
+        total = query.count()
+        self.backend.set(key, total)
+        return total
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.backend.describe(), **self.stats.as_dict()}
+
+
+count_cache = CountCache(InMemoryLRUBackend(
+    maxsize=settings.COUNT_CACHE_SIZE,
+    ttl=settings.COUNT_CACHE_TTL_SECONDS
+))
+
+
+def count_rows(query: Query, strategy: CountStrategy) -> int:
+    """
+    queryの件数を別クエリで求める
+
+    WINDOWは取得クエリと同時に求めるため、ここではSEPARATEと同じ扱いになります。
+    """
+    query = query.order_by(None)
+    if CountStrategy(strategy) == CountStrategy.CACHED:
+        return count_cache.count(query)
+    return query.count()
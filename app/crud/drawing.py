@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models import Drawing
 from app.schemas.drawing_schemas import DrawingSchema
-from .base import BaseCRUD
+from .base import BaseCRUD, Page
 from typing import List, Optional
 
 
@@ -11,17 +11,20 @@ class DrawingCRUD(BaseCRUD[Drawing, DrawingSchema, DrawingSchema]):
         db: Session,
         property_id: int,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Drawing]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page[Drawing]:
         """
-        指定された物件に紐づく図面一覧を取得する
+        指定された物件に紐づく図面一覧をID順に取得する（cursor指定時はキーセットページネーション）
         """
-        return (
+        return self.paginate(
             db.query(self.model)
-            .filter(Drawing.property_id == property_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .filter(Drawing.property_id == property_id),
+            keys=(Drawing.id,),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            descending=False
         )
 
 
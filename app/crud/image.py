@@ -1,11 +1,62 @@
+from collections import defaultdict
+from sqlalchemy import or_, select, update
 from sqlalchemy.orm import Session
-from app.models import Image, Room, Product, ProductSpecification
+from app.enums import ImageType
+from app.models import Image, Property, Room, Product, ProductSpecification
 from app.schemas import ImageSchema
-from .base import BaseCRUD
-from typing import List, Optional
+from app.schemas.image_schemas import ImageOrder
+from .base import BaseCRUD, Page
+from .ownership import OwnedEntity, owned_ids_select
+from typing import Dict, Iterable, List, Optional, Set, Type
 from fastapi import HTTPException
 
 
+# メイン画像（main_image_id / main_image_url）を持つ親エンティティと、画像側の外部キー
+MAIN_IMAGE_PARENTS = (
+    (Property, Image.property_id),
+    (Room, Image.room_id),
+    (Product, Image.product_id),
+)
+
+
+class GroupedImages:
+    """
+    親エンティティ（物件・部屋・製品・製品仕様）ごとにグループ化された画像
+
+    1枚の画像が複数の親IDを持つ場合は、それぞれのグループに含まれます。
+    """
+
+    def __init__(self):
+        self.by_property: Dict[int, List[Image]] = defaultdict(list)
+        self.by_room: Dict[int, List[Image]] = defaultdict(list)
+        self.by_product: Dict[int, List[Image]] = defaultdict(list)
+        self.by_product_specification: Dict[int, List[Image]] = defaultdict(
+            list)
+
+    def add(self, image: Image) -> None:
+        if image.property_id is not None:
+            self.by_property[image.property_id].append(image)
+        if image.room_id is not None:
+            self.by_room[image.room_id].append(image)
+        if image.product_id is not None:
+            self.by_product[image.product_id].append(image)
+        if image.product_specification_id is not None:
+            self.by_product_specification[image.product_specification_id].append(
+                image)
+
+    def for_property(self, property_id: int) -> List[Image]:
+        return self.by_property.get(property_id, [])
+
+    def for_room(self, room_id: int) -> List[Image]:
+        return self.by_room.get(room_id, [])
+
+    def for_product(self, product_id: int) -> List[Image]:
+        return self.by_product.get(product_id, [])
+
+    def for_product_specification(self, product_specification_id: int) -> List[Image]:
+        return self.by_product_specification.get(product_specification_id, [])
+
+
 class ImageCRUD(BaseCRUD[Image, ImageSchema, ImageSchema]):
     def __init__(self):
         super().__init__(Image)
@@ -63,5 +114,230 @@ class ImageCRUD(BaseCRUD[Image, ImageSchema, ImageSchema]):
             # エラーが発生した場合は空のリストを返す
             return []
 
+    def subtree_condition(
+        self,
+        *,
+        property_id: Optional[int] = None,
+        room_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        product_specification_id: Optional[int] = None
+    ):
+        """
+        指定されたエンティティとその下位階層（物件 → 部屋 → 製品 → 製品仕様）の画像の条件を返す
+
+        下位階層は親IDで絞り込んだサブクエリで表すため、各親の外部キーのインデックスで
+        1回のクエリで取得できます。論理削除された部屋・製品の画像は含みません。
+        複数指定された場合は上位の階層が優先されます。
+        """
+        live_rooms = select(Room.id).where(Room.is_deleted == False)
+        live_products = select(Product.id)\
+            .join(Room, Product.room_id == Room.id)\
+            .where(Product.is_deleted == False, Room.is_deleted == False)
+        specs = select(ProductSpecification.id)\
+            .join(Product, ProductSpecification.product_id == Product.id)\
+            .join(Room, Product.room_id == Room.id)\
+            .where(Product.is_deleted == False, Room.is_deleted == False)
+
+        if property_id:
+            return or_(
+                Image.property_id == property_id,
+                Image.room_id.in_(
+                    live_rooms.where(Room.property_id == property_id)),
+                Image.product_id.in_(
+                    live_products.where(Room.property_id == property_id)),
+                Image.product_specification_id.in_(
+                    specs.where(Room.property_id == property_id))
+            )
+        if room_id:
+            return or_(
+                Image.room_id == room_id,
+                Image.product_id.in_(
+                    live_products.where(Product.room_id == room_id)),
+                Image.product_specification_id.in_(
+                    specs.where(Product.room_id == room_id))
+            )
+        if product_id:
+            return or_(
+                Image.product_id == product_id,
+                Image.product_specification_id.in_(
+                    select(ProductSpecification.id)
+                    .where(ProductSpecification.product_id == product_id))
+            )
+        if product_specification_id:
+            return Image.product_specification_id == product_specification_id
+        return None
+
+    def get_subtree_images(
+        self,
+        db: Session,
+        *,
+        property_id: Optional[int] = None,
+        room_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        product_specification_id: Optional[int] = None,
+        order: ImageOrder = ImageOrder.ID,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page[Image]:
+        """
+        指定されたエンティティとその下位階層のcompletedな画像を1回のクエリで取得します。
+
+        orderで並び順（ID順・所有者順）を指定します。どちらも最後にIDで並べるため、順序は安定しています。
+        limitを指定するとキーセットページネーションで取得し、next_cursorで続きを取得できます。
+        limitを省略した場合は全件を返します。
+        """
+        condition = self.subtree_condition(
+            property_id=property_id,
+            room_id=room_id,
+            product_id=product_id,
+            product_specification_id=product_specification_id
+        )
+        if condition is None:
+            return Page([])
+
+        query = db.query(Image).filter(Image.status == "completed", condition)
+        keys = (Image.id,)
+        if order == ImageOrder.OWNER:
+            keys = (Image.owner_rank.label("owner_rank"),
+                    Image.owner_id.label("owner_id"), Image.id)
+
+        if limit is None:
+            return Page(query.order_by(*keys).all())
+        return self.paginate(
+            query,
+            keys=keys,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            descending=False
+        )
+
+    def get_images_for_tree(
+        self,
+        db: Session,
+        *,
+        property_ids: Iterable[int] = (),
+        room_ids: Iterable[int] = (),
+        product_ids: Iterable[int] = (),
+        product_specification_ids: Iterable[int] = ()
+    ) -> GroupedImages:
+        """
+        物件ツリー全体の画像を1回のクエリでまとめて取得し、親エンティティごとにグループ化します。
+        get_imagesを部屋・製品ごとに呼び出す代わりに使用します。
+        ステータスがcompletedの画像のみを返します。
+        """
+        conditions = []
+        for column, ids in (
+            (Image.property_id, property_ids),
+            (Image.room_id, room_ids),
+            (Image.product_id, product_ids),
+            (Image.product_specification_id, product_specification_ids),
+        ):
+            ids = set(ids)
+            if ids:
+                conditions.append(column.in_(ids))
+
+        grouped = GroupedImages()
+        if not conditions:
+            return grouped
+
+        images = db.query(Image)\
+            .filter(Image.status == "completed", or_(*conditions))\
+            .order_by(Image.id)\
+            .all()
+        for image in images:
+            grouped.add(image)
+        return grouped
+
+    def update_status_many(
+        self,
+        db: Session,
+        *,
+        ids: Iterable[int],
+        status: str,
+        user_id: int
+    ) -> List[Image]:
+        """
+        ユーザーが所有する画像のステータスを1回のUPDATE ... RETURNINGでまとめて更新し、更新された画像を返す
+
+        所有者の確認はWHERE句のサブクエリで同じ文の中で行うため、
+        存在しない画像や他のユーザーの画像は更新されず、戻り値にも含まれません。
+        commitは行わないため、トランザクションの管理は呼び出し側で行うこと。
+        """
+        ids = set(ids)
+        if not ids:
+            return []
+        owned = owned_ids_select(
+            OwnedEntity.IMAGE, user_id).where(Image.id.in_(ids))
+        result = db.scalars(
+            update(Image)
+            .where(Image.id.in_(ids), Image.id.in_(owned))
+            .values(status=status)
+            .returning(Image)
+        )
+        return sorted(result.all(), key=lambda image: image.id)
+
+    def refresh_main_images(
+        self,
+        db: Session,
+        model: Type,
+        ids: Optional[Iterable[int]] = None
+    ) -> None:
+        """
+        親エンティティのmain_image_id / main_image_urlを画像テーブルから再計算する
+
+        completedのMAIN画像のうちIDが最大のものをメイン画像とし、ない場合はNULLにします。
+        idsを省略した場合は全件を更新します（バックフィル・整合性の修復用）。
+        1回のUPDATE文で更新し、commitは行いません。
+        セッションはautoflush=Falseのため、未反映の画像の変更はここでflushします。
+        """
+        column = dict(MAIN_IMAGE_PARENTS)[model]
+        if ids is not None:
+            ids = set(ids)
+            if not ids:
+                return
+
+        latest_main = select(Image.id)\
+            .where(
+                column == model.id,
+                Image.image_type == ImageType.MAIN,
+                Image.status == "completed"
+        )\
+            .order_by(Image.id.desc())\
+            .limit(1)
+        db.flush()
+        stmt = update(model).values(
+            main_image_id=latest_main.scalar_subquery(),
+            main_image_url=latest_main.with_only_columns(
+                Image.url).scalar_subquery()
+        )
+        if ids is not None:
+            stmt = stmt.where(model.id.in_(ids))
+        db.execute(stmt.execution_options(synchronize_session="fetch"))
+
+    def refresh_main_images_for(
+        self,
+        db: Session,
+        images: Iterable[Image],
+        only_main: bool = False
+    ) -> None:
+        """
+        画像の親エンティティのメイン画像を再計算する
+
+        画像のタイプ変更・削除の後に呼び出します。
+        only_main=Trueの場合はMAIN画像の親のみを対象にします（アップロード完了時など）。
+        """
+        parent_ids: Dict[Type, Set[int]] = defaultdict(set)
+        for image in images:
+            if only_main and image.image_type != ImageType.MAIN:
+                continue
+            for model, column in MAIN_IMAGE_PARENTS:
+                parent_id = getattr(image, column.key)
+                if parent_id is not None:
+                    parent_ids[model].add(parent_id)
+        for model, ids in parent_ids.items():
+            self.refresh_main_images(db, model, ids)
+
 
 image = ImageCRUD()
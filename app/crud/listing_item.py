@@ -1,9 +1,9 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
-from typing import List
+from typing import List, Optional
 from app.models import ListingItem, Property
 from app.schemas.listing_item_schemas import ListingItem as ListingItemSchema
-from .base import CRUDBase
+from .base import CRUDBase, Page
 
 
 class CRUDListingItem(CRUDBase[ListingItem, ListingItemSchema, ListingItemSchema]):
@@ -25,15 +25,17 @@ class CRUDListingItem(CRUDBase[ListingItem, ListingItemSchema, ListingItemSchema
         *,
         seller_user_id: int,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[ListingItem]:
-        return (
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page[ListingItem]:
+        """出品者の出品一覧を作成日時の新しい順で取得する（cursor指定時はキーセットページネーション）"""
+        return self.paginate(
             db.query(self.model)
-            .filter(ListingItem.seller_user_id == seller_user_id)
-            .order_by(desc(ListingItem.created_at))
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .filter(ListingItem.seller_user_id == seller_user_id),
+            keys=(ListingItem.created_at, ListingItem.id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor
         )
 
     def verify_property_ownership(self, db: Session, property_id: int, user_id: int) -> bool:
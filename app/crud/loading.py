@@ -0,0 +1,41 @@
+from enum import Enum
+from typing import Any
+from sqlalchemy.orm import joinedload, selectinload, subqueryload
+
+
+class LoaderStrategy(str, Enum):
+    """
+    一対多の関連データを読み込む方式
+
+    - JOINED: 1つのクエリでJOINする。階層が深いと行数が掛け算で増える
+    - SELECTIN: 階層ごとに1クエリ（主キーのIN句）を追加で発行する。行数は線形
+    - SUBQUERY: 階層ごとに元のクエリをサブクエリとして再発行する。行数は線形
+    """
+    JOINED = "joined"
+    SELECTIN = "selectin"
+    SUBQUERY = "subquery"
+
+
+DEFAULT_LOADER_STRATEGY = LoaderStrategy.SELECTIN
+
+_loaders = {
+    LoaderStrategy.JOINED: joinedload,
+    LoaderStrategy.SELECTIN: selectinload,
+    LoaderStrategy.SUBQUERY: subqueryload,
+}
+
+
+def load_path(strategy: LoaderStrategy, *attributes: Any):
+    """
+    attributesを順にたどる読み込みオプションを指定された方式で作成する
+
+    Example:
+        db.query(Property).options(
+            load_path(LoaderStrategy.SELECTIN, Property.rooms, Room.products)
+        )
+    """
+    loader = _loaders[LoaderStrategy(strategy)]
+    option = loader(attributes[0])
+    for attribute in attributes[1:]:
+        option = getattr(option, loader.__name__)(attribute)
+    return option
@@ -0,0 +1,125 @@
+from enum import Enum
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models import (
+    Property,
+    Room,
+    Product,
+    ProductSpecification,
+    ProductDimension,
+    Drawing,
+    Image
+)
+
+
+class OwnedEntity(str, Enum):
+    """所有者を判定できるエンティティの種類"""
+    PROPERTY = "property"
+    ROOM = "room"
+    PRODUCT = "product"
+    SPECIFICATION = "specification"
+    DIMENSION = "dimension"
+    DRAWING = "drawing"
+    IMAGE = "image"
+
+
+_models = {
+    OwnedEntity.PROPERTY: Property,
+    OwnedEntity.ROOM: Room,
+    OwnedEntity.PRODUCT: Product,
+    OwnedEntity.SPECIFICATION: ProductSpecification,
+    OwnedEntity.DIMENSION: ProductDimension,
+    OwnedEntity.DRAWING: Drawing,
+    OwnedEntity.IMAGE: Image,
+}
+
+
+def _owner_path(entity: OwnedEntity) -> Select:
+    """
+    エンティティのIDと所有する物件を結び付けるSELECTを作成する
+
+    親をたどる結合はすべて主キーへの結合になるため、
+    エンティティ数に関わらず1つのクエリでインデックスだけを使って解決できます。
+    """
+    if entity == OwnedEntity.PROPERTY:
+        return select(Property.id).select_from(Property)
+    if entity == OwnedEntity.ROOM:
+        return select(Room.id).join(Property, Property.id == Room.property_id)
+    if entity == OwnedEntity.PRODUCT:
+        return select(Product.id) \
+            .join(Room, Room.id == Product.room_id) \
+            .join(Property, Property.id == Room.property_id)
+    if entity in (OwnedEntity.SPECIFICATION, OwnedEntity.DIMENSION):
+        model = _models[entity]
+        return select(model.id) \
+            .join(Product, Product.id == model.product_id) \
+            .join(Room, Room.id == Product.room_id) \
+            .join(Property, Property.id == Room.property_id)
+    if entity == OwnedEntity.DRAWING:
+        return select(Drawing.id).join(Property, Property.id == Drawing.property_id)
+
+    # 画像は物件・部屋・製品・仕様・図面のいずれか1つに紐づくため、
+    # 外部結合でたどれた親のうち最初に見つかったものを使う
+    return select(Image.id) \
+        .outerjoin(ProductSpecification, ProductSpecification.id == Image.product_specification_id) \
+        .outerjoin(Product, Product.id == func.coalesce(Image.product_id, ProductSpecification.product_id)) \
+        .outerjoin(Room, Room.id == func.coalesce(Image.room_id, Product.room_id)) \
+        .outerjoin(Drawing, Drawing.id == Image.drawing_id) \
+        .join(Property, Property.id == func.coalesce(
+            Image.property_id, Room.property_id, Drawing.property_id))
+
+
+def owned_ids_select(entity: OwnedEntity, user_id: int) -> Select:
+    """
+    ユーザーが所有する（削除されていない物件に属する）エンティティのIDを返すSELECTを作成する
+
+    UPDATE/DELETEのWHERE句にサブクエリとして埋め込むこともできます。
+
+    Example:
+        owned = owned_ids_select(OwnedEntity.ROOM, user_id)
+        db.query(Room).filter(Room.id.in_(owned))
+    """
+    return _owner_path(OwnedEntity(entity)).where(and_(
+        Property.user_id == user_id,
+        Property.is_deleted == False
+    ))
+
+
+def get_owned_ids(db: Session, entity: OwnedEntity, user_id: int, ids: Iterable[int]) -> Set[int]:
+    """idsのうちユーザーが所有するエンティティのIDを1つのクエリで求める"""
+    ids = set(ids)
+    if not ids:
+        return set()
+    model = _models[OwnedEntity(entity)]
+    query = owned_ids_select(entity, user_id).where(model.id.in_(ids))
+    return set(db.execute(query).scalars())
+
+
+def get_owner_user_ids(db: Session, entity: OwnedEntity, ids: Iterable[int]) -> Dict[int, int]:
+    """idsのエンティティを所有するユーザーのIDを1つのクエリで求める（エンティティID -> ユーザーID）"""
+    ids = set(ids)
+    if not ids:
+        return {}
+    model = _models[OwnedEntity(entity)]
+    query = _owner_path(entity).add_columns(Property.user_id).where(model.id.in_(ids))
+    return {entity_id: user_id for entity_id, user_id in db.execute(query)}
+
+
+def get_image_ancestry(
+    db: Session,
+    image_ids: Iterable[int]
+) -> Dict[int, Tuple[Optional[int], Optional[int], Optional[int]]]:
+    """画像ごとの祖先の (物件ID, 部屋ID, 製品ID) を1つのクエリで求める（該当しない階層はNone）"""
+    image_ids = set(image_ids)
+    if not image_ids:
+        return {}
+    query = _owner_path(OwnedEntity.IMAGE)\
+        .add_columns(Property.id, Room.id, Product.id)\
+        .where(Image.id.in_(image_ids))
+    return {
+        image_id: (property_id, room_id, product_id)
+        for image_id, property_id, room_id, product_id in db.execute(query)
+    }
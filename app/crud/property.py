@@ -1,10 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models import Property, ListingItem, Transaction
 from app.schemas import PropertySchema
-from .base import BaseCRUD
+from .base import BaseCRUD, Page
+from .counting import CountStrategy
 from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select, update
 from sqlalchemy.sql import desc, func
 from datetime import datetime
+from app.enums import TransactionStatus
 
 
 class PropertyCRUD(BaseCRUD[Property, PropertySchema, PropertySchema]):
@@ -48,39 +51,75 @@ class PropertyCRUD(BaseCRUD[Property, PropertySchema, PropertySchema]):
         return db.query(self.model).filter(self.model.prefecture == prefecture)\
             .offset(skip).limit(limit).all()
 
-    def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Property]:
+    def get_multi(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page[Property]:
         """
         物件の一覧を取得する（論理削除されていないもののみ）
         - 出品に対する購入件数が多い順
-        - 更新日付が新しい順
+        - 作成日付が新しい順
         でソートする
+
+        購入件数は非正規化したProperty.purchase_countを使用するため、
+        ix_properties_purchase_count_createdのインデックススキャンで取得できます。
+        cursorを指定するとキーセットページネーションで続きを取得します。
         """
-        # サブクエリで各物件の購入件数を計算
-        purchase_count_subquery = (
-            db.query(
-                ListingItem.property_id,
-                func.count(Transaction.id).label('purchase_count')
-            )
-            .outerjoin(Transaction, Transaction.listing_id == ListingItem.id)
-            .filter(Transaction.transaction_status == 'COMPLETED')
-            .group_by(ListingItem.property_id)
-            .subquery()
+        return self.paginate(
+            db.query(Property).filter(Property.is_deleted == False),
+            keys=(Property.purchase_count, Property.created_at, Property.id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor
         )
 
-        # メインクエリ
-        return (
-            db.query(Property)
-            .outerjoin(purchase_count_subquery, Property.id == purchase_count_subquery.c.property_id)
-            .filter(Property.is_deleted == False)
-            .order_by(
-                func.coalesce(
-                    purchase_count_subquery.c.purchase_count, 0).desc(),
-                desc(Property.created_at)
+    def increment_purchase_count(self, db: Session, *, listing_id: int, amount: int = 1) -> None:
+        """
+        出品に紐づく物件の購入件数を加算する
+
+        1回のUPDATE文で加算するため、同時に複数の購入が完了しても件数は失われません。
+        commitは行わないため、取引の更新と同じトランザクションで呼び出すこと。
+        """
+        property_id = (
+            select(ListingItem.property_id)
+            .where(ListingItem.id == listing_id)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(Property)
+            .where(Property.id == property_id)
+            .values(purchase_count=Property.purchase_count + amount)
+            .execution_options(synchronize_session=False)
+        )
+
+    def rebuild_purchase_counts(self, db: Session) -> int:
+        """
+        全物件の購入件数を完了した取引から再計算する（バックフィル・整合性の修復用）
+
+        Returns:
+            int: 購入件数が変更された物件の数
+        """
+        completed_count = (
+            select(func.count(Transaction.id))
+            .join(ListingItem, Transaction.listing_id == ListingItem.id)
+            .where(
+                ListingItem.property_id == Property.id,
+                Transaction.transaction_status == TransactionStatus.COMPLETED
             )
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .scalar_subquery()
         )
+        result = db.execute(
+            update(Property)
+            .where(Property.purchase_count != completed_count)
+            .values(purchase_count=completed_count)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
 
     def get(self, db: Session, id: int) -> Optional[Property]:
         """
@@ -97,10 +136,15 @@ class PropertyCRUD(BaseCRUD[Property, PropertySchema, PropertySchema]):
         user_id: int,
         skip: int = 0,
         limit: int = 100,
-        filters: Dict[str, Any] = None
-    ) -> Tuple[List[Property], int]:
+        filters: Dict[str, Any] = None,
+        cursor: Optional[str] = None,
+        count_strategy: CountStrategy = CountStrategy.SEPARATE
+    ) -> Tuple[Page[Property], int]:
         """
         指定されたユーザーIDの物件一覧をフィルター条件付きで取得する（論理削除されていないもののみ）
+
+        作成日時の新しい順で返します。cursorを指定するとキーセットページネーションで続きを取得します。
+        総件数はcount_strategyで指定した方式で求めます。
         """
         query = db.query(self.model).filter(
             self.model.user_id == user_id,
@@ -115,11 +159,16 @@ class PropertyCRUD(BaseCRUD[Property, PropertySchema, PropertySchema]):
                 query = query.filter(
                     self.model.prefecture == filters["prefecture"])
 
-        total = query.count()
-        items = query.order_by(desc(self.model.created_at)).offset(
-            skip).limit(limit).all()
+        items = self.paginate(
+            query,
+            keys=(self.model.created_at, self.model.id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            count_strategy=count_strategy
+        )
 
-        return items, total
+        return items, items.total
 
 
 property = PropertyCRUD()
@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models import Room
 from app.schemas import RoomSchema
-from .base import BaseCRUD
+from .base import BaseCRUD, Page
 from typing import Optional, List, Literal
 
 
@@ -38,14 +38,19 @@ class RoomCRUD(BaseCRUD[Room, RoomSchema, RoomSchema]):
         *,
         property_id: int,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Room]:
-        """指定された物件IDに紐づく部屋一覧を取得"""
-        return db.query(self.model)\
-            .filter(self.model.property_id == property_id, self.model.is_deleted == False)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page[Room]:
+        """指定された物件IDに紐づく部屋一覧をID順に取得（cursor指定時はキーセットページネーション）"""
+        return self.paginate(
+            db.query(self.model)
+            .filter(self.model.property_id == property_id, self.model.is_deleted == False),
+            keys=(self.model.id,),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            descending=False
+        )
 
     def get(self, db: Session, id: int) -> Optional[Room]:
         """指定されたIDの部屋を取得"""
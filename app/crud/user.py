@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.models import User, SellerProfile
 from app.schemas import UserSchema, UserUpdate, SellerProfileSchema
 from .base import BaseCRUD
@@ -71,8 +71,19 @@ class UserCRUD(BaseCRUD[User, UserSchema, UserUpdate]):
         db.refresh(db_obj)
         return db_obj
 
-    def get_by_clerk_id(self, db: Session, clerk_user_id: str):
-        return db.query(self.model).filter(self.model.clerk_user_id == clerk_user_id).first()
+    def get_by_clerk_id(self, db: Session, clerk_user_id: str, preload_profiles: bool = False):
+        """
+        Clerk User IDでユーザーを取得する
+
+        preload_profilesを指定すると、seller_profile・buyer_profileも同じクエリで読み込みます。
+        """
+        query = db.query(self.model)
+        if preload_profiles:
+            query = query.options(
+                joinedload(self.model.seller_profile),
+                joinedload(self.model.buyer_profile)
+            )
+        return query.filter(self.model.clerk_user_id == clerk_user_id).first()
 
 
 user = UserCRUD()
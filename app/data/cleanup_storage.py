@@ -0,0 +1,20 @@
+from app.services.storage_cleanup_service import storage_cleanup_service
+
+
+def cleanup_storage():
+    """
+    期限切れのアップロードを削除し、削除対象のS3オブジェクトをまとめて削除する
+
+    アプリケーション内のスレッドの代わりにスケジューラー（cronなど）から実行できます。
+    """
+    try:
+        result = storage_cleanup_service.run_once()
+        print(f"ストレージを整理しました（期限切れの画像: {result['reaped']}件、"
+              f"削除したオブジェクト: {result['deleted']}件、失敗: {result['failed']}件）")
+    except Exception as e:
+        print(f"エラーが発生しました: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    cleanup_storage()
@@ -0,0 +1,20 @@
+from app.crud.property import property as property_crud
+from app.database import SessionLocal
+
+
+def rebuild_purchase_counts():
+    """完了した取引から全物件の購入件数（properties.purchase_count）を再計算する"""
+    db = SessionLocal()
+    try:
+        updated = property_crud.rebuild_purchase_counts(db)
+        print(f"購入件数を再計算しました（更新した物件: {updated}件）")
+    except Exception as e:
+        db.rollback()
+        print(f"エラーが発生しました: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_purchase_counts()
@@ -218,3 +218,19 @@ class ErrorType(BaseEnum):
             "VALIDATION_ERROR": "バリデーションエラー",
             "SYSTEM_ERROR": "システムエラー"
         }
+
+
+class ImportJobStatus(BaseEnum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+    @classmethod
+    def labels(cls) -> Dict[str, str]:
+        return {
+            "PENDING": "待機中",
+            "RUNNING": "実行中",
+            "SUCCEEDED": "完了",
+            "FAILED": "失敗"
+        }
@@ -0,0 +1,13 @@
+from .backplanes import Backplane, LocalBackplane, RedisBackplane, register_backplane, create_backplane
+from .broker import EventBroker, Subscription, event_broker
+
+__all__ = [
+    "Backplane",
+    "LocalBackplane",
+    "RedisBackplane",
+    "register_backplane",
+    "create_backplane",
+    "EventBroker",
+    "Subscription",
+    "event_broker",
+]
@@ -0,0 +1,139 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Type
+
+try:
+    import redis
+except ImportError:  # Redisのバックプレーンを使用しない場合は不要
+    redis = None
+
+Deliver = Callable[[Dict[str, Any]], None]
+
+
+class Backplane:
+    """
+    イベントをワーカープロセス間で中継するバックプレーンの基底クラス
+
+    publishされたイベントは、startで渡されたdeliverを通じて各プロセスのブローカーに届けられます。
+    イベントはJSONに変換可能な辞書として渡されるため、プロセス外のメッセージングにもそのまま流せます。
+    """
+
+    name = "base"
+
+    def start(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """統計情報に含めるバックプレーン固有の情報"""
+        return {"backplane": self.name}
+
+
+class LocalBackplane(Backplane):
+    """
+    プロセス内でのみイベントを配信するバックプレーン（uvicornのワーカーが1つの場合）
+
+    publishしたスレッドでそのままdeliverを呼び出します。
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+
+class RedisBackplane(Backplane):
+    """
+    RedisのPub/Subでイベントを全ワーカーに配信するバックプレーン
+
+    各プロセスは同じチャンネルを購読するスレッドを持ち、受け取ったイベントを
+    自プロセスの購読者に配信します。自プロセスでpublishしたイベントもRedis経由で受け取ります。
+    redisパッケージが必要です。
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, channel: str = "events"):
+        if redis is None:
+            raise RuntimeError(
+                "The redis package is required for the redis event backplane")
+        if not url:
+            raise ValueError("EVENT_REDIS_URL is required for the redis event backplane")
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Deliver) -> None:
+        if self._thread is not None:
+            return
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+        pubsub = self._pubsub
+
+        def run():
+            try:
+                for item in pubsub.listen():
+                    try:
+                        deliver(json.loads(item["data"]))
+                    except Exception as e:
+                        print(f"Failed to deliver event from redis: {str(e)}")
+            except Exception as e:
+                # stopで購読を閉じた場合は終了する
+                if self._pubsub is pubsub:
+                    print(f"Event backplane subscriber stopped: {str(e)}")
+
+        self._thread = threading.Thread(
+            target=run, name="event-backplane", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            pubsub.close()
+        self._thread = None
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        self.client.publish(self.channel, json.dumps(message, default=str))
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backplane": self.name, "channel": self.channel}
+
+
+_backplanes: Dict[str, Type[Backplane]] = {
+    LocalBackplane.name: LocalBackplane,
+    RedisBackplane.name: RedisBackplane,
+}
+
+
+def register_backplane(name: str, backplane_class: Type[Backplane]) -> None:
+    """設定値から選択できるバックプレーンを登録する"""
+    _backplanes[name] = backplane_class
+
+
+def create_backplane(name: str, **kwargs) -> Backplane:
+    """
+    名前を指定してバックプレーンを生成する
+
+    Raises:
+        ValueError: 未登録のバックプレーン名が指定された場合
+    """
+    if name not in _backplanes:
+        raise ValueError(
+            f"Unknown event backplane: {name}. Must be one of: {', '.join(_backplanes)}")
+    return _backplanes[name](**kwargs)
@@ -0,0 +1,186 @@
+import asyncio
+from threading import Lock
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.events.backplanes import Backplane, create_backplane
+
+settings = get_settings()
+
+_PENDING_KEY = "events_pending"
+
+
+class Subscription:
+    """
+    1つの接続（SSEのストリーム）がイベントを受け取るキュー
+
+    キューは接続を処理するイベントループで作成され、ブローカーからは
+    call_soon_threadsafeで追加されるため、どのスレッドからpublishしても安全です。
+    読み出しの遅いクライアントのためにイベントをため込まないよう、
+    キューが一杯になった場合は古いイベントから捨てます。
+    """
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _put(self, message: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """次のイベントを待つ（timeout秒以内に届かない場合はNone）"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    ユーザーごとの購読者にイベントを配信する
+
+    状態を変更したサービスがpublish（またはcommit後に送るpublish_on_commit）を呼び出すと、
+    イベントはバックプレーンを経由して各プロセスのdeliverに届き、そのプロセスで
+    同じユーザーが購読している全ての接続に配信されます。
+    バックプレーンがlocalの場合はプロセス内で完結し、redisなどを指定すると
+    複数のワーカーで実行している場合も全ての接続に届きます。
+    """
+
+    def __init__(self, backplane: Backplane, queue_size: int = settings.EVENT_QUEUE_SIZE):
+        self.backplane = backplane
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = Lock()
+        self._started = False
+        self.published = 0
+        self.delivered = 0
+
+    def start(self) -> None:
+        """バックプレーンからのイベントの受け取りを開始する"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.backplane.start(self.deliver)
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        self.backplane.stop()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """ユーザーのイベントを購読する（接続を処理するイベントループの中で呼び出すこと）"""
+        subscription = Subscription(
+            user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        ユーザーにイベントを送る
+
+        通知は補助的な機能のため、バックプレーンへの送信に失敗しても例外は発生させません
+        （クライアントは再接続時に状態を取得し直します）。
+        """
+        message = {"user_id": user_id, "type": event_type, "data": data}
+        try:
+            self.backplane.publish(message)
+        except Exception as e:
+            print(f"Failed to publish event {event_type}: {str(e)}")
+            return
+        with self._lock:
+            self.published += 1
+
+    def publish_on_commit(
+        self,
+        db: Session,
+        user_id: int,
+        event_type: str,
+        data: Dict[str, Any]
+    ) -> None:
+        """
+        セッションがcommitされた後にイベントを送る（rollbackされた場合は送らない）
+
+        クライアントがイベントを受け取ってから状態を取得しても、
+        commit前の古い状態が返されることはありません。
+        """
+        db.info.setdefault(_PENDING_KEY, []).append(
+            (self, user_id, event_type, data))
+
+    def deliver(self, message: Dict[str, Any]) -> None:
+        """バックプレーンから届いたイベントを、このプロセスの購読者のキューに追加する"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(message["user_id"], ()))
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription._put, message)
+                delivered += 1
+            except RuntimeError:
+                # イベントループが終了している接続は購読を解除する
+                self.unsubscribe(subscription)
+        with self._lock:
+            self.delivered += delivered
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscriptions = [
+                subscription
+                for subscriptions in self._subscribers.values()
+                for subscription in subscriptions
+            ]
+            users = len(self._subscribers)
+        return {
+            **self.backplane.describe(),
+            "users": users,
+            "subscriptions": len(subscriptions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(subscription.dropped for subscription in subscriptions),
+        }
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    for broker, user_id, event_type, data in session.info.pop(_PENDING_KEY, []):
+        broker.publish(user_id, event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _backplane_options(name: str) -> Dict[str, Any]:
+    if name == "redis":
+        return {"url": settings.EVENT_REDIS_URL, "channel": settings.EVENT_REDIS_CHANNEL}
+    return {}
+
+
+event_broker = EventBroker(
+    backplane=create_backplane(
+        settings.EVENT_BACKPLANE,
+        **_backplane_options(settings.EVENT_BACKPLANE)
+    )
+)
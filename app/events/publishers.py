@@ -0,0 +1,75 @@
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.crud.ownership import OwnedEntity, get_owner_user_ids
+from app.events.broker import EventBroker, event_broker
+from app.models import Image, ImportJob, Transaction
+
+IMAGE_STATUS = "image.status"
+IMPORT_JOB_STATUS = "import_job.status"
+CHECKOUT_COMPLETED = "checkout.completed"
+
+
+def publish_image_status(
+    db: Session,
+    images: Iterable[Image],
+    broker: Optional[EventBroker] = None
+) -> None:
+    """
+    画像のステータスの変更を、画像が属する物件の所有者にcommit後に通知する
+
+    所有者は全ての画像について1つのクエリで求めます。
+    commitで属性が失効する前に値を読み出すため、commitの前に呼び出すこと。
+    """
+    broker = broker or event_broker
+    images = list(images)
+    owners = get_owner_user_ids(
+        db, OwnedEntity.IMAGE, [image.id for image in images])
+    for image in images:
+        if image.id not in owners:
+            continue
+        broker.publish_on_commit(db, owners[image.id], IMAGE_STATUS, {
+            "image_id": image.id,
+            "status": image.status,
+            "url": image.url,
+            "image_type": getattr(image.image_type, "value", image.image_type),
+            "property_id": image.property_id,
+            "room_id": image.room_id,
+            "product_id": image.product_id,
+            "product_specification_id": image.product_specification_id,
+            "drawing_id": image.drawing_id,
+        })
+
+
+def publish_import_job_status(
+    db: Session,
+    job: ImportJob,
+    broker: Optional[EventBroker] = None
+) -> None:
+    """物件一括作成ジョブの状態の変更をジョブの登録者にcommit後に通知する"""
+    (broker or event_broker).publish_on_commit(db, job.user_id, IMPORT_JOB_STATUS, {
+        "job_id": job.id,
+        "status": job.status.value,
+        "property_id": job.property_id,
+        "counts": job.counts,
+        "error": job.error,
+    })
+
+
+def publish_checkout_completed(
+    db: Session,
+    transaction: Transaction,
+    broker: Optional[EventBroker] = None
+) -> None:
+    """決済の完了を購入者と出品者にcommit後に通知する"""
+    broker = broker or event_broker
+    recipients = {transaction.buyer_user_id: "buyer"}
+    recipients.setdefault(transaction.seller_user_id, "seller")
+    for user_id, role in recipients.items():
+        broker.publish_on_commit(db, user_id, CHECKOUT_COMPLETED, {
+            "transaction_id": transaction.id,
+            "listing_id": transaction.listing_id,
+            "status": transaction.transaction_status.value,
+            "role": role,
+        })
@@ -1,8 +1,14 @@
+import boto3
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.v1.api import api_router
 from app.middleware.logging import log_request_middleware
+from app.services.import_job_service import import_job_service
+from app.services.s3_event_service import s3_event_service
+from app.services.storage_cleanup_service import storage_cleanup_service
+from app.services.derivative_service import derivative_service
+from app.events.broker import event_broker
 
 app = FastAPI(
     title="ieLove API",
@@ -17,6 +23,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 # ロギングミドルウェアの追加
@@ -24,3 +31,67 @@ app.middleware("http")(log_request_middleware)
 
 # APIルーターの登録
 app.include_router(api_router, prefix="/api")
+
+
+@app.on_event("startup")
+def resume_import_jobs():
+    """再起動前に完了していなかった物件一括作成ジョブを再投入する"""
+    try:
+        import_job_service.resume_unfinished_jobs()
+    except Exception as e:
+        print(f"Failed to resume import jobs: {str(e)}")
+
+
+@app.on_event("shutdown")
+def stop_import_jobs():
+    import_job_service.shutdown(wait=False)
+
+
+@app.on_event("startup")
+def start_s3_event_consumer():
+    """S3のアップロード完了通知を受け取るSQSのポーリングを開始する"""
+    if not settings.S3_EVENT_QUEUE_URL:
+        return
+    try:
+        sqs_client = boto3.client(
+            'sqs',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION
+        )
+        s3_event_service.start(sqs_client, settings.S3_EVENT_QUEUE_URL)
+    except Exception as e:
+        print(f"Failed to start S3 event consumer: {str(e)}")
+
+
+@app.on_event("shutdown")
+def stop_s3_event_consumer():
+    s3_event_service.stop()
+
+
+@app.on_event("startup")
+def start_storage_cleanup():
+    """削除対象のS3オブジェクトと期限切れのアップロードの定期的な削除を開始する"""
+    if settings.aws_configured:
+        storage_cleanup_service.start()
+
+
+@app.on_event("shutdown")
+def stop_storage_cleanup():
+    storage_cleanup_service.stop()
+
+
+@app.on_event("shutdown")
+def stop_derivative_workers():
+    derivative_service.shutdown(wait=False)
+
+
+@app.on_event("startup")
+def start_event_broker():
+    """状態変更の通知の配信を開始する（redisの場合は他のワーカーのイベントの購読も開始する）"""
+    event_broker.start()
+
+
+@app.on_event("shutdown")
+def stop_event_broker():
+    event_broker.stop()
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Float, Boolean, JSON, Enum, Index, Numeric, Sequence
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Float, Boolean, JSON, Enum, Index, Numeric, Sequence, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship, foreign
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.database import Base
 from app.enums import (
     CompanyType,
@@ -15,7 +16,8 @@ from app.enums import (
     PaymentStatus,
     TransferStatus,
     ChangeType,
-    ErrorType
+    ErrorType,
+    ImportJobStatus
 )
 
 
@@ -32,6 +34,14 @@ class Company(Base):
 
 class Property(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        # 一覧（購入件数の多い順・作成日時の新しい順）をインデックススキャンで取得するため
+        Index('ix_properties_purchase_count_created',
+              'purchase_count', 'created_at', 'id',
+              postgresql_where=text('is_deleted = false')),
+        # ユーザーごとの物件一覧のキーセットページネーション用
+        Index('ix_properties_user_created', 'user_id', 'created_at', 'id'),
+    )
 
     id = Column(Integer, Sequence('properties_id_seq'), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -53,6 +63,13 @@ class Property(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # 完了した取引の件数（StripeService.handle_checkout_completedで加算する）
+    purchase_count = Column(Integer, nullable=False,
+                            default=0, server_default='0')
+    # メイン画像（completedのMAIN画像のうち最新のもの）。ImageCRUD.refresh_main_imagesで更新する
+    # imagesとの外部キーの循環を避けるため、外部キー制約は設定しない
+    main_image_id = Column(Integer, nullable=True)
+    main_image_url = Column(String, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="properties")
@@ -67,6 +84,9 @@ class Property(Base):
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        Index('ix_rooms_property_id', 'property_id', 'id'),
+    )
 
     id = Column(Integer, Sequence('rooms_id_seq'), primary_key=True)
     property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
@@ -76,6 +96,9 @@ class Room(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     is_deleted = Column(Boolean, nullable=False, default=False)
+    # メイン画像（completedのMAIN画像のうち最新のもの）。ImageCRUD.refresh_main_imagesで更新する
+    main_image_id = Column(Integer, nullable=True)
+    main_image_url = Column(String, nullable=True)
 
     property = relationship("Property", back_populates="rooms")
     products = relationship("Product",
@@ -116,6 +139,9 @@ class Product(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     is_deleted = Column(Boolean, nullable=False, default=False)
+    # メイン画像（completedのMAIN画像のうち最新のもの）。ImageCRUD.refresh_main_imagesで更新する
+    main_image_id = Column(Integer, nullable=True)
+    main_image_url = Column(String, nullable=True)
 
     room = relationship("Room", back_populates="products")
     product_category = relationship("ProductCategory",
@@ -168,6 +194,26 @@ class ProductDimension(Base):
 
 class Image(Base):
     __tablename__ = "images"
+    __table_args__ = (
+        # S3のObjectCreatedイベントから画像を特定するため
+        Index('ix_images_s3_key', 's3_key'),
+        # アップロードされなかった画像（期限切れのpending）の検索用
+        Index('ix_images_pending_created', 'created_at',
+              postgresql_where=text("status = 'pending'")),
+        # 親エンティティごとの画像の取得（親ID + ステータス）用
+        # 画像はいずれか1つの親にのみ紐づくことが多いため、親IDがNULLの行は含めない
+        Index('ix_images_property_status', 'property_id', 'status',
+              postgresql_where=text("property_id IS NOT NULL")),
+        Index('ix_images_room_status', 'room_id', 'status',
+              postgresql_where=text("room_id IS NOT NULL")),
+        Index('ix_images_product_status', 'product_id', 'status',
+              postgresql_where=text("product_id IS NOT NULL")),
+        Index('ix_images_product_specification_status',
+              'product_specification_id', 'status',
+              postgresql_where=text("product_specification_id IS NOT NULL")),
+        Index('ix_images_drawing_status', 'drawing_id', 'status',
+              postgresql_where=text("drawing_id IS NOT NULL")),
+    )
 
     id = Column(Integer, Sequence('images_id_seq'),
                 primary_key=True, index=True)
@@ -182,6 +228,14 @@ class Image(Base):
         "product_specifications.id", ondelete="CASCADE"), nullable=True)
     image_type = Column(Enum(ImageType), nullable=True)
     status = Column(String, nullable=False, default='pending')
+    # サイズ別の派生画像 {"thumb": {"width": 320, "height": 240, "webp": URL, "jpeg": URL}, ...}
+    variants = Column(JSON, nullable=True)
+    # 図面の画像のタイルのピラミッド {"width", "height", "tile_size", "overlap", "format"}
+    tiles = Column(JSON, nullable=True)
+    # 内容のSHA-256（重複排除の対象になった画像のみ）。同じ値のstored_objectsの行が参照数を持つ
+    content_hash = Column(String(64), nullable=True)
+    # マルチパートアップロード中の情報 {"upload_id", "file_size", "part_size"}（完了・中止でNULLに戻す）
+    multipart_upload = Column(JSON(none_as_null=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     property = relationship("Property", back_populates="images")
@@ -191,6 +245,40 @@ class Image(Base):
     product_specification = relationship(
         "ProductSpecification", back_populates="images")
 
+    # 画像の所有者（最も下位の親エンティティ）。物件ツリーの画像を所有者ごとに並べるために使用する
+    # 0: 物件, 1: 部屋, 2: 製品, 3: 製品仕様
+    @hybrid_property
+    def owner_rank(self):
+        if self.product_specification_id is not None:
+            return 3
+        if self.product_id is not None:
+            return 2
+        if self.room_id is not None:
+            return 1
+        return 0
+
+    @owner_rank.expression
+    def owner_rank(cls):
+        return case(
+            (cls.product_specification_id.isnot(None), 3),
+            (cls.product_id.isnot(None), 2),
+            (cls.room_id.isnot(None), 1),
+            else_=0
+        )
+
+    @hybrid_property
+    def owner_id(self):
+        for parent_id in (self.product_specification_id, self.product_id,
+                          self.room_id, self.property_id):
+            if parent_id is not None:
+                return parent_id
+        return None
+
+    @owner_id.expression
+    def owner_id(cls):
+        return func.coalesce(cls.product_specification_id, cls.product_id,
+                             cls.room_id, cls.property_id)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -471,6 +559,9 @@ class TakeRate(Base):
 
 class Drawing(Base):
     __tablename__ = "drawings"
+    __table_args__ = (
+        Index('ix_drawings_property_id', 'property_id', 'id'),
+    )
 
     id = Column(Integer, Sequence('drawings_id_seq'), primary_key=True)
     property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
@@ -482,3 +573,68 @@ class Drawing(Base):
     property = relationship("Property", back_populates="drawings")
     images = relationship("Image", back_populates="drawing",
                           cascade="all, delete-orphan")
+
+
+class ImportJob(Base):
+    """物件全体の一括作成（/properties/whole?async_mode=true）のバックグラウンドジョブ"""
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index('ix_import_jobs_user_created', 'user_id', 'created_at'),
+        Index('ix_import_jobs_status', 'status'),
+    )
+
+    id = Column(Integer, Sequence('import_jobs_id_seq'), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(ImportJobStatus), nullable=False,
+                    default=ImportJobStatus.PENDING)
+    payload = Column(JSON, nullable=False)  # PropertyWholeSchemaのJSON
+    property_id = Column(Integer, ForeignKey(
+        "properties.id"), nullable=True)
+    counts = Column(JSON, nullable=True)  # エンティティ種別ごとの作成件数
+    error = Column(Text, nullable=True)
+    # ジョブを実行（再実行）した回数。ワーカーがジョブを取得する際の楽観的ロックに使用する
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    user = relationship("User")
+    property = relationship("Property")
+
+
+class StorageDeletion(Base):
+    """
+    S3オブジェクトの削除待ち（アウトボックス）
+
+    画像の削除と同じトランザクションで登録し、storage_cleanup_serviceが
+    DeleteObjectsでまとめて削除します。削除に成功した行は削除されます。
+    """
+    __tablename__ = "storage_deletions"
+
+    id = Column(Integer, Sequence('storage_deletions_id_seq'), primary_key=True)
+    bucket = Column(String, nullable=False)
+    s3_key = Column(String, nullable=False)
+    reason = Column(String, nullable=False)  # user_delete, stale_upload
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+
+
+class StoredObject(Base):
+    """
+    内容のハッシュで重複を排除した画像のオブジェクト
+
+    同じ内容の画像は1つのオブジェクトを共有し、ref_countはそれを参照する画像（Image.content_hashが
+    同じ行）の数です。参照がなくなった時点で行を削除し、オブジェクトを削除対象に登録します。
+    """
+    __tablename__ = "stored_objects"
+
+    id = Column(Integer, Sequence('stored_objects_id_seq'), primary_key=True)
+    content_hash = Column(String(64), nullable=False, unique=True)
+    s3_key = Column(String, nullable=False)
+    size = Column(Integer, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0, server_default='0')
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
@@ -1,14 +1,20 @@
 from .property_schemas import (
     PropertySchema,
-    PropertyDetailsSchema
+    PropertyResponseSchema,
+    PropertyDetailsSchema,
+    PropertyWholeSchema
 )
 from .room_schemas import (
     RoomSchema,
-    RoomDetailsSchema
+    RoomResponseSchema,
+    RoomDetailsSchema,
+    RoomWholeSchema
 )
 from .product_schemas import (
     ProductSchema,
-    ProductDetailsSchema
+    ProductResponseSchema,
+    ProductDetailsSchema,
+    ProductWholeSchema
 )
 from .product_specification_schemas import ProductSpecificationSchema
 from .product_dimension_schemas import ProductDimensionSchema
@@ -19,14 +25,21 @@ from .product_category_schemas import ProductCategorySchema
 from .seller_profile_schemas import SellerProfileSchema
 from .product_for_sale_schemas import ProductForSaleSchema
 from .transaction_schemas import TransactionSchema
+from .import_job_schemas import ImportJobSchema
 
 __all__ = [
     "PropertySchema",
+    "PropertyResponseSchema",
     "PropertyDetailsSchema",
+    "PropertyWholeSchema",
     "RoomSchema",
+    "RoomResponseSchema",
     "RoomDetailsSchema",
+    "RoomWholeSchema",
     "ProductSchema",
+    "ProductResponseSchema",
     "ProductDetailsSchema",
+    "ProductWholeSchema",
     "ProductSpecificationSchema",
     "ProductDimensionSchema",
     "ProductCategorySchema",
@@ -36,5 +49,6 @@ __all__ = [
     "SellerProfileSchema",
     "CompanySchema",
     "ProductForSaleSchema",
-    "TransactionSchema"
+    "TransactionSchema",
+    "ImportJobSchema"
 ]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -12,3 +12,33 @@ class DrawingSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class DrawingTileLevelSchema(BaseModel):
+    level: int
+    width: int
+    height: int
+    columns: int
+    rows: int
+
+
+class DrawingTileSourceSchema(BaseModel):
+    """
+    図面の画像のタイルのグリッド（Deep Zoom形式）
+
+    タイルのURLはtile_url_templateの{level}・{column}・{row}を置き換えて取得します。
+    tiles_readyがFalseの場合はタイルが未生成のため、urlの元画像を表示してください。
+    閲覧できない有料画像はurlがNoneになります。閲覧できる有料画像のタイルは
+    ディスクリプタからではなく、tile_url_template（認証が必要）から取得してください。
+    """
+    image_id: int
+    url: Optional[str] = None
+    tiles_ready: bool
+    width: Optional[int] = None
+    height: Optional[int] = None
+    tile_size: Optional[int] = None
+    overlap: Optional[int] = None
+    format: Optional[str] = None
+    descriptor_url: Optional[str] = None
+    tile_url_template: Optional[str] = None
+    levels: List[DrawingTileLevelSchema] = []
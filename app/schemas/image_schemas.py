@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from enum import Enum
 
 
@@ -15,6 +15,29 @@ class ImageType(str, Enum):
     PAID = 'PAID'
 
 
+class ImageOwnerType(str, Enum):
+    """画像の所有者（画像が紐づく最も下位の親エンティティ）の種類"""
+    PROPERTY = 'property'
+    ROOM = 'room'
+    PRODUCT = 'product'
+    PRODUCT_SPECIFICATION = 'product_specification'
+
+
+# Image.owner_rankの値に対応する所有者の種類
+OWNER_TYPES_BY_RANK = list(ImageOwnerType)
+
+
+class ImageOrder(str, Enum):
+    """
+    物件ツリーの画像の並び順
+
+    - ID: アップロード順（ID昇順）
+    - OWNER: 所有者ごと（物件 → 部屋 → 製品 → 製品仕様、それぞれID昇順）
+    """
+    ID = 'id'
+    OWNER = 'owner'
+
+
 class CreatePresignedUrlRequest(BaseModel):
     file_name: str
     content_type: str
@@ -25,6 +48,8 @@ class CreatePresignedUrlRequest(BaseModel):
     drawing_id: Optional[int] = None
     image_type: ImageType = ImageType.SUB
     description: Optional[str] = None
+    # クライアントが計算したファイルのSHA-256（16進数）。同じ内容の画像があればアップロードを省略する
+    content_hash: Optional[str] = Field(None, pattern=r"^[0-9a-f]{64}$")
 
 
 class ImageMetadata(BaseModel):
@@ -38,12 +63,63 @@ class ImageMetadata(BaseModel):
 
 
 class CreatePresignedUrlResponse(BaseModel):
+    # 同じ内容の画像が既にある場合（duplicate=True）はNoneで、アップロードは不要
+    upload_url: Optional[str] = None
+    image_id: int
+    image_url: str
+    image_metadata: ImageMetadata
+    duplicate: bool = False
+
+
+class CreatePresignedUrlsRequest(BaseModel):
+    # 1回のリクエストでまとめてアップロードできる画像の上限
+    files: List[CreatePresignedUrlRequest] = Field(
+        min_length=1, max_length=100)
+
+
+class CompleteImagesRequest(BaseModel):
+    # 1回のリクエストでまとめて完了にできる画像の上限
+    image_ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class CreateMultipartUploadRequest(CreatePresignedUrlRequest):
+    # ファイルサイズ（バイト）。パートのサイズと数の計算に使用する
+    file_size: int = Field(gt=0)
+
+
+class UploadedPartSchema(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str
+
+
+class PresignedPartSchema(BaseModel):
+    part_number: int
     upload_url: str
+
+
+class MultipartUploadResponse(BaseModel):
+    """
+    マルチパートアップロードの状態
+
+    partsはまだアップロードされていないパートの署名付きURLで、並列にアップロードできます。
+    再開時はアップロード済みのパート（uploaded_parts）を除いたURLが返されます。
+    """
     image_id: int
     image_url: str
+    upload_id: str
+    file_size: int
+    part_size: int
+    part_count: int
+    uploaded_parts: List[UploadedPartSchema] = []
+    parts: List[PresignedPartSchema]
     image_metadata: ImageMetadata
 
 
+class CompleteMultipartUploadRequest(BaseModel):
+    # 省略した場合はS3に記録されているアップロード済みのパートを使用する
+    parts: Optional[List[UploadedPartSchema]] = Field(None, max_length=10000)
+
+
 class ImageSchema(BaseModel):
     id: Optional[int] = None
     url: Optional[str] = None
@@ -56,7 +132,15 @@ class ImageSchema(BaseModel):
     product_specification_id: Optional[int] = None
     image_type: ImageType = ImageType.SUB
     status: ImageStatus = ImageStatus.PENDING
+    variants: Optional[Dict[str, Dict[str, Any]]] = None
     created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class ImageOwnerGroupSchema(BaseModel):
+    """所有者ごとにまとめた画像"""
+    owner_type: ImageOwnerType
+    owner_id: int
+    images: List[ImageSchema]
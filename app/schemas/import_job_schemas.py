@@ -0,0 +1,19 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+from app.enums import ImportJobStatus
+
+
+class ImportJobSchema(BaseModel):
+    id: int
+    status: ImportJobStatus
+    property_id: Optional[int] = None
+    counts: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
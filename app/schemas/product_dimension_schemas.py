@@ -4,7 +4,7 @@ from pydantic import BaseModel
 
 class ProductDimensionSchema(BaseModel):
     id: Optional[int] = None
-    product_id: int
+    product_id: Optional[int] = None
     dimension_type: Optional[str] = None
     value: Optional[float] = None
     unit: Optional[str] = None
@@ -25,12 +25,26 @@ class ProductSchema(BaseModel):
         from_attributes = True
 
 
-class ProductDetailsSchema(ProductSchema):
+# レスポンス用のスキーマ（メイン画像を含む）
+class ProductResponseSchema(ProductSchema):
+    main_image_id: Optional[int] = None
+    main_image_url: Optional[str] = None
+
+
+class ProductDetailsSchema(ProductResponseSchema):
     specifications: List[ProductSpecificationSchema]
     dimensions: List[ProductDimensionSchema]
     images: List[ImageSchema]
 
 
+# 物件全体の一括作成用スキーマ（IDは作成時に親から引き継ぐ）
+class ProductWholeSchema(ProductSchema):
+    room_id: Optional[int] = None
+    specifications: List[ProductSpecificationSchema] = []
+    dimensions: List[ProductDimensionSchema] = []
+    images: List[ImageSchema] = []
+
+
 class PropertyProductsResponse(BaseModel):
     """物件に紐づく製品情報のレスポンススキーマ"""
     id: int
@@ -49,6 +63,8 @@ class PropertyProductsResponse(BaseModel):
     updated_at: Optional[datetime] = None
     status: Optional[str] = None
     is_deleted: Optional[bool] = None
+    main_image_id: Optional[int] = None
+    main_image_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -71,5 +87,7 @@ class PropertyProductsResponse(BaseModel):
             created_at=product.created_at,
             updated_at=product.updated_at,
             status=product.status,
-            is_deleted=product.is_deleted
+            is_deleted=product.is_deleted,
+            main_image_id=product.main_image_id,
+            main_image_url=product.main_image_url
         )
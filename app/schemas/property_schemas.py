@@ -2,7 +2,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from .image_schemas import ImageSchema
-from .room_schemas import RoomDetailsSchema
+from .room_schemas import RoomDetailsSchema, RoomWholeSchema
 
 
 class PropertySchema(BaseModel):
@@ -30,7 +30,19 @@ class PropertySchema(BaseModel):
         from_attributes = True
 
 
+# レスポンス用のスキーマ（メイン画像は画像の操作からのみ更新されるため、入力には含めない）
+class PropertyResponseSchema(PropertySchema):
+    main_image_id: Optional[int] = None
+    main_image_url: Optional[str] = None
+
+
 # 詳細表示用の拡張スキーマ
-class PropertyDetailsSchema(PropertySchema):
+class PropertyDetailsSchema(PropertyResponseSchema):
     rooms: List[RoomDetailsSchema]
     images: List[ImageSchema]
+
+
+# 物件全体の一括作成用スキーマ
+class PropertyWholeSchema(PropertySchema):
+    rooms: List[RoomWholeSchema] = []
+    images: List[ImageSchema] = []
@@ -2,7 +2,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from app.schemas.image_schemas import ImageSchema
-from app.schemas.product_schemas import ProductDetailsSchema
+from app.schemas.product_schemas import ProductDetailsSchema, ProductWholeSchema
 
 
 class RoomSchema(BaseModel):
@@ -19,6 +19,12 @@ class RoomSchema(BaseModel):
         from_attributes = True
 
 
+# レスポンス用のスキーマ（メイン画像を含む）
+class RoomResponseSchema(RoomSchema):
+    main_image_id: Optional[int] = None
+    main_image_url: Optional[str] = None
+
+
 class RoomDetailsSchema(BaseModel):
     id: int
     name: str
@@ -28,8 +34,17 @@ class RoomDetailsSchema(BaseModel):
     updated_at: Optional[datetime] = None
     status: Optional[str] = None
     is_deleted: Optional[bool] = None
+    main_image_id: Optional[int] = None
+    main_image_url: Optional[str] = None
     products: List[ProductDetailsSchema]
     images: List[ImageSchema]
 
     class Config:
         from_attributes = True
+
+
+# 物件全体の一括作成用スキーマ（IDは作成時に親から引き継ぐ）
+class RoomWholeSchema(RoomSchema):
+    property_id: Optional[int] = None
+    products: List[ProductWholeSchema] = []
+    images: List[ImageSchema] = []
@@ -0,0 +1,208 @@
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+from app.crud.image import image as image_crud
+from app.database import SessionLocal
+from app.models import Image, StoredObject
+from app.services.derivative_service import DerivativeService, derivative_service, variant_keys
+from app.services.storage_cleanup_service import StorageCleanupService, storage_cleanup_service
+from app.services.tile_service import TileService, tile_service, tile_keys
+
+settings = get_settings()
+
+
+def content_hash(data: bytes) -> str:
+    """画像の内容のSHA-256（16進数）を返す"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ContentStoreService:
+    """
+    同じ内容の画像を1つのオブジェクトにまとめる（重複排除）
+
+    内容のSHA-256ごとにstored_objectsの行を持ち、それを参照する画像の数（ref_count）を管理します。
+    重複は次の2か所で検出します。
+    - アップロード前: クライアントがcontent_hashを送った場合、既存のオブジェクトを参照する
+      completedの画像を作成し、アップロードを省略します
+    - アップロード後: 完了した画像をダウンロードしてハッシュを計算し、既存のオブジェクトがあれば
+      そちらを参照するように付け替え、アップロードされた重複のオブジェクトを削除対象に登録します
+    ハッシュはサーバーでダウンロードした内容から計算したものだけを登録するため、
+    クライアントが送ったハッシュは既存のオブジェクトの検索にのみ使用します。
+    派生画像とタイルはオブジェクトごとに1回だけ生成し、同じオブジェクトを参照する画像にコピーします。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        derivatives: DerivativeService = derivative_service,
+        tiles: TileService = tile_service,
+        cleanup: StorageCleanupService = storage_cleanup_service,
+        enabled: bool = True
+    ):
+        self.session_factory = session_factory
+        self.derivatives = derivatives
+        self.tiles = tiles
+        self.cleanup = cleanup
+        self.enabled = enabled
+
+    def acquire(self, db: Session, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        同じ内容のオブジェクトがあれば参照数を増やし、それを参照する画像の列の値を返す
+
+        参照数の更新は1回のUPDATEで行うため、同時に削除（release）されても
+        削除済みのオブジェクトを参照することはありません。commitは行いません。
+
+        Returns:
+            Optional[Dict[str, Any]]: 画像に設定するs3_key・url・status・content_hash・variants・tiles
+                （同じ内容のオブジェクトがない場合はNone）
+        """
+        s3_key = db.execute(
+            update(StoredObject)
+            .where(
+                StoredObject.content_hash == content_hash,
+                StoredObject.ref_count > 0
+            )
+            .values(ref_count=StoredObject.ref_count + 1)
+            .returning(StoredObject.s3_key)
+        ).scalar()
+        if s3_key is None:
+            return None
+
+        # 同じオブジェクトを参照する画像からURLと生成済みの派生画像・タイルを引き継ぐ
+        sibling = db.execute(
+            select(Image.url, Image.variants, Image.tiles)
+            .where(Image.s3_key == s3_key, Image.content_hash == content_hash)
+            .order_by(Image.id)
+            .limit(1)
+        ).first()
+        return {
+            "s3_key": s3_key,
+            "url": sibling.url,
+            "status": "completed",
+            "content_hash": content_hash,
+            "variants": sibling.variants,
+            "tiles": sibling.tiles,
+        }
+
+    def release(self, db: Session, images: Iterable[Image], reason: str) -> List[str]:
+        """
+        削除する画像の参照を外し、どの画像からも参照されなくなったオブジェクトを削除対象に登録する
+
+        重複排除の対象になった画像は参照数を減らし、0になった場合のみ削除します。
+        それ以外の画像も、同じs3_keyを持つ別の画像（物件の一括作成でキーを指定した場合など）が
+        残っている場合は削除しません。commitは行わないため、画像の削除と同じトランザクションで呼び出すこと。
+
+        Returns:
+            List[str]: 削除対象に登録したキー
+        """
+        images = list(images)
+        image_ids = [image.id for image in images]
+        keys: List[str] = []
+        for image in images:
+            if not image.s3_key:
+                continue
+            if image.content_hash:
+                ref_count = db.execute(
+                    update(StoredObject)
+                    .where(StoredObject.content_hash == image.content_hash)
+                    .values(ref_count=StoredObject.ref_count - 1)
+                    .returning(StoredObject.ref_count)
+                ).scalar()
+                if ref_count is not None and ref_count > 0:
+                    continue
+                db.query(StoredObject)\
+                    .filter(StoredObject.content_hash == image.content_hash)\
+                    .delete(synchronize_session=False)
+            else:
+                shared = db.query(Image.id)\
+                    .filter(Image.s3_key == image.s3_key, Image.id.notin_(image_ids))\
+                    .first()
+                if shared:
+                    continue
+            keys.extend([image.s3_key, *variant_keys(image), *tile_keys(image)])
+
+        keys = list(dict.fromkeys(keys))
+        self.cleanup.enqueue(db, keys, reason)
+        return keys
+
+    def submit(self, image_ids: Iterable[int]) -> None:
+        """
+        完了した画像の後処理（重複排除・派生画像・タイルの生成）をバックグラウンドで開始する
+
+        重複排除が無効な場合は派生画像とタイルの生成のみを開始します。
+        有効な場合は、付け替えの後に生成するよう、1つのジョブで順に実行します。
+        """
+        image_ids = list(image_ids)
+        if not self.enabled:
+            self.derivatives.submit(image_ids)
+            self.tiles.submit(image_ids)
+            return
+        for image_id in image_ids:
+            self.derivatives.executor.submit(self.process, image_id)
+
+    def process(self, image_id: int) -> None:
+        self.deduplicate(image_id)
+        if self.derivatives.enabled:
+            self.derivatives.generate(image_id)
+        if self.tiles.enabled:
+            self.tiles.generate(image_id)
+
+    def deduplicate(self, image_id: int, retry: bool = True) -> Optional[str]:
+        """
+        アップロードされた画像のハッシュを計算し、同じ内容のオブジェクトがあれば付け替える
+
+        Returns:
+            Optional[str]: 画像が参照するオブジェクトのキー（対象外・失敗した場合はNone）
+        """
+        db = self.session_factory()
+        try:
+            image = db.get(Image, image_id)
+            if not image or not image.s3_key or image.content_hash or image.status != "completed":
+                return None
+
+            data = self.derivatives.storage.get(image.s3_key)
+            digest = content_hash(data)
+            existing = self.acquire(db, digest)
+            if existing is None:
+                db.add(StoredObject(content_hash=digest, s3_key=image.s3_key,
+                                    size=len(data), ref_count=1))
+                image.content_hash = digest
+                db.commit()
+                return image.s3_key
+
+            if existing["s3_key"] != image.s3_key:
+                # アップロードされた重複のオブジェクト（と生成済みのファイル）を削除し、既存のものを参照する
+                self.cleanup.enqueue(
+                    db,
+                    [image.s3_key, *variant_keys(image), *tile_keys(image)],
+                    "duplicate"
+                )
+                for column, value in existing.items():
+                    setattr(image, column, value)
+                # URLが変わるため、メイン画像であれば親エンティティのメイン画像も更新する
+                image_crud.refresh_main_images_for(db, [image], only_main=True)
+            else:
+                image.content_hash = digest
+            db.commit()
+            return image.s3_key
+        except IntegrityError:
+            # 同じ内容の画像が同時に登録された場合は、登録された方を参照するようにやり直す
+            db.rollback()
+            if retry:
+                db.close()
+                return self.deduplicate(image_id, retry=False)
+            return None
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to deduplicate image {image_id}: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+
+content_store_service = ContentStoreService(enabled=settings.IMAGE_DEDUP_ENABLED)
@@ -0,0 +1,250 @@
+import io
+import posixpath
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image as PILImage, ImageOps
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Image
+from app.utils.storage import ObjectStorage, create_storage
+
+settings = get_settings()
+
+
+class ImageSize(str, Enum):
+    """
+    派生画像のサイズ
+
+    - THUMB: 一覧のサムネイル
+    - CARD: カード・部屋や製品の画像
+    - FULL: 詳細画面の拡大表示
+    """
+    THUMB = "thumb"
+    CARD = "card"
+    FULL = "full"
+
+
+class ImageFormat(str, Enum):
+    WEBP = "webp"
+    JPEG = "jpeg"
+
+
+# サイズごとの長辺の最大ピクセル数（元画像より大きくはしない）
+VARIANT_SIZES: Dict[ImageSize, int] = {
+    ImageSize.THUMB: 320,
+    ImageSize.CARD: 800,
+    ImageSize.FULL: 1920,
+}
+
+_EXTENSIONS = {ImageFormat.WEBP: "webp", ImageFormat.JPEG: "jpg"}
+_CONTENT_TYPES = {ImageFormat.WEBP: "image/webp",
+                  ImageFormat.JPEG: "image/jpeg"}
+
+
+def variant_key(s3_key: str, size: ImageSize, image_format: ImageFormat) -> str:
+    """
+    派生画像のキーを返す
+
+    元画像と同じ場所に保存します（例: uploads/<uuid>/photo.jpg → uploads/<uuid>/photo.thumb.webp）。
+    """
+    root, _ = posixpath.splitext(s3_key)
+    return f"{root}.{ImageSize(size).value}.{_EXTENSIONS[ImageFormat(image_format)]}"
+
+
+def variant_keys(image: Image) -> List[str]:
+    """画像に記録されている派生画像のキーを全て返す"""
+    if not image.s3_key or not image.variants:
+        return []
+    return [
+        variant_key(image.s3_key, size, image_format)
+        for size, variant in image.variants.items()
+        for image_format in ImageFormat
+        if image_format.value in variant
+    ]
+
+
+def variant_url(image: Any, size: Optional[ImageSize], image_format: ImageFormat = ImageFormat.WEBP) -> str:
+    """
+    用途に合ったサイズの画像URLを返す
+
+    派生画像がまだ生成されていない場合や指定した形式がない場合は元画像のURLを返します。
+    """
+    variants = image.variants or {}
+    if size is None or ImageSize(size).value not in variants:
+        return image.url
+    variant = variants[ImageSize(size).value]
+    return variant.get(ImageFormat(image_format).value) or variant.get(ImageFormat.JPEG.value) or image.url
+
+
+def render_variants(
+    data: bytes,
+    sizes: Dict[str, int],
+    formats: List[str],
+    quality: int
+) -> Dict[str, Tuple[int, int, Dict[str, bytes]]]:
+    """
+    元画像からサイズ・形式ごとの派生画像を生成する
+
+    CPUを使う処理のため、プロセスプールで実行されます（引数・戻り値はpickle可能な値のみ）。
+
+    Returns:
+        Dict[str, Tuple[int, int, Dict[str, bytes]]]: サイズごとの (幅, 高さ, {形式: 画像データ})
+    """
+    with PILImage.open(io.BytesIO(data)) as original:
+        # スマートフォンで撮影した画像の向きを補正する
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "RGBA"):
+            original = original.convert(
+                "RGBA" if "transparency" in original.info else "RGB")
+
+        rendered = {}
+        for size, max_edge in sizes.items():
+            resized = original.copy()
+            resized.thumbnail((max_edge, max_edge), PILImage.LANCZOS)
+            outputs = {}
+            for image_format in formats:
+                buffer = io.BytesIO()
+                if image_format == ImageFormat.JPEG.value:
+                    resized.convert("RGB").save(
+                        buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+                else:
+                    resized.save(buffer, "WEBP", quality=quality, method=4)
+                outputs[image_format] = buffer.getvalue()
+            rendered[size] = (resized.width, resized.height, outputs)
+        return rendered
+
+
+class DerivativeService:
+    """
+    アップロードが完了した画像からサムネイルなどの派生画像を生成する
+
+    ダウンロード・アップロードとデータベースの更新はスレッドで行い、
+    画像の変換（CPU処理）はプロセスプールで実行するため、APIのリクエスト処理を妨げません。
+    生成した派生画像のURLはImage.variantsに記録されます。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        storage: Optional[ObjectStorage] = None,
+        max_workers: int = settings.IMAGE_DERIVATIVE_MAX_WORKERS,
+        formats: Iterable[str] = settings.IMAGE_DERIVATIVE_FORMATS,
+        quality: int = settings.IMAGE_DERIVATIVE_QUALITY,
+        enabled: bool = True
+    ):
+        self.session_factory = session_factory
+        self._storage = storage
+        self.max_workers = max_workers
+        self.formats = [ImageFormat(image_format).value for image_format in formats]
+        self.quality = quality
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    @property
+    def storage(self) -> ObjectStorage:
+        if self._storage is None:
+            self._storage = create_storage(settings.IMAGE_STORAGE_BACKEND)
+        return self._storage
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="image-derivatives"
+                )
+            return self._executor
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """画像変換などのCPU処理を実行するプロセスプール"""
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers)
+            return self._process_pool
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            process_pool, self._process_pool = self._process_pool, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if process_pool is not None:
+            process_pool.shutdown(wait=wait)
+
+    def submit(self, image_ids: Iterable[int]) -> None:
+        """
+        派生画像の生成をバックグラウンドで開始する
+
+        アップロード完了（ステータスをcompletedに更新）のcommit後に呼び出してください。
+        """
+        if not self.enabled:
+            return
+        for image_id in image_ids:
+            self.executor.submit(self.generate, image_id)
+
+    def generate(self, image_id: int) -> Optional[Dict[str, Any]]:
+        """
+        1枚の画像の派生画像を生成して保存し、Image.variantsを更新する
+
+        生成済みの画像は再生成しません。
+
+        Returns:
+            Optional[Dict[str, Any]]: 記録したvariants（対象外の場合はNone）
+        """
+        db = self.session_factory()
+        try:
+            image = db.get(Image, image_id)
+            if not image or not image.s3_key or image.variants:
+                return None
+
+            data = self.storage.get(image.s3_key)
+            rendered = self.process_pool.submit(
+                render_variants,
+                data,
+                {size.value: max_edge for size, max_edge in VARIANT_SIZES.items()},
+                self.formats,
+                self.quality
+            ).result()
+
+            variants: Dict[str, Any] = {}
+            for size, (width, height, outputs) in rendered.items():
+                variant = {"width": width, "height": height}
+                for image_format, output in outputs.items():
+                    key = variant_key(image.s3_key, size, image_format)
+                    self.storage.put(key, output, _CONTENT_TYPES[ImageFormat(image_format)])
+                    variant[image_format] = self.storage.url(key)
+                variants[size] = variant
+
+            image.variants = variants
+            # 同じオブジェクトを参照する画像（重複排除）にも記録し、画像ごとに生成し直さない
+            db.execute(
+                update(Image)
+                .where(Image.s3_key == image.s3_key, Image.id != image.id)
+                .values(variants=variants)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return variants
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to generate derivatives for image {image_id}: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+
+derivative_service = DerivativeService(
+    enabled=settings.IMAGE_DERIVATIVES_ENABLED and (
+        settings.IMAGE_STORAGE_BACKEND != "s3" or settings.aws_configured)
+)
@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
-from app.models import Drawing, Property
+from app.models import Drawing
 from app.crud.drawing import drawing as drawing_crud
 from app.schemas.drawing_schemas import DrawingSchema
 from fastapi import HTTPException
+from app.crud.ownership import OwnedEntity
+from app.services.ownership_service import ownership_service
 
 
 class DrawingService:
@@ -18,17 +20,7 @@ class DrawingService:
         Returns:
         - bool: ユーザーの図面である場合はTrue、そうでない場合はFalse
         """
-        drawing = drawing_crud.get(db, id=drawing_id)
-        if not drawing:
-            return False
-
-        # 図面に紐づく物件を取得し、その所有者を確認
-        property = db.query(Property).filter(
-            Property.id == drawing.property_id).first()
-        if not property:
-            return False
-
-        return property.user_id == user_id
+        return ownership_service.is_owner(db, OwnedEntity.DRAWING, drawing_id, user_id)
 
 
 drawing_service = DrawingService()
@@ -1,16 +1,32 @@
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple, Union
+from sqlalchemy import or_, update
 from sqlalchemy.orm import Session
 from app.models import Image
-from app.crud.image import image as image_crud
+from app.crud.image import image as image_crud, MAIN_IMAGE_PARENTS
 from app.schemas.image_schemas import (
     ImageSchema,
     CreatePresignedUrlRequest,
+    CreatePresignedUrlsRequest,
+    CompleteImagesRequest,
     CreatePresignedUrlResponse,
     ImageMetadata,
     ImageStatus,
-    ImageType
+    ImageType,
+    ImageOrder,
+    ImageOwnerGroupSchema,
+    OWNER_TYPES_BY_RANK
+)
+from app.utils.s3 import create_presigned_url
+from app.cache.invalidation import invalidate_on_commit
+from app.crud.ownership import OwnedEntity
+from app.events.publishers import publish_image_status
+from app.services.content_store_service import content_store_service
+from app.services.ownership_service import ownership_service
+from app.services.derivative_service import (
+    variant_url,
+    ImageSize,
+    ImageFormat
 )
-from app.utils.s3 import create_presigned_url, delete_s3_object
 from app.config import get_settings
 import uuid
 from fastapi import HTTPException
@@ -19,6 +35,23 @@ import boto3
 settings = get_settings()
 
 
+def _upload_targets(request: CreatePresignedUrlRequest) -> List[Tuple[OwnedEntity, int]]:
+    """アップロード先として指定された親エンティティ（所有者の確認に使用する）"""
+    targets = [
+        (entity, entity_id) for entity, entity_id in (
+            (OwnedEntity.DRAWING, request.drawing_id),
+            (OwnedEntity.SPECIFICATION, request.product_specification_id),
+            (OwnedEntity.PRODUCT, request.product_id),
+            (OwnedEntity.ROOM, request.room_id),
+            (OwnedEntity.PROPERTY, request.property_id),
+        )
+        if entity_id is not None
+    ]
+    if not targets:
+        raise HTTPException(status_code=400, detail="Upload target is not specified")
+    return targets
+
+
 class ImageService:
     def __init__(self):
         self.s3_client = boto3.client(
@@ -28,10 +61,80 @@ class ImageService:
             region_name=settings.AWS_REGION
         )
 
+    def _check_upload_targets(
+        self,
+        db: Session,
+        requests: List[CreatePresignedUrlRequest],
+        user_id: int
+    ) -> None:
+        """
+        アップロード先が全てユーザーの物件に属していることを、親の種類ごとに1回のクエリで確認する
+
+        Raises:
+        - HTTPException: アップロード先が指定されていない場合（400）、自分の物件でない場合（403）
+        """
+        targets: Dict[OwnedEntity, List[int]] = {}
+        for request in requests:
+            for entity, entity_id in _upload_targets(request):
+                targets.setdefault(entity, []).append(entity_id)
+        for entity, entity_ids in targets.items():
+            if not all(ownership_service.check_many(db, entity, entity_ids, user_id).values()):
+                raise HTTPException(
+                    status_code=403, detail="Not authorized to upload to this target")
+
+    def _build_upload(self, request: CreatePresignedUrlRequest) -> Tuple[Dict, str, str]:
+        """
+        アップロード先のS3キーと画像URL、署名付きURLの生成に使用するパラメータを作成する
+
+        Returns:
+        - Tuple[Dict, str, str]: (S3パラメータ, S3キー, 画像URL)
+        """
+        # S3メタデータの作成
+        metadata = {
+            'property_id': str(request.property_id) if request.property_id else '',
+            'room_id': str(request.room_id) if request.room_id else '',
+            'product_id': str(request.product_id) if request.product_id else '',
+            'product_specification_id': str(request.product_specification_id) if request.product_specification_id else '',
+            'drawing_id': str(request.drawing_id) if request.drawing_id else '',
+            'image_type': request.image_type.value if request.image_type else ImageType.SUB.value,
+            'description': request.description if request.description else ''
+        }
+
+        # S3キーの生成
+        key = f"uploads/{uuid.uuid4()}/{request.file_name}"
+
+        # S3パラメータの設定
+        params = {
+            'Bucket': settings.AWS_S3_BUCKET,
+            'Key': key,
+            'ContentType': request.content_type,
+            'Metadata': metadata
+        }
+
+        # 画像URLの生成
+        image_url = f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
+        return params, key, image_url
+
+    @staticmethod
+    def _image_metadata(
+        request: CreatePresignedUrlRequest,
+        status: ImageStatus = ImageStatus.PENDING
+    ) -> ImageMetadata:
+        return ImageMetadata(
+            property_id=request.property_id,
+            room_id=request.room_id,
+            product_id=request.product_id,
+            product_specification_id=request.product_specification_id,
+            image_type=request.image_type or ImageType.SUB,
+            description=request.description,
+            status=status
+        )
+
     def create_presigned_url(
         self,
         db: Session,
-        request: CreatePresignedUrlRequest
+        request: CreatePresignedUrlRequest,
+        user_id: int
     ) -> CreatePresignedUrlResponse:
         """
         画像アップロード用の署名付きURLを生成し、画像メタデータを作成する
@@ -39,6 +142,7 @@ class ImageService:
         Parameters:
         - db: データベースセッション
         - request: プリサインドURL生成リクエスト
+        - user_id: アップロードするユーザーのID（アップロード先の所有者であること）
 
         Returns:
         - CreatePresignedUrlResponse: 署名付きURLとメタデータを含むレスポンス
@@ -46,28 +150,14 @@ class ImageService:
         Raises:
         - HTTPException: S3の操作やデータベースの操作が失敗した場合
         """
-        try:
-            # S3メタデータの作成
-            metadata = {
-                'property_id': str(request.property_id) if request.property_id else '',
-                'room_id': str(request.room_id) if request.room_id else '',
-                'product_id': str(request.product_id) if request.product_id else '',
-                'product_specification_id': str(request.product_specification_id) if request.product_specification_id else '',
-                'drawing_id': str(request.drawing_id) if request.drawing_id else '',
-                'image_type': request.image_type.value if request.image_type else ImageType.SUB.value,
-                'description': request.description if request.description else ''
-            }
+        if request.content_hash and content_store_service.enabled:
+            # 重複の検出と参照数の更新は複数件の場合と同じ処理で行う
+            return self.create_presigned_urls(
+                db, CreatePresignedUrlsRequest(files=[request]), user_id)[0]
 
-            # S3キーの生成
-            key = f"uploads/{uuid.uuid4()}/{request.file_name}"
-
-            # S3パラメータの設定
-            params = {
-                'Bucket': settings.AWS_S3_BUCKET,
-                'Key': key,
-                'ContentType': request.content_type,
-                'Metadata': metadata
-            }
+        self._check_upload_targets(db, [request], user_id)
+        try:
+            params, key, image_url = self._build_upload(request)
 
             try:
                 # プリサインドURLの生成
@@ -82,9 +172,6 @@ class ImageService:
                     detail=f"Failed to generate presigned URL: {str(e)}"
                 )
 
-            # 画像URLの生成
-            image_url = f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
-
             try:
                 # 画像レコードの作成
                 image = image_crud.create(
@@ -108,23 +195,12 @@ class ImageService:
                     detail=f"Failed to create image record: {str(e)}"
                 )
 
-            # ImageMetadataの作成
-            image_metadata = ImageMetadata(
-                property_id=request.property_id,
-                room_id=request.room_id,
-                product_id=request.product_id,
-                product_specification_id=request.product_specification_id,
-                image_type=request.image_type or ImageType.SUB,
-                description=request.description,
-                status=ImageStatus.PENDING
-            )
-
             # レスポンスの作成と返却
             return CreatePresignedUrlResponse(
                 upload_url=upload_url,
                 image_id=image.id,
                 image_url=image_url,
-                image_metadata=image_metadata
+                image_metadata=self._image_metadata(request)
             )
 
         except Exception as e:
@@ -134,6 +210,120 @@ class ImageService:
                 detail=f"Failed to process image upload request: {str(e)}"
             )
 
+    def create_presigned_urls(
+        self,
+        db: Session,
+        request: CreatePresignedUrlsRequest,
+        user_id: int
+    ) -> List[CreatePresignedUrlResponse]:
+        """
+        複数の画像の署名付きURLをまとめて生成し、画像レコードを1回のINSERTで作成する
+
+        署名付きURLはクライアントが保持する認証情報からローカルで計算されるため、
+        S3への通信は発生しません。画像レコードは全て作成されるか、全く作成されないかのいずれかです。
+        content_hashが指定され、同じ内容の画像が既にある場合は、そのオブジェクトを参照する
+        completedの画像を作成し、upload_urlを返しません（duplicate=True）。
+
+        Parameters:
+        - db: データベースセッション
+        - request: ファイルごとのプリサインドURL生成リクエスト
+        - user_id: アップロードするユーザーのID（全てのアップロード先の所有者であること）
+
+        Returns:
+        - List[CreatePresignedUrlResponse]: リクエストと同じ順序のレスポンス
+
+        Raises:
+        - HTTPException: アップロード先が自分の物件でない場合、署名やデータベースの操作が失敗した場合
+        """
+        # 重複した画像は既存のオブジェクトを参照してcompletedで作成されるため、
+        # 参照数の更新や画像の作成より前にアップロード先の所有者を確認する
+        self._check_upload_targets(db, request.files, user_id)
+        uploads = [self._build_upload(file) for file in request.files]
+
+        try:
+            duplicates = [
+                content_store_service.acquire(db, file.content_hash)
+                if file.content_hash and content_store_service.enabled else None
+                for file in request.files
+            ]
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to look up duplicate images: {str(e)}"
+            )
+
+        try:
+            upload_urls = [
+                None if duplicate else self.s3_client.generate_presigned_url(
+                    'put_object',
+                    Params=params,
+                    ExpiresIn=3600
+                )
+                for (params, _, _), duplicate in zip(uploads, duplicates)
+            ]
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate presigned URL: {str(e)}"
+            )
+
+        rows = [
+            {
+                "url": image_url,
+                "s3_key": key,
+                "property_id": file.property_id,
+                "room_id": file.room_id,
+                "product_id": file.product_id,
+                "product_specification_id": file.product_specification_id,
+                "drawing_id": file.drawing_id,
+                "image_type": (file.image_type or ImageType.SUB).value,
+                "description": file.description,
+                "status": ImageStatus.PENDING.value,
+                "content_hash": None,
+                "variants": None,
+                "tiles": None,
+                **(duplicate or {})
+            }
+            for file, (_, key, image_url), duplicate in zip(request.files, uploads, duplicates)
+        ]
+
+        try:
+            image_ids = image_crud.create_many(db, rows=rows)
+            # ORMを経由しないINSERTのため、親エンティティのキャッシュを明示的に無効化する
+            invalidate_on_commit(db, *[Image(**row) for row in rows])
+            duplicate_images = [
+                Image(id=image_id, **row)
+                for image_id, row, duplicate in zip(image_ids, rows, duplicates)
+                if duplicate
+            ]
+            # 作成時点でcompletedのため、MAIN画像であれば親エンティティのメイン画像も更新する
+            image_crud.refresh_main_images_for(
+                db, duplicate_images, only_main=True)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to create image records: {str(e)}"
+            )
+
+        # 既存のオブジェクトで派生画像・タイルが未生成のものは生成を開始する
+        content_store_service.submit(
+            [image.id for image in duplicate_images])
+        return [
+            CreatePresignedUrlResponse(
+                upload_url=upload_url,
+                image_id=image_id,
+                image_url=row["url"],
+                image_metadata=self._image_metadata(
+                    file, ImageStatus(row["status"])),
+                duplicate=upload_url is None
+            )
+            for file, upload_url, image_id, row in zip(request.files, upload_urls, image_ids, rows)
+        ]
+
     def update_image_status(self, db: Session, image_id: int, status: ImageStatus) -> Image:
         """画像のステータスを更新"""
         image = image_crud.get(db, id=image_id)
@@ -152,29 +342,101 @@ class ImageService:
             created_at=image.created_at
         )
 
-        return image_crud.update(db, db_obj=image, obj_in=update_data)
+        # MAIN画像の場合は親エンティティのメイン画像も同じトランザクションで更新する
+        image.status = status.value
+        image_crud.refresh_main_images_for(db, [image], only_main=True)
+        publish_image_status(db, [image])
+        image = image_crud.update(db, db_obj=image, obj_in=update_data)
+        if status == ImageStatus.COMPLETED:
+            content_store_service.submit([image.id])
+        return image
+
+    def complete_uploads(
+        self,
+        db: Session,
+        request: CompleteImagesRequest,
+        user_id: int
+    ) -> List[ImageSchema]:
+        """
+        アップロードが完了した複数の画像のステータスを1回のUPDATEでcompletedに更新する
+
+        ユーザーの物件に属する画像のみが更新され、更新された画像が返されます。
+        既にcompletedの画像も含まれるため、再試行しても同じ結果になります。
+
+        Parameters:
+        - db: データベースセッション
+        - request: 完了にする画像IDのリスト
+        - user_id: ユーザーID
+
+        Returns:
+        - List[ImageSchema]: 更新された画像（ID順）
+        """
+        try:
+            images = image_crud.update_status_many(
+                db,
+                ids=request.image_ids,
+                status=ImageStatus.COMPLETED.value,
+                user_id=user_id
+            )
+            # ORMのflushを経由しない更新のため、親エンティティのキャッシュを明示的に無効化する
+            invalidate_on_commit(db, *images)
+            image_crud.refresh_main_images_for(db, images, only_main=True)
+            publish_image_status(db, images)
+            # commit時に失効する前にレスポンスを作成し、画像ごとの再読み込みを避ける
+            result = [ImageSchema.model_validate(image) for image in images]
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to complete image uploads: {str(e)}"
+            )
+
+        content_store_service.submit([image.id for image in result])
+        return result
 
     def get_image(self, db: Session, image_id: int) -> Optional[Image]:
         """指定されたIDの画像を取得する"""
         return image_crud.get(db, id=image_id)
 
+    def with_size(
+        self,
+        image: Union[Image, ImageSchema],
+        size: Optional[ImageSize],
+        image_format: ImageFormat = ImageFormat.WEBP
+    ) -> ImageSchema:
+        """
+        urlを用途に合ったサイズの派生画像のURLに置き換えた画像を返す
+
+        派生画像がまだ生成されていない場合は元画像のURLのままです。
+        ORMオブジェクトは変更しません。
+        """
+        schema = ImageSchema.model_validate(image)
+        if size is None:
+            return schema
+        return schema.model_copy(update={"url": variant_url(image, size, image_format)})
+
     def delete_image(self, db: Session, image_id: int):
-        """画像の削除"""
-        try:
-            image = image_crud.get(db, id=image_id)
-            if not image:
-                raise HTTPException(status_code=404, detail="Image not found")
+        """
+        画像の削除
 
-            # S3から画像を削除
-            if delete_s3_object(settings.AWS_S3_BUCKET, image.s3_key):
-                image_crud.delete(db, id=image_id)
-                return {"status": "success"}
+        S3のオブジェクトは同じトランザクションで削除対象（storage_deletions）に登録し、
+        storage_cleanup_serviceがバックグラウンドでまとめて削除します。
+        同じオブジェクトを他の画像が参照している場合（重複排除）は参照数を減らすだけで、削除しません。
+        """
+        image = image_crud.get(db, id=image_id)
+        if not image:
+            raise HTTPException(status_code=404, detail="Image not found")
 
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to delete image from S3"
-            )
+        try:
+            content_store_service.release(db, [image], "user_delete")
+            db.delete(image)
+            # メイン画像だった場合は親エンティティのメイン画像を付け替える
+            image_crud.refresh_main_images_for(db, [image], only_main=True)
+            db.commit()
+            return {"status": "success"}
         except Exception as e:
+            db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
     def get_images(
@@ -185,7 +447,10 @@ class ImageService:
         product_id: Optional[int] = None,
         product_specification_id: Optional[int] = None,
         drawing_id: Optional[int] = None,
-        include_children: bool = True
+        include_children: bool = True,
+        order: ImageOrder = ImageOrder.ID,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[Image]:
         """
         指定された条件に基づいて画像を検索します。
@@ -198,12 +463,16 @@ class ImageService:
             product_specification_id: 製品仕様ID（オプション）
             drawing_id: 図面ID（オプション）
             include_children: 下位階層の画像を含めるか（デフォルト: True）
+            order: 下位階層を含める場合の並び順（デフォルト: ID順）
+            limit: 下位階層を含める場合の1ページの件数（省略時は全件）
+            cursor: 前のページのnext_cursor
 
         Note:
             drawing_idが指定された場合は、他のパラメータに関係なく図面の画像のみを返します。
-            property_idが指定された場合は、そのプロパティに紐づく全ての画像（図面の画像含む）を返します。
-            それ以外の場合は以下の優先順位で処理します：
-            room_id > product_id > product_specification_id
+            include_children=Trueの場合は、指定された階層とその下位階層
+            （物件 → 部屋 → 製品 → 製品仕様）の画像を1回のクエリで返します。
+            複数指定された場合は以下の優先順位で処理します：
+            property_id > room_id > product_id > product_specification_id
         """
         # drawing_idが指定された場合は、他のパラメータに関係なく図面の画像のみを返す
         if drawing_id is not None:
@@ -219,21 +488,56 @@ class ImageService:
                 product_specification_id=product_specification_id
             )
 
-        # include_children=Trueの場合の処理
-        if property_id:
-            # 物件に関連する全ての画像を取得（drawing以外）
-            return image_crud.get_images(db, property_id=property_id)
-        elif room_id:
-            # 部屋に関連する全ての画像を取得
-            return image_crud.get_images(db, room_id=room_id)
-        elif product_id:
-            # 製品の画像のみを取得
-            return image_crud.get_images(db, product_id=product_id)
-        elif product_specification_id:
-            # 製品仕様の画像のみを取得
-            return image_crud.get_images(db, product_specification_id=product_specification_id)
-
-        return []
+        # 下位階層の画像を含めて1回のクエリで取得
+        return image_crud.get_subtree_images(
+            db,
+            property_id=property_id,
+            room_id=room_id,
+            product_id=product_id,
+            product_specification_id=product_specification_id,
+            order=order,
+            limit=limit,
+            cursor=cursor
+        )
+
+    def get_images_by_owner(
+        self,
+        db: Session,
+        property_id: Optional[int] = None,
+        room_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        product_specification_id: Optional[int] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[ImageOwnerGroupSchema], Optional[str]]:
+        """
+        指定された階層とその下位階層の画像を所有者（物件・部屋・製品・製品仕様）ごとにまとめて返す
+
+        所有者順にlimit件ずつ取得するため、1つの所有者の画像がページの境界で分かれることがあります。
+        その場合、次のページの最初のグループは前のページの最後のグループと同じ所有者になります。
+
+        Returns:
+            Tuple[List[ImageOwnerGroupSchema], Optional[str]]: 所有者ごとの画像と次のページのカーソル
+        """
+        images = image_crud.get_subtree_images(
+            db,
+            property_id=property_id,
+            room_id=room_id,
+            product_id=product_id,
+            product_specification_id=product_specification_id,
+            order=ImageOrder.OWNER,
+            limit=limit,
+            cursor=cursor
+        )
+
+        groups: List[ImageOwnerGroupSchema] = []
+        for image in images:
+            owner_type = OWNER_TYPES_BY_RANK[image.owner_rank]
+            if not groups or (groups[-1].owner_type, groups[-1].owner_id) != (owner_type, image.owner_id):
+                groups.append(ImageOwnerGroupSchema(
+                    owner_type=owner_type, owner_id=image.owner_id, images=[]))
+            groups[-1].images.append(ImageSchema.model_validate(image))
+        return groups, images.next_cursor
 
     def set_as_main_image(
         self,
@@ -265,34 +569,47 @@ class ImageService:
                 status_code=400, detail="Image does not belong to the specified product specification")
 
         try:
-            # 現在のメイン画像をサブに変更
-            current_main = None
-            if property_id:
-                current_main = db.query(Image).filter(
-                    Image.property_id == property_id,
-                    Image.image_type == ImageType.MAIN
-                ).first()
-            elif room_id:
-                current_main = db.query(Image).filter(
-                    Image.room_id == room_id,
-                    Image.image_type == ImageType.MAIN
-                ).first()
-            elif product_id:
-                current_main = db.query(Image).filter(
-                    Image.product_id == product_id,
-                    Image.image_type == ImageType.MAIN
-                ).first()
-            elif product_specification_id:
-                current_main = db.query(Image).filter(
-                    Image.product_specification_id == product_specification_id,
-                    Image.image_type == ImageType.MAIN
-                ).first()
-
-            if current_main:
-                current_main.image_type = ImageType.SUB
+            # 同じ親の他のMAIN画像（アップロード中のものを含む）を1回のUPDATEでサブに変更する
+            # 親ごとの(親ID, status)インデックスで検索され、画像テーブル全体は走査しない
+            parent_columns = [
+                column for column in (
+                    *(column for _, column in MAIN_IMAGE_PARENTS),
+                    Image.product_specification_id
+                )
+                if getattr(image, column.key) is not None
+            ]
+            if parent_columns:
+                demoted = db.scalars(
+                    update(Image)
+                    .where(
+                        or_(*(column == getattr(image, column.key)
+                              for column in parent_columns)),
+                        Image.image_type == ImageType.MAIN,
+                        Image.id != image.id
+                    )
+                    .values(image_type=ImageType.SUB)
+                    .returning(Image)
+                ).all()
+                # ORMのflushを経由しない更新のため、親エンティティのキャッシュを明示的に無効化する
+                invalidate_on_commit(db, *demoted)
+
+            # 物件・部屋・製品はmain_image_idを主キーで更新する
+            parents = [
+                db.get(model, getattr(image, column.key))
+                for model, column in MAIN_IMAGE_PARENTS
+                if getattr(image, column.key) is not None
+            ]
 
             # 指定された画像をメインに設定
             image.image_type = ImageType.MAIN
+            if image.status == ImageStatus.COMPLETED.value:
+                for parent in parents:
+                    if parent:
+                        parent.main_image_id = image.id
+                        parent.main_image_url = image.url
+            else:
+                # アップロード前の画像はメイン画像として表示しないため、再計算する
+                image_crud.refresh_main_images_for(db, [image])
 
             db.commit()
             db.refresh(image)
@@ -309,6 +626,10 @@ class ImageService:
             raise HTTPException(status_code=404, detail="Image not found")
 
         try:
+            # メイン画像の参照を同じトランザクションで更新する
+            image.image_type = image_type
+            image_crud.refresh_main_images_for(db, [image])
+
             # 画像タイプを更新
             update_data = ImageSchema(
                 id=image.id,
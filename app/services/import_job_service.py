@@ -0,0 +1,198 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.enums import ImportJobStatus
+from app.events.publishers import publish_import_job_status
+from app.models import ImportJob
+from app.schemas import PropertyWholeSchema
+from app.services.property_service import property_service
+
+settings = get_settings()
+
+
+class ImportJobService:
+    """
+    物件全体の一括作成をバックグラウンドで実行するジョブ管理
+
+    ジョブはimport_jobsテーブルに保存され、プロセス内のスレッドプールで実行されます。
+    外部のブローカーは不要で、サーバーが再起動した場合は未完了のジョブを再投入できます
+    （物件の一括作成とジョブの完了は1トランザクションでcommitされるため、
+    中断されたジョブを再実行しても重複は発生しません）。
+    複数のワーカープロセスが同じジョブを再投入しても、attemptsを条件にしたUPDATEで
+    ジョブを取得できた1つのワーカーだけが実行し、完了もそのワーカーだけが記録できます。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        max_workers: int = settings.IMPORT_JOB_MAX_WORKERS,
+        max_pending: int = settings.IMPORT_JOB_MAX_PENDING
+    ):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="import-job"
+                )
+            return self._executor
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ワーカーを停止する（wait=Trueの場合は投入済みのジョブの完了を待つ）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def submit(self, db: Session, user_id: int, property_data: PropertyWholeSchema) -> ImportJob:
+        """
+        ジョブを登録してワーカーに投入する
+
+        未完了のジョブがmax_pending件以上ある場合は503エラーを返します。
+        """
+        active = db.query(ImportJob).filter(
+            ImportJob.status.in_(
+                [ImportJobStatus.PENDING, ImportJobStatus.RUNNING])
+        ).count()
+        if active >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many import jobs in progress"
+            )
+
+        property_data.user_id = user_id
+        job = ImportJob(
+            user_id=user_id,
+            status=ImportJobStatus.PENDING,
+            payload=property_data.model_dump(mode="json")
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.executor.submit(self.run, job.id)
+        return job
+
+    def get_job(self, db: Session, job_id: int, user_id: int) -> ImportJob:
+        """ジョブを取得する（他のユーザーのジョブは取得できない）"""
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        if job.user_id != user_id:
+            raise HTTPException(
+                status_code=403, detail="Not authorized to access this import job")
+        return job
+
+    def _claim(self, db: Session, job: ImportJob) -> Optional[int]:
+        """
+        ジョブを実行中にして取得する（他のワーカーが先に取得した場合はNone）
+
+        読み込んだ時点のattemptsを条件にUPDATEするため、同じ状態のジョブを
+        取得できるのは1つのワーカーだけです。
+
+        Returns:
+            Optional[int]: 取得したジョブの実行回数（完了を記録する際の条件に使用する）
+        """
+        attempt = db.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id == job.id,
+                ImportJob.status.in_(
+                    [ImportJobStatus.PENDING, ImportJobStatus.RUNNING]),
+                ImportJob.attempts == job.attempts
+            )
+            .values(
+                status=ImportJobStatus.RUNNING,
+                attempts=ImportJob.attempts + 1,
+                started_at=datetime.now(timezone.utc),
+                error=None
+            )
+            .returning(ImportJob.attempts)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        db.expire(job)
+        return attempt
+
+    def _finish(self, db: Session, job: ImportJob, attempt: int, **values) -> bool:
+        """ジョブの結果を記録する（他のワーカーがジョブを取得し直していた場合はFalse）"""
+        result = db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job.id, ImportJob.attempts == attempt)
+            .values(finished_at=datetime.now(timezone.utc), **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.expire(job)
+        return result.rowcount == 1
+
+    def run(self, job_id: int) -> None:
+        """ワーカースレッドでジョブを実行する"""
+        db = self.session_factory()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if not job:
+                return
+            attempt = self._claim(db, job)
+            if attempt is None:
+                db.rollback()
+                print(f"Import job {job_id} was already claimed or finished")
+                return
+            publish_import_job_status(db, job)
+            db.commit()
+
+            # 物件の作成とジョブの完了を1つのトランザクションでcommitし、
+            # 途中でプロセスが終了した場合に再実行しても物件が重複しないようにする
+            try:
+                property_id, counts = property_service.write_property_tree(
+                    db, PropertyWholeSchema.model_validate(job.payload), commit=False)
+            except Exception as e:
+                print(f"Import job {job_id} failed: {str(e)}")
+                finished = self._finish(
+                    db, job, attempt, status=ImportJobStatus.FAILED, error=str(e))
+            else:
+                finished = self._finish(
+                    db, job, attempt, status=ImportJobStatus.SUCCEEDED,
+                    property_id=property_id, counts=counts)
+            if not finished:
+                # 他のワーカーが実行しているため、作成した物件も含めて破棄する
+                db.rollback()
+                print(f"Import job {job_id} was claimed by another worker")
+                return
+            publish_import_job_status(db, job)
+            db.commit()
+        finally:
+            db.close()
+
+    def resume_unfinished_jobs(self) -> List[int]:
+        """
+        待機中・実行中のまま残っているジョブを再投入する
+
+        サーバーの起動時に呼び出します。
+        """
+        db = self.session_factory()
+        try:
+            job_ids = [job_id for (job_id,) in db.query(ImportJob.id).filter(
+                ImportJob.status.in_(
+                    [ImportJobStatus.PENDING, ImportJobStatus.RUNNING])
+            ).order_by(ImportJob.id)]
+        finally:
+            db.close()
+        for job_id in job_ids:
+            self.executor.submit(self.run, job_id)
+        return job_ids
+
+
+import_job_service = ImportJobService()
@@ -0,0 +1,272 @@
+import math
+from typing import Dict, List, Tuple
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.crud.ownership import OwnedEntity
+from app.models import Image
+from app.schemas.image_schemas import (
+    CompleteMultipartUploadRequest,
+    CreateMultipartUploadRequest,
+    ImageMetadata,
+    ImageSchema,
+    ImageStatus,
+    ImageType,
+    MultipartUploadResponse,
+    PresignedPartSchema,
+    UploadedPartSchema
+)
+from app.services.image_service import ImageService, image_service
+from app.services.ownership_service import ownership_service
+
+settings = get_settings()
+
+# S3のマルチパートアップロードの制限
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+def plan_parts(file_size: int, part_size: int) -> Tuple[int, int]:
+    """
+    ファイルサイズからパートのサイズと数を求める
+
+    パートのサイズはS3の下限（5MiB）以上とし、パート数が上限（10000）を超える場合は大きくします。
+
+    Returns:
+        Tuple[int, int]: (パートのサイズ, パート数)
+    """
+    part_size = max(part_size, MIN_PART_SIZE, math.ceil(file_size / MAX_PARTS))
+    return part_size, max(1, math.ceil(file_size / part_size))
+
+
+class MultipartUploadService:
+    """
+    大きな画像・図面をS3のマルチパートアップロードで分割してアップロードする
+
+    開始時にpendingの画像を作成してアップロードIDを記録し、パートごとの署名付きURLを返します。
+    クライアントはパートを並列にアップロードでき、中断した場合はアップロード済みのパートを
+    S3に問い合わせて残りのパートのURLを取得し直すことで再開できます。
+    完了すると通常のアップロードと同じく画像をcompletedにし、派生画像などの生成を開始します。
+    """
+
+    def __init__(
+        self,
+        images: ImageService = image_service,
+        part_size: int = settings.MULTIPART_UPLOAD_PART_SIZE,
+        max_file_size: int = settings.MULTIPART_UPLOAD_MAX_FILE_SIZE,
+        url_expires_in: int = 3600
+    ):
+        self.images = images
+        self.part_size = part_size
+        self.max_file_size = max_file_size
+        self.url_expires_in = url_expires_in
+
+    @property
+    def s3_client(self):
+        return self.images.s3_client
+
+    def _get_upload(self, db: Session, image_id: int, user_id: int) -> Image:
+        """ユーザーの物件に属するマルチパートアップロード中の画像を取得する"""
+        image = db.get(Image, image_id)
+        if not image or not ownership_service.is_owner(db, OwnedEntity.IMAGE, image_id, user_id):
+            raise HTTPException(status_code=404, detail="Image not found")
+        if not image.multipart_upload:
+            raise HTTPException(
+                status_code=409, detail="Image has no multipart upload in progress")
+        return image
+
+    def _list_parts(self, key: str, upload_id: str) -> List[UploadedPartSchema]:
+        """S3に記録されているアップロード済みのパートを全て取得する（1000件ずつのページング）"""
+        parts: List[UploadedPartSchema] = []
+        marker = 0
+        while True:
+            response = self.s3_client.list_parts(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=key,
+                UploadId=upload_id,
+                PartNumberMarker=marker
+            )
+            parts.extend(
+                UploadedPartSchema(part_number=part["PartNumber"], etag=part["ETag"])
+                for part in response.get("Parts", [])
+            )
+            if not response.get("IsTruncated"):
+                return parts
+            marker = response["NextPartNumberMarker"]
+
+    def _response(self, image: Image, uploaded: List[UploadedPartSchema]) -> MultipartUploadResponse:
+        upload = image.multipart_upload
+        part_size, part_count = plan_parts(
+            upload["file_size"], upload["part_size"])
+        done = {part.part_number for part in uploaded}
+        # 署名はローカルで計算されるため、パート数が多くてもS3への通信は発生しない
+        parts = [
+            PresignedPartSchema(
+                part_number=part_number,
+                upload_url=self.s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': settings.AWS_S3_BUCKET,
+                        'Key': image.s3_key,
+                        'UploadId': upload["upload_id"],
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=self.url_expires_in
+                )
+            )
+            for part_number in range(1, part_count + 1)
+            if part_number not in done
+        ]
+        return MultipartUploadResponse(
+            image_id=image.id,
+            image_url=image.url,
+            upload_id=upload["upload_id"],
+            file_size=upload["file_size"],
+            part_size=part_size,
+            part_count=part_count,
+            uploaded_parts=uploaded,
+            parts=parts,
+            image_metadata=ImageMetadata(
+                property_id=image.property_id,
+                room_id=image.room_id,
+                product_id=image.product_id,
+                product_specification_id=image.product_specification_id,
+                image_type=image.image_type,
+                description=image.description,
+                status=ImageStatus(image.status)
+            )
+        )
+
+    def initiate(
+        self,
+        db: Session,
+        request: CreateMultipartUploadRequest,
+        user_id: int
+    ) -> MultipartUploadResponse:
+        """
+        マルチパートアップロードを開始し、pendingの画像と全パートの署名付きURLを作成する
+
+        Raises:
+            HTTPException: ファイルが大きすぎる場合、アップロード先が自分の物件でない場合、
+                S3・データベースの操作が失敗した場合
+        """
+        if request.file_size > self.max_file_size:
+            raise HTTPException(
+                status_code=400, detail=f"File is too large (max {self.max_file_size} bytes)")
+        self.images._check_upload_targets(db, [request], user_id)
+
+        params, key, image_url = self.images._build_upload(request)
+        try:
+            upload_id = self.s3_client.create_multipart_upload(**params)["UploadId"]
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to start multipart upload: {str(e)}")
+
+        try:
+            image = Image(
+                url=image_url,
+                s3_key=key,
+                property_id=request.property_id,
+                room_id=request.room_id,
+                product_id=request.product_id,
+                product_specification_id=request.product_specification_id,
+                drawing_id=request.drawing_id,
+                image_type=request.image_type or ImageType.SUB,
+                description=request.description,
+                status=ImageStatus.PENDING.value,
+                multipart_upload={
+                    "upload_id": upload_id,
+                    "file_size": request.file_size,
+                    "part_size": self.part_size
+                }
+            )
+            db.add(image)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._abort(key, upload_id)
+            raise HTTPException(
+                status_code=500, detail=f"Failed to create image record: {str(e)}")
+
+        return self._response(image, [])
+
+    def get_status(self, db: Session, image_id: int, user_id: int) -> MultipartUploadResponse:
+        """中断したアップロードを再開するため、アップロード済みのパートと残りのパートのURLを返す"""
+        image = self._get_upload(db, image_id, user_id)
+        uploaded = self._list_parts(
+            image.s3_key, image.multipart_upload["upload_id"])
+        return self._response(image, uploaded)
+
+    def complete(
+        self,
+        db: Session,
+        image_id: int,
+        request: CompleteMultipartUploadRequest,
+        user_id: int
+    ) -> ImageSchema:
+        """
+        パートを結合してアップロードを完了し、画像をcompletedにする
+
+        Raises:
+            HTTPException: アップロードされていないパートがある場合（400）
+        """
+        image = self._get_upload(db, image_id, user_id)
+        upload = image.multipart_upload
+        _, part_count = plan_parts(upload["file_size"], upload["part_size"])
+
+        parts = request.parts
+        if parts is None:
+            parts = self._list_parts(image.s3_key, upload["upload_id"])
+        etags: Dict[int, str] = {part.part_number: part.etag for part in parts}
+        missing = [number for number in range(1, part_count + 1) if number not in etags]
+        if missing:
+            raise HTTPException(
+                status_code=400, detail=f"Parts are not uploaded: {missing[:20]}")
+
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=image.s3_key,
+                UploadId=upload["upload_id"],
+                MultipartUpload={"Parts": [
+                    {"PartNumber": number, "ETag": etags[number]}
+                    for number in range(1, part_count + 1)
+                ]}
+            )
+        except ClientError as e:
+            # 完了のレスポンスを受け取れずに再試行した場合は、オブジェクトが作成済みであれば成功とする
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload" or not self._exists(image.s3_key):
+                raise HTTPException(
+                    status_code=400, detail=f"Failed to complete multipart upload: {str(e)}")
+
+        image.multipart_upload = None
+        return self.images.update_image_status(db, image.id, ImageStatus.COMPLETED)
+
+    def abort(self, db: Session, image_id: int, user_id: int) -> Dict[str, str]:
+        """アップロードを中止し、アップロード済みのパートとpendingの画像を削除する"""
+        image = self._get_upload(db, image_id, user_id)
+        self._abort(image.s3_key, image.multipart_upload["upload_id"])
+        db.delete(image)
+        db.commit()
+        return {"status": "success"}
+
+    def _abort(self, key: str, upload_id: str) -> None:
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET, Key=key, UploadId=upload_id)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.s3_client.head_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
+            return True
+        except ClientError:
+            return False
+
+
+multipart_upload_service = MultipartUploadService()
@@ -0,0 +1,61 @@
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud.ownership import OwnedEntity, get_owned_ids
+
+# session.infoに保存する判定結果のキー
+_MEMO_KEY = "ownership_memo"
+
+
+class OwnershipService:
+    """
+    「ユーザーUがエンティティEを所有しているか」を判定する
+
+    判定結果はセッション（=リクエスト）ごとに記憶されるため、
+    所有者チェックの後に同じエンティティを再度確認してもSQLは発行されません。
+    コミット・ロールバックで所有関係が変わる可能性があるため、その時点で記憶は破棄されます。
+    """
+
+    @staticmethod
+    def _memo(db: Session) -> Dict[Tuple[OwnedEntity, int, int], bool]:
+        return db.info.setdefault(_MEMO_KEY, {})
+
+    def check_many(
+        self,
+        db: Session,
+        entity: OwnedEntity,
+        ids: Iterable[int],
+        user_id: int
+    ) -> Dict[int, bool]:
+        """
+        複数のエンティティの所有者を1つのクエリでまとめて判定する
+
+        Returns:
+            Dict[int, bool]: エンティティIDごとの判定結果（存在しないIDはFalse）
+        """
+        entity = OwnedEntity(entity)
+        memo = self._memo(db)
+        ids = list(dict.fromkeys(ids))
+        unknown = [
+            entity_id for entity_id in ids
+            if (entity, user_id, entity_id) not in memo
+        ]
+        if unknown:
+            owned = get_owned_ids(db, entity, user_id, unknown)
+            for entity_id in unknown:
+                memo[(entity, user_id, entity_id)] = entity_id in owned
+        return {entity_id: memo[(entity, user_id, entity_id)] for entity_id in ids}
+
+    def is_owner(self, db: Session, entity: OwnedEntity, entity_id: int, user_id: int) -> bool:
+        """指定されたエンティティが削除されていないユーザーの物件に属しているかを確認する"""
+        return self.check_many(db, entity, [entity_id], user_id)[entity_id]
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_memo(session: Session) -> None:
+    session.info.pop(_MEMO_KEY, None)
+
+
+ownership_service = OwnershipService()
@@ -3,11 +3,15 @@ from app.crud.product import product as product_crud
 from app.schemas import ProductSchema
 from typing import Optional
 from fastapi import HTTPException
-from app.models import Product, Room, Property, ProductSpecification, ProductDimension
+from app.models import Product, Room, ProductSpecification, ProductDimension
 from typing import List
 from app.schemas import ProductSpecificationSchema, ProductDimensionSchema
 from sqlalchemy.orm import joinedload
 from app.crud.image import image as image_crud
+from app.cache.invalidation import invalidate_on_commit
+from app.crud.loading import LoaderStrategy, DEFAULT_LOADER_STRATEGY, load_path
+from app.crud.ownership import OwnedEntity
+from app.services.ownership_service import ownership_service
 
 
 class ProductService:
@@ -32,14 +36,45 @@ class ProductService:
                 product.product_category_name = product.product_category.name
         return products
 
-    def get_product_details(self, db: Session, product_id: int):
-        """製品の詳細情報を関連データと共に取得"""
+    def get_products_by_property(
+        self,
+        db: Session,
+        property_id: int,
+        loader_strategy: LoaderStrategy = DEFAULT_LOADER_STRATEGY
+    ) -> List[Product]:
+        """
+        指定された物件IDに紐づく全ての製品を、部屋・カテゴリ・仕様・寸法と共に取得する
+
+        loader_strategyで仕様・寸法の読み込み方式を選択できます。
+        """
+        return db.query(Product).options(
+            joinedload(Product.room),
+            joinedload(Product.product_category),
+            load_path(loader_strategy, Product.specifications),
+            load_path(loader_strategy, Product.dimensions)
+        ).join(
+            Room, Product.room_id == Room.id
+        ).filter(
+            Room.property_id == property_id
+        ).all()
+
+    def get_product_details(
+        self,
+        db: Session,
+        product_id: int,
+        loader_strategy: LoaderStrategy = DEFAULT_LOADER_STRATEGY
+    ):
+        """
+        製品の詳細情報を関連データと共に取得
+
+        loader_strategyで仕様・寸法の読み込み方式を選択できます。
+        """
 
         # 製品情報を関連データと共に取得
         product = db.query(Product)\
             .options(
-                joinedload(Product.specifications),
-                joinedload(Product.dimensions),
+                load_path(loader_strategy, Product.specifications),
+                load_path(loader_strategy, Product.dimensions),
                 joinedload(Product.room).joinedload(Room.property),
                 joinedload(Product.product_category)
         )\
@@ -64,6 +99,8 @@ class ProductService:
             "product_code": product.product_code,
             "catalog_url": product.catalog_url,
             "status": product.status,
+            "main_image_id": product.main_image_id,
+            "main_image_url": product.main_image_url,
             "created_at": product.created_at,
             "updated_at": product.updated_at,
             "specifications": product.specifications,
@@ -129,6 +166,7 @@ class ProductService:
             db.query(ProductSpecification).filter(
                 ProductSpecification.product_id == product_id
             ).delete()
+            invalidate_on_commit(db, db_product)
 
             # 新しい仕様を追加
             new_specs = []
@@ -165,6 +203,7 @@ class ProductService:
             db.query(ProductDimension).filter(
                 ProductDimension.product_id == product_id
             ).delete()
+            invalidate_on_commit(db, db_product)
 
             # 新しい寸法を追加
             new_dimensions = []
@@ -309,12 +348,7 @@ class ProductService:
         Returns:
             bool: ユーザーの物件に属する製品である場合はTrue、そうでない場合はFalse
         """
-        product = db.query(Product).join(Room).join(Property).filter(
-            Product.id == product_id,
-            Property.user_id == user_id,
-            Property.is_deleted == False
-        ).first()
-        return product is not None
+        return ownership_service.is_owner(db, OwnedEntity.PRODUCT, product_id, user_id)
 
 
 product_service = ProductService()
@@ -1,36 +1,111 @@
 from typing import Optional, List, Literal, Dict, Any, Tuple
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from app.models import Property, Room, Product, ProductSpecification, ProductDimension, ProductCategory
 from app.crud.property import property as property_crud
 from app.crud.room import room as room_crud
 from app.crud.product import product as product_crud
 from app.crud.product_specification import product_specification as spec_crud
 from app.crud.product_dimension import product_dimension as dim_crud
-from app.crud.image import image as image_crud
+from app.crud.image import image as image_crud, MAIN_IMAGE_PARENTS
+from app.enums import ImageType
 from app.crud.user import user as user_crud
 from app.crud.company import company as company_crud
 from app.crud.product_category import product_category as category_crud
+from app.cache.property_details import property_detail_cache
+from app.crud.loading import LoaderStrategy, DEFAULT_LOADER_STRATEGY, load_path
+from app.crud.counting import CountStrategy
+from app.crud.ownership import OwnedEntity
+from app.services.ownership_service import ownership_service
 from app.schemas import (
     PropertySchema,
-    RoomSchema,
-    ProductSchema,
-    ImageSchema,
-    ProductSpecificationSchema,
-    ProductDimensionSchema
+    PropertyDetailsSchema,
+    PropertyWholeSchema,
+    ImageSchema
 )
 from fastapi import HTTPException
 from fastapi import status
 
 
+# 画像の親エンティティのIDの列
+IMAGE_PARENT_COLUMNS = (
+    "property_id",
+    "room_id",
+    "product_id",
+    "product_specification_id",
+    "drawing_id"
+)
+
+# 物件作成時に作成するデフォルトの部屋
+DEFAULT_ROOMS = [
+    "リビングダイニング",
+    "キッチン",
+    "寝室",
+    "トイレ",
+    "洗面室・浴室",
+    "玄関",
+    "廊下"
+]
+
+# 部屋タイプごとのデフォルトプロダクトカテゴリID
+DEFAULT_ROOM_PRODUCT_CATEGORIES = {
+    # 基本設備 + 窓 + ダイニングセット + ソファ
+    "リビングダイニング": [1, 2, 3, 4, 5, 6, 9, 10, 11],
+    "キッチン": [1, 2, 3, 4, 5, 7, 8],  # 基本設備 + キッチン + カップボード
+    "寝室": [1, 2, 3, 4, 5, 6, 12],  # 基本設備 + 窓 + ベッド
+    "トイレ": [1, 2, 3, 4, 5],  # 基本設備のみ
+    "洗面室・浴室": [1, 2, 3, 4, 5, 14],  # 基本設備のみ + バス
+    "玄関": [1, 2, 3, 4, 5],  # 基本設備のみ
+    "廊下": [1, 2, 3, 4, 5]   # 基本設備のみ
+}
+
+
 class PropertyService:
     def create_property(self, db: Session, property_data: PropertySchema) -> Property:
-        """物件の基本情報と標準的な部屋、デフォルトの製品を作成する"""
-        # 物件の基本情報を作成（独立したトランザクション）
+        """
+        物件の基本情報と標準的な部屋、デフォルトの製品を1つのトランザクションで作成する
+
+        部屋と製品はそれぞれ1回の複数行INSERT ... RETURNINGでまとめて作成します。
+        いずれかの作成に失敗した場合は物件を含めて全てロールバックし、500エラーを返します。
+        一部の部屋・製品だけが欠けた物件が作成されることはありません。
+        """
         try:
-            property_dict = property_data.model_dump()
-            db_property = property_crud.create(
-                db, obj_in=PropertySchema(**property_dict))
+            # 物件の基本情報を作成（IDを取得するためにflushのみ行う）
+            db_property = Property(**property_data.model_dump())
+            db.add(db_property)
+            db.flush()
+
+            # プロダクトカテゴリを取得
+            all_categories = db.query(ProductCategory).all()
+            category_dict = {cat.id: cat.name for cat in all_categories}
+
+            # デフォルトの部屋をまとめて作成
+            room_ids = room_crud.create_many(db, rows=[
+                {
+                    "property_id": db_property.id,
+                    "name": room_name,
+                    "description": f"{room_name}の説明"
+                }
+                for room_name in DEFAULT_ROOMS
+            ])
+
+            # 各部屋のデフォルト製品をまとめて作成
+            product_rows = []
+            for room_id, room_name in zip(room_ids, DEFAULT_ROOMS):
+                category_ids = DEFAULT_ROOM_PRODUCT_CATEGORIES.get(
+                    room_name, [1, 2, 3, 4, 5])
+                for category_id in category_ids:
+                    if category_id in category_dict:
+                        product_rows.append({
+                            "room_id": room_id,
+                            "name": category_dict[category_id],
+                            "product_category_id": category_id,
+                            "description": f"{category_dict[category_id]}の説明"
+                        })
+            product_crud.create_many(db, rows=product_rows)
+
             db.commit()
+            db.refresh(db_property)
+            return db_property
         except Exception as e:
             db.rollback()
             raise HTTPException(
@@ -38,69 +113,13 @@ class PropertyService:
                 detail=str(e)
             )
 
-        # デフォルトの部屋を作成
-        default_rooms = [
-            "リビングダイニング",
-            "キッチン",
-            "寝室",
-            "トイレ",
-            "洗面室・浴室",
-            "玄関",
-            "廊下"
-        ]
-
-        # 部屋タイプごとのデフォルトプロダクトカテゴリID
-        room_product_categories = {
-            # 基本設備 + 窓 + ダイニングセット + ソファ
-            "リビングダイニング": [1, 2, 3, 4, 5, 6, 9, 10, 11],
-            "キッチン": [1, 2, 3, 4, 5, 7, 8],  # 基本設備 + キッチン + カップボード
-            "寝室": [1, 2, 3, 4, 5, 6, 12],  # 基本設備 + 窓 + ベッド
-            "トイレ": [1, 2, 3, 4, 5],  # 基本設備のみ
-            "洗面室・浴室": [1, 2, 3, 4, 5, 14],  # 基本設備のみ + バス
-            "玄関": [1, 2, 3, 4, 5],  # 基本設備のみ
-            "廊下": [1, 2, 3, 4, 5]   # 基本設備のみ
-        }
-
-        # プロダクトカテゴリを取得
-        all_categories = db.query(ProductCategory).all()
-        category_dict = {cat.id: cat.name for cat in all_categories}
-
-        # 各部屋を作成（部屋ごとに独立したトランザクション）
-        for room_name in default_rooms:
-            try:
-                room_data = RoomSchema(
-                    name=room_name,
-                    property_id=db_property.id,
-                    description=f"{room_name}の説明"
-                )
-                db_room = room_crud.create(db, obj_in=room_data)
-                db.commit()
-
-                # その部屋の製品を作成（製品ごとに独立したトランザクション）
-                category_ids = room_product_categories.get(
-                    room_name, [1, 2, 3, 4, 5])
-                for category_id in category_ids:
-                    if category_id in category_dict:
-                        try:
-                            product_data = ProductSchema(
-                                name=category_dict[category_id],
-                                room_id=db_room.id,
-                                product_category_id=category_id,
-                                description=f"{category_dict[category_id]}の説明"
-                            )
-                            product_crud.create(db, obj_in=product_data)
-                            db.commit()
-                        except Exception as e:
-                            db.rollback()
-                            continue
-
-            except Exception as e:
-                db.rollback()
-                continue
-
-        return db_property
-
-    def get_properties(self, db: Session, skip: int = 0, limit: int = 100) -> List[Property]:
+    def get_properties(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Property]:
         """
         物件一覧を取得する
 
@@ -108,11 +127,12 @@ class PropertyService:
             db (Session): データベースセッション
             skip (int): スキップする件数
             limit (int): 取得する最大件数
+            cursor (Optional[str]): 前のページのnext_cursor（指定時はskipより優先）
 
         Returns:
-            List[Property]: 物件のリスト
+            List[Property]: 物件のリスト（next_cursorに次のページのカーソルを持つPage）
         """
-        return property_crud.get_multi(db, skip=skip, limit=limit)
+        return property_crud.get_multi(db, skip=skip, limit=limit, cursor=cursor)
 
     def get_property(self, db: Session, property_id: int) -> Optional[Property]:
         """
@@ -127,18 +147,26 @@ class PropertyService:
         """
         return property_crud.get(db, id=property_id)
 
-    def get_property_details(self, db: Session, property_id: int):
-        """物件の詳細情報を関連データと共に取得"""
+    def get_property_details(
+        self,
+        db: Session,
+        property_id: int,
+        loader_strategy: LoaderStrategy = DEFAULT_LOADER_STRATEGY
+    ):
+        """
+        物件の詳細情報を関連データと共に取得
+
+        loader_strategyで部屋・製品・仕様・寸法の読み込み方式を選択できます。
+        JOINEDは部屋×製品×仕様×寸法の行数になるため、既定ではSELECTINを使用します。
+        """
 
         # 物件情報を関連データと共に取得
         property = db.query(Property)\
             .options(
-                joinedload(Property.rooms)
-                .joinedload(Room.products)
-                .joinedload(Product.specifications),
-                joinedload(Property.rooms)
-                .joinedload(Room.products)
-                .joinedload(Product.dimensions)
+                load_path(loader_strategy, Property.rooms,
+                          Room.products, Product.specifications),
+                load_path(loader_strategy, Property.rooms,
+                          Room.products, Product.dimensions)
         )\
             .filter(Property.id == property_id)\
             .first()
@@ -146,8 +174,17 @@ class PropertyService:
         if not property:
             raise HTTPException(status_code=404, detail="Property not found")
 
-        # 画像情報を取得
-        property_images = image_crud.get_images(db, property_id=property_id)
+        # 物件・部屋・製品の画像をまとめて取得
+        images = image_crud.get_images_for_tree(
+            db,
+            property_ids=[property.id],
+            room_ids=[room.id for room in property.rooms],
+            product_ids=[
+                product.id
+                for room in property.rooms
+                for product in room.products
+            ]
+        )
 
         # レスポンスの構築
         result = {
@@ -169,14 +206,13 @@ class PropertyService:
             "created_at": property.created_at,
             "updated_at": property.updated_at,
             "status": property.status,
-            "images": property_images,
+            "main_image_id": property.main_image_id,
+            "main_image_url": property.main_image_url,
+            "images": images.for_property(property.id),
             "rooms": []
         }
 
         for room in property.rooms:
-            # 部屋の画像を取得
-            room_images = image_crud.get_images(db, room_id=room.id)
-
             room_data = {
                 "id": room.id,
                 "name": room.name,
@@ -185,28 +221,28 @@ class PropertyService:
                 "created_at": room.created_at,
                 "updated_at": room.updated_at,
                 "status": room.status,
-                "images": room_images,
+                "main_image_id": room.main_image_id,
+                "main_image_url": room.main_image_url,
+                "images": images.for_room(room.id),
                 "products": []
             }
 
             for product in room.products:
-                # 製品の画像を取得
-                product_images = image_crud.get_images(
-                    db, product_id=product.id)
-
                 product_data = {
                     "id": product.id,
                     "name": product.name,
                     "description": product.description,
                     "room_id": product.room_id,
                     "product_category_id": product.product_category_id,
-                    "manufacturer_id": product.manufacturer_id,
+                    "manufacturer_name": product.manufacturer_name,
                     "product_code": product.product_code,
                     "catalog_url": product.catalog_url,
                     "created_at": product.created_at,
                     "updated_at": product.updated_at,
                     "status": product.status,
-                    "images": product_images,
+                    "main_image_id": product.main_image_id,
+                    "main_image_url": product.main_image_url,
+                    "images": images.for_product(product.id),
                     "specifications": product.specifications,
                     "dimensions": product.dimensions
                 }
@@ -216,87 +252,137 @@ class PropertyService:
 
         return result
 
-    @staticmethod
-    def create_property_whole(db: Session, property_data: PropertySchema) -> int:
-        try:
-            # Create property record
-            property_dict = property_data.model_dump(
-                exclude={'rooms', 'images'})
-            db_property = property_crud.create(
-                db, obj_in=PropertySchema(**property_dict))
-
-            # Create property images
-            if property_data.images:
-                for image_data in property_data.images:
-                    image_dict = image_data.model_dump()
-                    image_dict['property_id'] = db_property.id
-                    image_dict['room_id'] = None
-                    image_dict['product_id'] = None
-                    image_crud.create(db, obj_in=ImageSchema(**image_dict))
-
-            # Create rooms and their related entities
-            if property_data.rooms:
-                for room_data in property_data.rooms:
-                    # Create room record
-                    room_dict = room_data.model_dump(
-                        exclude={'products', 'images'})
-                    room_dict['property_id'] = db_property.id
-                    db_room = room_crud.create(
-                        db, obj_in=RoomSchema(**room_dict))
-
-                    # Create room images
-                    if room_data.images:
-                        for image_data in room_data.images:
-                            image_dict = image_data.model_dump()
-                            image_dict['property_id'] = None
-                            image_dict['room_id'] = db_room.id
-                            image_dict['product_id'] = None
-                            image_crud.create(
-                                db, obj_in=ImageSchema(**image_dict))
-
-                    # Create products and their related entities
-                    if room_data.products:
-                        for product_data in room_data.products:
-                            # Create product record
-                            product_dict = product_data.model_dump(
-                                exclude={'specifications', 'dimensions', 'images'})
-                            product_dict['property_id'] = db_property.id
-                            product_dict['room_id'] = db_room.id
-                            db_product = product_crud.create(
-                                db, obj_in=ProductSchema(**product_dict))
-
-                            # Create product images
-                            if product_data.images:
-                                for image_data in product_data.images:
-                                    image_dict = image_data.model_dump()
-                                    image_dict['property_id'] = None
-                                    image_dict['room_id'] = None
-                                    image_dict['product_id'] = db_product.id
-                                    image_crud.create(
-                                        db, obj_in=ImageSchema(**image_dict))
-
-                            # Create product specifications
-                            if product_data.specifications:
-                                for spec_data in product_data.specifications:
-                                    spec_dict = spec_data.model_dump()
-                                    spec_dict['product_id'] = db_product.id
-                                    spec_crud.create(
-                                        db, obj_in=ProductSpecificationSchema(**spec_dict))
-
-                            # Create product dimensions
-                            if product_data.dimensions:
-                                for dim_data in product_data.dimensions:
-                                    dim_dict = dim_data.model_dump()
-                                    dim_dict['product_id'] = db_product.id
-                                    dim_crud.create(
-                                        db, obj_in=ProductDimensionSchema(**dim_dict))
+    def get_property_details_document(self, db: Session, property_id: int) -> Dict[str, Any]:
+        """
+        物件の詳細情報をシリアライズ済みのドキュメントとして取得する
+        物件ごとにキャッシュされ、関連データが更新されると自動的に無効化される
 
-            db.refresh(db_property)
-            return db_property.id
+        Args:
+            db (Session): データベースセッション
+            property_id (int): 物件ID
 
-        except Exception as e:
+        Returns:
+            Dict[str, Any]: JSONに変換可能な物件詳細ドキュメント
+        """
+        def build() -> Dict[str, Any]:
+            details = self.get_property_details(db, property_id)
+            return PropertyDetailsSchema.model_validate(details).model_dump(mode="json")
+
+        return property_detail_cache.get_or_build(property_id, build)
+
+    def create_property_whole(self, db: Session, property_data: PropertyWholeSchema) -> int:
+        """物件・部屋・製品・仕様・寸法・画像をまとめて作成し、物件IDを返す"""
+        property_id, _ = self.write_property_tree(db, property_data)
+        return property_id
+
+    def write_property_tree(
+        self,
+        db: Session,
+        property_data: PropertyWholeSchema,
+        commit: bool = True
+    ) -> Tuple[int, Dict[str, int]]:
+        """
+        ネストされた物件データを階層ごとの複数行INSERTで作成し、1回だけcommitする
+
+        物件 → 部屋 → 製品 → 仕様・寸法の順に、エンティティ種別ごとに1回ずつ
+        INSERT ... RETURNINGを発行し、返されたIDを子の行に引き継ぎます。
+        画像は全ての親のIDが確定した後に1回でまとめて作成します。
+        途中で失敗した場合は全てロールバックされます。
+        commit=Falseの場合はcommitせず、呼び出し元が他の変更（ジョブの完了など）と
+        同じトランザクションでcommitします。
+
+        Returns:
+            Tuple[int, Dict[str, int]]: 物件IDとエンティティ種別ごとの作成件数
+        """
+        # 複数行INSERTでは全ての行が同じキーを持つ必要があるため、Noneの項目も含めて出力する。
+        # ステータス・削除フラグはクライアントから指定させず、サーバー側の既定値で作成する
+        def to_row(data, exclude=frozenset(), **parent_ids) -> Dict[str, Any]:
+            row = data.model_dump(
+                mode="json",
+                exclude={"id", "created_at", "updated_at",
+                         "status", "is_deleted", *exclude}
+            )
+            row.update(parent_ids)
+            return row
+
+        # 画像は書き込み対象の親にのみ紐づけ、クライアントが指定した他の親のIDは破棄する
+        def to_image_row(image: ImageSchema, **parent_id) -> Dict[str, Any]:
+            return to_row(image, **{
+                **dict.fromkeys(IMAGE_PARENT_COLUMNS), **parent_id})
+
+        try:
+            # 物件
+            property_id = property_crud.create_many(db, rows=[
+                to_row(property_data, {"rooms", "images"})
+            ])[0]
+            image_rows = [
+                to_image_row(image, property_id=property_id)
+                for image in property_data.images
+            ]
+
+            # 部屋
+            rooms = property_data.rooms
+            room_ids = room_crud.create_many(db, rows=[
+                to_row(room, {"products", "images"}, property_id=property_id)
+                for room in rooms
+            ])
+
+            # 製品
+            products = []
+            product_rows = []
+            for room_id, room in zip(room_ids, rooms):
+                image_rows.extend(
+                    to_image_row(image, room_id=room_id) for image in room.images)
+                for product in room.products:
+                    products.append(product)
+                    product_rows.append(to_row(
+                        product,
+                        {"specifications", "dimensions",
+                            "images", "product_category_name"},
+                        room_id=room_id
+                    ))
+            product_ids = product_crud.create_many(db, rows=product_rows)
+
+            # 製品の仕様・寸法
+            spec_rows = []
+            dim_rows = []
+            for product_id, product in zip(product_ids, products):
+                spec_rows.extend(
+                    to_row(spec, product_id=product_id) for spec in product.specifications)
+                dim_rows.extend(
+                    to_row(dim, product_id=product_id) for dim in product.dimensions)
+                image_rows.extend(
+                    to_image_row(image, product_id=product_id) for image in product.images)
+            spec_crud.create_many(db, rows=spec_rows)
+            dim_crud.create_many(db, rows=dim_rows)
+
+            # 画像
+            image_crud.create_many(db, rows=image_rows)
+            # MAIN画像を含む場合は親エンティティのメイン画像を設定
+            main_rows = [
+                row for row in image_rows
+                if row.get("image_type") == ImageType.MAIN.value
+            ]
+            if main_rows:
+                for model, column in MAIN_IMAGE_PARENTS:
+                    image_crud.refresh_main_images(db, model, {
+                        row[column.key] for row in main_rows if row.get(column.key)
+                    })
+
+            if commit:
+                db.commit()
+        except Exception:
             db.rollback()
-            raise e
+            raise
+
+        return property_id, {
+            "properties": 1,
+            "rooms": len(room_ids),
+            "products": len(product_ids),
+            "specifications": len(spec_rows),
+            "dimensions": len(dim_rows),
+            "images": len(image_rows)
+        }
 
     async def update_property(self, db: Session, property_id: int, property_data: PropertySchema):
         db_property = db.query(Property).filter(
@@ -346,7 +432,9 @@ class PropertyService:
         user_id: int,
         skip: int = 0,
         limit: int = 10,
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        cursor: Optional[str] = None,
+        count_strategy: CountStrategy = CountStrategy.SEPARATE
     ) -> Tuple[List[Property], int]:
         """
         指定されたユーザーIDの物件一覧を取得する
@@ -357,6 +445,8 @@ class PropertyService:
             skip: スキップする件数
             limit: 取得する最大件数
             filters: フィルター条件
+            cursor: 前のページのnext_cursor（指定時はskipより優先）
+            count_strategy: 総件数の求め方
 
         Returns:
             Tuple[List[Property], int]: 物件リストと総件数のタプル
@@ -370,7 +460,9 @@ class PropertyService:
             user_id=user_id,
             skip=skip,
             limit=limit,
-            filters=filters
+            filters=filters,
+            cursor=cursor,
+            count_strategy=count_strategy
         )
 
     def is_my_property(self, db: Session, property_id: int, user_id: int) -> bool:
@@ -385,12 +477,7 @@ class PropertyService:
         Returns:
             bool: ユーザーの物件である場合はTrue、そうでない場合はFalse
         """
-        property = db.query(Property).filter(
-            Property.id == property_id,
-            Property.user_id == user_id,
-            Property.is_deleted == False
-        ).first()
-        return property is not None
+        return ownership_service.is_owner(db, OwnedEntity.PROPERTY, property_id, user_id)
 
 
 property_service = PropertyService()
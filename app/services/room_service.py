@@ -3,11 +3,14 @@ from app.crud.room import room as room_crud
 from app.schemas import RoomSchema
 from typing import Optional, List, Literal
 from fastapi import HTTPException, status
-from app.models import Room, ProductCategory, Property, Product
+from app.models import Room, ProductCategory, Product
 from sqlalchemy.orm import joinedload
 from app.crud.product import product as product_crud
 from app.crud.image import image as image_crud
 from app.schemas import ProductSchema
+from app.crud.loading import LoaderStrategy, DEFAULT_LOADER_STRATEGY, load_path
+from app.crud.ownership import OwnedEntity
+from app.services.ownership_service import ownership_service
 
 
 class RoomService:
@@ -67,7 +70,8 @@ class RoomService:
         db: Session,
         property_id: int,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[RoomSchema]:
         """
         指定された物件の部屋一覧を取得する
@@ -77,15 +81,17 @@ class RoomService:
             property_id (int): 物件ID
             skip (int): スキップする件数
             limit (int): 取得する最大件数
+            cursor (Optional[str]): 前のページのnext_cursor（指定時はskipより優先）
 
         Returns:
-            List[RoomSchema]: 部屋のリスト
+            List[RoomSchema]: 部屋のリスト（next_cursorに次のページのカーソルを持つPage）
         """
         return room_crud.get_multi_by_property(
             db,
             property_id=property_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
 
     def get_room(self, db: Session, room_id: int) -> Optional[RoomSchema]:
@@ -135,16 +141,25 @@ class RoomService:
             db.rollback()
             raise HTTPException(status_code=400, detail=str(e))
 
-    def get_room_details(self, db: Session, room_id: int):
-        """部屋の詳細情報を関連データと共に取得"""
+    def get_room_details(
+        self,
+        db: Session,
+        room_id: int,
+        loader_strategy: LoaderStrategy = DEFAULT_LOADER_STRATEGY
+    ):
+        """
+        部屋の詳細情報を関連データと共に取得
+
+        loader_strategyで製品・仕様・寸法の読み込み方式を選択できます。
+        """
 
         # 部屋情報を関連データと共に取得
         room = db.query(Room)\
             .options(
-                joinedload(Room.products)
-                .joinedload(Product.specifications),
-                joinedload(Room.products)
-                .joinedload(Product.dimensions),
+                load_path(loader_strategy, Room.products,
+                          Product.specifications),
+                load_path(loader_strategy, Room.products,
+                          Product.dimensions),
                 joinedload(Room.property)  # 物件情報も取得
         )\
             .filter(Room.id == room_id)\
@@ -153,8 +168,12 @@ class RoomService:
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
 
-        # 部屋の画像を取得
-        room_images = image_crud.get_images(db, room_id=room_id)
+        # 部屋・製品の画像をまとめて取得
+        images = image_crud.get_images_for_tree(
+            db,
+            room_ids=[room.id],
+            product_ids=[product.id for product in room.products]
+        )
 
         # レスポンスの構築
         result = {
@@ -165,7 +184,9 @@ class RoomService:
             "created_at": room.created_at,
             "updated_at": room.updated_at,
             "status": room.status,
-            "images": room_images,
+            "main_image_id": room.main_image_id,
+            "main_image_url": room.main_image_url,
+            "images": images.for_room(room.id),
             "products": [],
             # 物件の基本情報
             "property_name": room.property.name,
@@ -174,22 +195,21 @@ class RoomService:
         }
 
         for product in room.products:
-            # 製品の画像を取得
-            product_images = image_crud.get_images(db, product_id=product.id)
-
             product_data = {
                 "id": product.id,
                 "name": product.name,
                 "description": product.description,
                 "room_id": product.room_id,
                 "product_category_id": product.product_category_id,
-                "manufacturer_id": product.manufacturer_id,
+                "manufacturer_name": product.manufacturer_name,
                 "product_code": product.product_code,
                 "catalog_url": product.catalog_url,
                 "created_at": product.created_at,
                 "updated_at": product.updated_at,
                 "status": product.status,
-                "images": product_images,
+                "main_image_id": product.main_image_id,
+                "main_image_url": product.main_image_url,
+                "images": images.for_product(product.id),
                 "specifications": product.specifications,
                 "dimensions": product.dimensions
             }
@@ -209,12 +229,7 @@ class RoomService:
         Returns:
             bool: ユーザーの物件に属する部屋である場合はTrue、そうでない場合はFalse
         """
-        room = db.query(Room).join(Property).filter(
-            Room.id == room_id,
-            Property.user_id == user_id,
-            Property.is_deleted == False
-        ).first()
-        return room is not None
+        return ownership_service.is_owner(db, OwnedEntity.ROOM, room_id, user_id)
 
 
 room_service = RoomService()
@@ -0,0 +1,189 @@
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import unquote_plus
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.cache.invalidation import invalidate_on_commit
+from app.config import get_settings
+from app.events.publishers import publish_image_status
+from app.crud.image import image as image_crud
+from app.database import SessionLocal
+from app.models import Image
+from app.schemas.image_schemas import ImageStatus
+from app.services.content_store_service import content_store_service
+
+settings = get_settings()
+
+
+def parse_object_created_keys(message: Union[str, Dict[str, Any]], bucket: Optional[str] = None) -> List[str]:
+    """
+    S3のイベント通知から作成されたオブジェクトのキーを取り出す
+
+    以下の形式を受け付けます。
+    - S3イベント通知そのもの（{"Records": [...]}）
+    - SNS経由の通知（{"Type": "Notification", "Message": "<S3イベントのJSON>"}）
+    - SQSのメッセージ本文（上記いずれかのJSON文字列）
+
+    ObjectCreated以外のイベントやテストイベント（s3:TestEvent）は無視します。
+    bucketを指定した場合は、そのバケットのイベントのみを対象にします。
+    キーはURLエンコードされて通知されるため、デコードした値を返します。
+    """
+    if isinstance(message, str):
+        message = json.loads(message)
+
+    # SNSの通知はS3イベントをJSON文字列としてMessageに含む
+    if message.get("Type") == "Notification" and "Message" in message:
+        return parse_object_created_keys(message["Message"], bucket)
+
+    keys: List[str] = []
+    for record in message.get("Records", []):
+        if record.get("eventSource") != "aws:s3":
+            continue
+        if not record.get("eventName", "").startswith("ObjectCreated:"):
+            continue
+        s3 = record.get("s3", {})
+        if bucket and s3.get("bucket", {}).get("name") != bucket:
+            continue
+        key = s3.get("object", {}).get("key")
+        if key:
+            keys.append(unquote_plus(key))
+    return keys
+
+
+class S3EventService:
+    """
+    S3のObjectCreatedイベントを受け取り、アップロードされた画像をcompletedにする
+
+    クライアントがアップロード後にステータス更新APIを呼び出さなくても、
+    S3への保存をきっかけに画像が表示されるようになります。
+    イベントはSNSのHTTPエンドポイント（/images/events/s3）またはSQSのポーリングで受け取ります。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        batch_size: int = settings.S3_EVENT_BATCH_SIZE
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def complete_keys(self, db: Session, keys: Iterable[str]) -> int:
+        """
+        s3_keyに対応する保留中の画像をcompletedにする
+
+        ix_images_s3_keyを使用し、batch_size件ごとに1回のUPDATEで更新します。
+        既にcompletedの画像や対応する画像がないキーは無視されるため、
+        同じイベントが重複して配信されても問題ありません。
+        更新した画像の重複排除と派生画像（サムネイルなど）・図面のタイルの生成を開始します。
+
+        Returns:
+            int: 更新された画像の件数
+        """
+        keys = list(dict.fromkeys(keys))
+        image_ids = []
+        try:
+            for start in range(0, len(keys), self.batch_size):
+                chunk = keys[start:start + self.batch_size]
+                images = db.scalars(
+                    update(Image)
+                    .where(
+                        Image.s3_key.in_(chunk),
+                        Image.status == ImageStatus.PENDING.value
+                    )
+                    .values(status=ImageStatus.COMPLETED.value)
+                    .returning(Image)
+                ).all()
+                # ORMのflushを経由しない更新のため、親エンティティのキャッシュを明示的に無効化する
+                invalidate_on_commit(db, *images)
+                image_crud.refresh_main_images_for(db, images, only_main=True)
+                publish_image_status(db, images)
+                image_ids.extend(image.id for image in images)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        content_store_service.submit(image_ids)
+        return len(image_ids)
+
+    def ingest(self, db: Session, message: Union[str, Dict[str, Any]]) -> int:
+        """イベント通知を1件処理し、更新された画像の件数を返す"""
+        return self.complete_keys(
+            db, parse_object_created_keys(message, settings.AWS_S3_BUCKET))
+
+    def poll_once(self, sqs_client: Any, queue_url: str, wait_seconds: int = 0) -> int:
+        """
+        SQSからメッセージを受信して処理し、処理できたメッセージを削除する
+
+        受信した最大10件のメッセージに含まれるキーをまとめて更新します。
+        解析できないメッセージは削除せずに残し、キューの再配信ポリシー（DLQ）に任せます。
+
+        Returns:
+            int: 更新された画像の件数
+        """
+        response = sqs_client.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=10,
+            WaitTimeSeconds=wait_seconds
+        )
+        messages = response.get("Messages", [])
+        if not messages:
+            return 0
+
+        keys: List[str] = []
+        processed = []
+        for message in messages:
+            try:
+                keys.extend(parse_object_created_keys(
+                    message["Body"], settings.AWS_S3_BUCKET))
+            except Exception as e:
+                print(
+                    f"Failed to parse S3 event message {message.get('MessageId')}: {str(e)}")
+                continue
+            processed.append(message)
+
+        db = self.session_factory()
+        try:
+            updated = self.complete_keys(db, keys)
+        finally:
+            db.close()
+
+        if processed:
+            sqs_client.delete_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": message["ReceiptHandle"]}
+                    for i, message in enumerate(processed)
+                ]
+            )
+        return updated
+
+    def start(self, sqs_client: Any, queue_url: str) -> None:
+        """SQSのロングポーリングをバックグラウンドのスレッドで開始する"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.poll_once(sqs_client, queue_url,
+                                   wait_seconds=settings.S3_EVENT_POLL_WAIT_SECONDS)
+                except Exception as e:
+                    print(f"Failed to process S3 events: {str(e)}")
+                    self._stop.wait(5)
+
+        self._thread = threading.Thread(
+            target=run, name="s3-event-consumer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """ポーリングを停止する（受信待ちの間は最大でS3_EVENT_POLL_WAIT_SECONDS秒かかります）"""
+        self._stop.set()
+        self._thread = None
+
+
+s3_event_service = S3EventService()
@@ -0,0 +1,291 @@
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Integer, cast, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.cache.signed_urls import SignedURLCache, signed_url_cache
+from app.crud.ownership import get_image_ancestry
+from app.enums import ImageType, TransactionStatus
+from app.models import ListingItem, Property, Transaction
+from app.schemas.image_schemas import ImageSchema
+from app.services.derivative_service import (
+    DerivativeService, ImageFormat, derivative_service, variant_key
+)
+from app.utils.storage import ObjectStorage
+
+# 詳細ドキュメント内の画像の祖先 (property_id, room_id, product_id)
+Ancestry = Tuple[Optional[int], Optional[int], Optional[int]]
+
+
+def _collect_images(
+    node: Dict[str, Any],
+    ancestry: Ancestry,
+    found: List[Tuple[Dict[str, Any], Ancestry]]
+) -> None:
+    """物件・部屋・製品の詳細ドキュメントをたどり、画像とその祖先を集める"""
+    property_id, room_id, product_id = ancestry
+    if "rooms" in node:
+        property_id = node["id"]
+    elif "products" in node:
+        room_id = node["id"]
+        property_id = node.get("property_id", property_id)
+    elif "specifications" in node:
+        product_id = node["id"]
+        room_id = node.get("room_id", room_id)
+        property_id = node.get("property_id", property_id)
+    ancestry = (property_id, room_id, product_id)
+
+    for image in node.get("images") or []:
+        found.append((image, ancestry))
+    for child in (node.get("rooms") or []) + (node.get("products") or []):
+        _collect_images(child, ancestry, found)
+
+
+class SignedURLService:
+    """
+    有料画像（PAID）のURLを、購入者にだけ署名付きURLとして発行する
+
+    有料画像は販売しているコンテンツのため、公開URLの代わりに有効期限付きのURLを返します。
+    詳細ドキュメント（物件・部屋・製品）や画像一覧に含まれる有料画像は、1回のクエリで
+    閲覧できる範囲（完了済みの取引で購入した物件・部屋・製品、または自分の物件）を求め、
+    まとめて署名します。署名付きURLは (s3_key, 購入者) ごとにキャッシュされます。
+    閲覧できない有料画像はurl・s3_key・派生画像を空にして返します。
+    """
+
+    def __init__(
+        self,
+        cache: SignedURLCache = signed_url_cache,
+        derivatives: DerivativeService = derivative_service,
+        storage: Optional[ObjectStorage] = None
+    ):
+        self.cache = cache
+        self.derivatives = derivatives
+        self._storage = storage
+
+    @property
+    def storage(self) -> ObjectStorage:
+        return self._storage or self.derivatives.storage
+
+    def get_accessible_scopes(
+        self,
+        db: Session,
+        user_id: int,
+        property_ids: Iterable[int] = (),
+        room_ids: Iterable[int] = (),
+        product_ids: Iterable[int] = ()
+    ) -> Set[Tuple[str, int]]:
+        """
+        ユーザーが有料画像を閲覧できる物件・部屋・製品を1回のクエリで求める
+
+        完了済みの取引で購入した出品のうち、最も狭い範囲（製品 → 部屋 → 物件の順）を
+        閲覧範囲とします。自分が登録した物件は全体を閲覧できます。
+
+        Returns:
+            Set[Tuple[str, int]]: ("property" | "room" | "product", ID) の集合
+        """
+        property_ids = [i for i in set(property_ids) if i is not None]
+        room_ids = [i for i in set(room_ids) if i is not None]
+        product_ids = [i for i in set(product_ids) if i is not None]
+        if not (property_ids or room_ids or product_ids):
+            return set()
+
+        purchases = select(
+            ListingItem.property_id, ListingItem.room_id, ListingItem.product_id
+        ).join(
+            Transaction, Transaction.listing_id == ListingItem.id
+        ).where(
+            Transaction.buyer_user_id == user_id,
+            Transaction.transaction_status == TransactionStatus.COMPLETED,
+            or_(
+                ListingItem.property_id.in_(property_ids),
+                ListingItem.room_id.in_(room_ids),
+                ListingItem.product_id.in_(product_ids)
+            )
+        )
+        owned = select(
+            Property.id, cast(null(), Integer), cast(null(), Integer)
+        ).where(
+            Property.id.in_(property_ids),
+            Property.user_id == user_id
+        )
+
+        scopes: Set[Tuple[str, int]] = set()
+        for property_id, room_id, product_id in db.execute(union_all(purchases, owned)):
+            if product_id is not None:
+                scopes.add(("product", product_id))
+            elif room_id is not None:
+                scopes.add(("room", room_id))
+            elif property_id is not None:
+                scopes.add(("property", property_id))
+        return scopes
+
+    def sign_urls(self, s3_keys: Iterable[str], user_id: int) -> Dict[str, str]:
+        """キーごとの署名付きURLを返す（キャッシュにないキーだけを署名する）"""
+        return self.cache.get_many(s3_keys, user_id, self.storage.signed_url)
+
+    def sign_tree(
+        self,
+        db: Session,
+        document: Dict[str, Any],
+        user_id: Optional[int],
+        ancestry: Ancestry = (None, None, None)
+    ) -> Dict[str, Any]:
+        """
+        詳細ドキュメントに含まれる有料画像のURLを、閲覧できるものは署名付きURLに置き換える
+
+        documentは物件・部屋・製品の詳細をmodel_dump(mode="json")した辞書です。
+        キャッシュされたドキュメントを変更しないよう、有料画像がある場合はコピーを返します。
+
+        Args:
+            db (Session): データベースセッション
+            document (Dict[str, Any]): 詳細ドキュメント
+            user_id (Optional[int]): 閲覧するユーザーのID（未ログインの場合はNone）
+            ancestry (Ancestry): ドキュメントに含まれない祖先の (property_id, room_id, product_id)
+
+        Returns:
+            Dict[str, Any]: 有料画像のURLを置き換えたドキュメント
+        """
+        found: List[Tuple[Dict[str, Any], Ancestry]] = []
+        _collect_images(document, ancestry, found)
+        if not any(image.get("image_type") == ImageType.PAID.value for image, _ in found):
+            return document
+
+        document = copy.deepcopy(document)
+        found = []
+        _collect_images(document, ancestry, found)
+        paid = [(image, owner) for image, owner in found
+                if image.get("image_type") == ImageType.PAID.value]
+
+        self._sign_paid(db, paid, user_id)
+        return document
+
+    def sign_images(
+        self,
+        db: Session,
+        images: List[ImageSchema],
+        user_id: Optional[int]
+    ) -> List[ImageSchema]:
+        """
+        画像一覧に含まれる有料画像のURLを、閲覧できるものは署名付きURLに置き換える
+
+        画像の祖先（物件・部屋・製品）は有料画像の分だけ1回のクエリでまとめて求めます。
+        閲覧できない有料画像はurl・s3_key・派生画像を空にします。
+
+        Args:
+            db (Session): データベースセッション
+            images (List[ImageSchema]): 画像一覧（urlは元画像のURL）
+            user_id (Optional[int]): 閲覧するユーザーのID（未ログインの場合はNone）
+
+        Returns:
+            List[ImageSchema]: 有料画像のURLを置き換えた画像一覧（同じ順序）
+        """
+        paid_ids = [image.id for image in images if image.image_type == ImageType.PAID]
+        if not paid_ids:
+            return images
+
+        ancestry = get_image_ancestry(db, paid_ids)
+        documents: Dict[int, Dict[str, Any]] = {}
+        paid: List[Tuple[Dict[str, Any], Ancestry]] = []
+        for image in images:
+            if image.image_type == ImageType.PAID:
+                document = image.model_dump(mode="json")
+                documents[image.id] = document
+                paid.append((document, ancestry.get(image.id, (None, None, None))))
+        self._sign_paid(db, paid, user_id)
+        return [
+            ImageSchema.model_validate(documents[image.id]) if image.id in documents else image
+            for image in images
+        ]
+
+    def sign_image(self, db: Session, image: Any, user_id: Optional[int]) -> ImageSchema:
+        """1件の画像（ORMオブジェクトまたはImageSchema）をsign_imagesと同じ規則で返す"""
+        return self.sign_images(db, [ImageSchema.model_validate(image)], user_id)[0]
+
+    def get_granted_image_ids(
+        self,
+        db: Session,
+        image_ids: Iterable[int],
+        user_id: Optional[int]
+    ) -> Set[int]:
+        """
+        有料画像のうち、ユーザーが閲覧できるもののIDを求める
+
+        URLを署名せずに閲覧できるかだけを判定する場合（図面のタイルなど）に使います。
+        """
+        image_ids = set(image_ids)
+        if user_id is None or not image_ids:
+            return set()
+        ancestry = get_image_ancestry(db, image_ids)
+        scopes = self.get_accessible_scopes(
+            db,
+            user_id,
+            property_ids=[owner[0] for owner in ancestry.values()],
+            room_ids=[owner[1] for owner in ancestry.values()],
+            product_ids=[owner[2] for owner in ancestry.values()]
+        )
+        return {
+            image_id for image_id, owner in ancestry.items()
+            if self._is_granted(scopes, owner)
+        }
+
+    @staticmethod
+    def _is_granted(scopes: Set[Tuple[str, int]], ancestry: Ancestry) -> bool:
+        property_id, room_id, product_id = ancestry
+        return (("property", property_id) in scopes
+                or ("room", room_id) in scopes
+                or ("product", product_id) in scopes)
+
+    def _sign_paid(
+        self,
+        db: Session,
+        paid: List[Tuple[Dict[str, Any], Ancestry]],
+        user_id: Optional[int]
+    ) -> None:
+        """有料画像の辞書を、閲覧できるものは署名付きURLに置き換え、それ以外は空にする"""
+        scopes: Set[Tuple[str, int]] = set()
+        if user_id is not None:
+            scopes = self.get_accessible_scopes(
+                db,
+                user_id,
+                property_ids=[owner[0] for _, owner in paid],
+                room_ids=[owner[1] for _, owner in paid],
+                product_ids=[owner[2] for _, owner in paid]
+            )
+
+        granted: List[Dict[str, Any]] = []
+        for image, owner in paid:
+            if self._is_granted(scopes, owner):
+                granted.append(image)
+            else:
+                image.update(url=None, s3_key=None, variants=None)
+
+        keys = []
+        for image in granted:
+            if image.get("s3_key"):
+                keys.append(image["s3_key"])
+                keys.extend(self._variant_keys(image))
+        urls = self.sign_urls(keys, user_id) if keys else {}
+
+        for image in granted:
+            s3_key = image.get("s3_key")
+            if not s3_key:
+                continue
+            image["url"] = urls[s3_key]
+            for size, variant in (image.get("variants") or {}).items():
+                for image_format in ImageFormat:
+                    if image_format.value in variant:
+                        variant[image_format.value] = urls[variant_key(
+                            s3_key, size, image_format)]
+
+    @staticmethod
+    def _variant_keys(image: Dict[str, Any]) -> List[str]:
+        return [
+            variant_key(image["s3_key"], size, image_format)
+            for size, variant in (image.get("variants") or {}).items()
+            for image_format in ImageFormat
+            if image_format.value in variant
+        ]
+
+
+signed_url_service = SignedURLService()
@@ -0,0 +1,212 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Image, StorageDeletion
+from app.schemas.image_schemas import ImageStatus
+from app.utils.s3 import DELETE_OBJECTS_MAX_KEYS, delete_s3_objects, s3_client as default_s3_client
+
+settings = get_settings()
+
+
+class StorageCleanupService:
+    """
+    S3オブジェクトの削除を定期的にまとめて実行する
+
+    - 削除された画像のオブジェクトはstorage_deletions（アウトボックス）に登録され、
+      リクエストの中ではS3を呼び出しません
+    - 署名付きURLの期限を過ぎてもpendingのままの画像は、アップロードされなかったものとして
+      画像レコードを削除し、オブジェクトを削除対象に登録します
+      （マルチパートアップロードは再開できるようmultipart_stale_after秒まで残し、削除時に中止します）
+    - 削除対象はDeleteObjectsで最大1000件ずつまとめて削除します
+
+    複数のプロセスで同時に実行しても、行ロック（SKIP LOCKED）で同じ行を重複して処理しません。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        s3_client=None,
+        bucket: Optional[str] = settings.AWS_S3_BUCKET,
+        stale_after: float = settings.PENDING_IMAGE_TTL_SECONDS,
+        multipart_stale_after: float = settings.MULTIPART_UPLOAD_TTL_SECONDS,
+        batch_size: int = DELETE_OBJECTS_MAX_KEYS,
+        max_attempts: int = settings.STORAGE_DELETION_MAX_ATTEMPTS
+    ):
+        self.session_factory = session_factory
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.stale_after = stale_after
+        self.multipart_stale_after = multipart_stale_after
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, db: Session, keys: Iterable[Optional[str]], reason: str) -> None:
+        """
+        S3オブジェクトを削除対象に登録する
+
+        commitは行わないため、画像の削除と同じトランザクションで登録すること。
+        バケットが設定されていない場合（アップロードできない環境）は何もしません。
+        """
+        if not self.bucket:
+            return
+        db.add_all([
+            StorageDeletion(bucket=self.bucket, s3_key=key, reason=reason)
+            for key in keys if key
+        ])
+
+    def reap_stale_uploads(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        stale_after秒を過ぎてもpendingのままの画像を削除し、オブジェクトを削除対象に登録する
+
+        Returns:
+            int: 削除した画像の件数
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.stale_after)
+        multipart_cutoff = now - timedelta(seconds=self.multipart_stale_after)
+        reaped = 0
+        while True:
+            images = db.query(Image)\
+                .filter(
+                    Image.status == ImageStatus.PENDING.value,
+                    Image.created_at < cutoff,
+                    or_(
+                        Image.multipart_upload.is_(None),
+                        Image.created_at < multipart_cutoff
+                    )
+                )\
+                .order_by(Image.id)\
+                .limit(self.batch_size)\
+                .with_for_update(skip_locked=True)\
+                .all()
+            if not images:
+                break
+            try:
+                for image in images:
+                    if image.multipart_upload:
+                        self._abort_multipart_upload(image)
+                self.enqueue(
+                    db, [image.s3_key for image in images], "stale_upload")
+                for image in images:
+                    db.delete(image)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            reaped += len(images)
+            if len(images) < self.batch_size:
+                break
+        return reaped
+
+    def _abort_multipart_upload(self, image: Image) -> None:
+        """
+        中断されたマルチパートアップロードを中止し、アップロード済みのパートを削除する
+
+        失敗しても画像の削除は続行します（バケットのライフサイクルルール
+        AbortIncompleteMultipartUploadでも削除されます）。
+        """
+        try:
+            (self.s3_client or default_s3_client).abort_multipart_upload(
+                Bucket=self.bucket,
+                Key=image.s3_key,
+                UploadId=image.multipart_upload["upload_id"]
+            )
+        except Exception as e:
+            print(f"Failed to abort multipart upload for image {image.id}: {str(e)}")
+
+    def flush_outbox(self, db: Session) -> Dict[str, int]:
+        """
+        削除対象のオブジェクトをDeleteObjectsでまとめて削除する
+
+        失敗したオブジェクトは試行回数を増やして次回の実行で再試行し、
+        max_attempts回失敗したものは調査のために残します。
+
+        Returns:
+            Dict[str, int]: 削除に成功した件数（deleted）と失敗した件数（failed）
+        """
+        result = {"deleted": 0, "failed": 0}
+        # 失敗した行を同じ実行の中で再度処理しないよう、処理済みのIDより後から取得する
+        last_id = 0
+        while True:
+            rows = db.query(StorageDeletion)\
+                .filter(
+                    StorageDeletion.id > last_id,
+                    StorageDeletion.attempts < self.max_attempts
+                )\
+                .order_by(StorageDeletion.id)\
+                .limit(self.batch_size)\
+                .with_for_update(skip_locked=True)\
+                .all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            by_bucket: Dict[str, list] = {}
+            for row in rows:
+                by_bucket.setdefault(row.bucket, []).append(row)
+
+            try:
+                for bucket, bucket_rows in by_bucket.items():
+                    errors = delete_s3_objects(
+                        bucket,
+                        list(dict.fromkeys(row.s3_key for row in bucket_rows)),
+                        client=self.s3_client
+                    )
+                    for row in bucket_rows:
+                        if row.s3_key in errors:
+                            row.attempts += 1
+                            row.last_error = errors[row.s3_key]
+                            result["failed"] += 1
+                        else:
+                            db.delete(row)
+                            result["deleted"] += 1
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            if len(rows) < self.batch_size:
+                break
+        return result
+
+    def run_once(self) -> Dict[str, int]:
+        """期限切れのアップロードを削除し、削除対象のオブジェクトをS3から削除する"""
+        db = self.session_factory()
+        try:
+            reaped = self.reap_stale_uploads(db)
+            result = self.flush_outbox(db)
+            return {"reaped": reaped, **result}
+        finally:
+            db.close()
+
+    def start(self, interval: float = settings.STORAGE_CLEANUP_INTERVAL_SECONDS) -> None:
+        """run_onceをinterval秒ごとにバックグラウンドのスレッドで実行する"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    result = self.run_once()
+                    if any(result.values()):
+                        print(f"Storage cleanup: {result}")
+                except Exception as e:
+                    print(f"Failed to clean up storage: {str(e)}")
+
+        self._thread = threading.Thread(
+            target=run, name="storage-cleanup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+
+storage_cleanup_service = StorageCleanupService()
@@ -10,6 +10,8 @@ from app.config import get_settings
 from app.models import Transaction, TransactionAuditLog, TransactionErrorLog, ListingItem, User, BuyerProfile
 from app.enums import TransactionStatus, PaymentStatus, TransferStatus, ChangeType, ErrorType
 from app.services.take_rate_service import take_rate_service
+from app.crud.property import property as property_crud
+from app.events.publishers import publish_checkout_completed
 
 settings = get_settings()
 
@@ -180,12 +182,14 @@ class StripeService:
             # transaction_idでトランザクションを検索
             print(
                 f"[DEBUG] Searching for transaction with ID: {transaction_id}")
+            # 同じイベントが同時に再送された場合に購入件数を二重に加算しないよう、行ロックを取得する
             transaction = db.query(Transaction).filter(
                 Transaction.id == int(transaction_id)
-            ).first()
+            ).with_for_update().first()
 
             if transaction:
                 print(f"[DEBUG] Found transaction: {transaction.id}")
+                previous_status = transaction.transaction_status
                 # 既存のトランザクションを更新
                 transaction.payment_intent_id = payment_intent_id
                 transaction.charge_id = charge_id
@@ -199,12 +203,18 @@ class StripeService:
                     transaction_id=transaction.id,
                     field_name="transaction_status",
                     change_type=ChangeType.WEBHOOK,
-                    old_value=transaction.transaction_status.value if transaction.transaction_status else None,
+                    old_value=previous_status.value if previous_status else None,
                     new_value=TransactionStatus.COMPLETED.value
                 )
                 db.add(audit_log)
                 print("[DEBUG] Added audit log for transaction status update")
 
+                # 物件の購入件数を加算（イベントの再送で二重に加算しない）
+                if previous_status != TransactionStatus.COMPLETED:
+                    property_crud.increment_purchase_count(
+                        db, listing_id=transaction.listing_id)
+                    publish_checkout_completed(db, transaction)
+
                 print("[DEBUG] Committing transaction")
                 db.commit()
                 print("[DEBUG] Successfully committed transaction")
@@ -0,0 +1,399 @@
+import io
+import math
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from PIL import Image as PILImage, ImageOps
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.enums import ImageType
+from app.models import Image
+from app.services.derivative_service import DerivativeService, derivative_service
+from app.services.signed_url_service import SignedURLService, signed_url_service
+from app.utils.storage import ObjectStorage
+
+settings = get_settings()
+
+_EXTENSIONS = {"jpeg": "jpg", "webp": "webp", "png": "png"}
+_CONTENT_TYPES = {"jpeg": "image/jpeg",
+                  "webp": "image/webp", "png": "image/png"}
+
+
+def tile_levels(width: int, height: int, tile_size: int) -> List[Dict[str, int]]:
+    """
+    Deep Zoom（DZI）形式のピラミッドの各レベルのサイズとタイル数を返す
+
+    レベル0は1x1ピクセル、最大レベルが元画像のサイズで、レベルが1つ下がるごとに縦横が半分になります。
+    """
+    max_level = math.ceil(math.log2(max(width, height, 1)))
+    levels = []
+    for level in range(max_level + 1):
+        scale = 2 ** (max_level - level)
+        level_width = max(1, math.ceil(width / scale))
+        level_height = max(1, math.ceil(height / scale))
+        levels.append({
+            "level": level,
+            "width": level_width,
+            "height": level_height,
+            "columns": math.ceil(level_width / tile_size),
+            "rows": math.ceil(level_height / tile_size),
+        })
+    return levels
+
+
+def tiles_prefix(s3_key: str) -> str:
+    """タイルの保存先（元画像と同じ場所、例: uploads/<uuid>/plan.jpg → uploads/<uuid>/plan_files）"""
+    root, _ = posixpath.splitext(s3_key)
+    return f"{root}_files"
+
+
+def descriptor_key(s3_key: str) -> str:
+    """DZIのディスクリプタ（XML）のキー"""
+    root, _ = posixpath.splitext(s3_key)
+    return f"{root}.dzi"
+
+
+def tile_key(s3_key: str, level: int, column: int, row: int, tile_format: str) -> str:
+    return f"{tiles_prefix(s3_key)}/{level}/{column}_{row}.{_EXTENSIONS[tile_format]}"
+
+
+def tile_keys(image: Image) -> List[str]:
+    """画像に記録されているタイルとディスクリプタのキーを全て返す"""
+    if not image.s3_key or not image.tiles:
+        return []
+    tiles = image.tiles
+    keys = [descriptor_key(image.s3_key)]
+    for level in tile_levels(tiles["width"], tiles["height"], tiles["tile_size"]):
+        keys.extend(
+            tile_key(image.s3_key, level["level"],
+                     column, row, tiles["format"])
+            for column in range(level["columns"])
+            for row in range(level["rows"])
+        )
+    return keys
+
+
+def render_descriptor(width: int, height: int, tile_size: int, overlap: int, tile_format: str) -> bytes:
+    """OpenSeadragonなどのビューアが読み込めるDZIのディスクリプタを生成する"""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+        f'Format="{_EXTENSIONS[tile_format]}" Overlap="{overlap}" TileSize="{tile_size}">'
+        f'<Size Width="{width}" Height="{height}"/>'
+        '</Image>\n'
+    ).encode("utf-8")
+
+
+def _open_drawing(data: bytes, max_pixels: int) -> PILImage.Image:
+    """
+    図面の画像をピクセル数の上限を引き上げて開く
+
+    図面のスキャン画像はPillowの既定の上限（約8900万ピクセル）を超えることがあるため、
+    開く間だけ上限をmax_pixelsに引き上げます。プロセスプールのワーカーは派生画像の生成と
+    共有されるため、開いた後は既定の上限に戻し、派生画像では既定の保護を維持します。
+    """
+    default = PILImage.MAX_IMAGE_PIXELS
+    PILImage.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        image = PILImage.open(io.BytesIO(data))
+    finally:
+        PILImage.MAX_IMAGE_PIXELS = default
+    # Pillowは上限の2倍まではエラーにしないため、上限はここで確認する
+    if image.width * image.height > max_pixels:
+        image.close()
+        raise ValueError(
+            f"Drawing is too large to tile: {image.width}x{image.height} pixels (max {max_pixels})")
+    return image
+
+
+def render_tiles(
+    data: bytes,
+    tile_size: int,
+    overlap: int,
+    tile_format: str,
+    quality: int,
+    max_pixels: int
+) -> Tuple[int, int, Dict[Tuple[int, int, int], bytes]]:
+    """
+    元画像からタイルのピラミッドを生成する
+
+    CPUを使う処理のため、プロセスプールで実行されます（引数・戻り値はpickle可能な値のみ）。
+    各レベルは1つ上のレベルを縮小して作成します。
+
+    Returns:
+        Tuple[int, int, Dict[Tuple[int, int, int], bytes]]: (幅, 高さ, {(レベル, 列, 行): タイルの画像データ})
+
+    Raises:
+        ValueError: 画像のピクセル数がmax_pixelsを超える場合
+    """
+    with _open_drawing(data, max_pixels) as original:
+        source = ImageOps.exif_transpose(original)
+        if source.mode not in ("RGB", "L") or tile_format == "jpeg":
+            source = source.convert("RGB")
+        width, height = source.size
+
+        tiles: Dict[Tuple[int, int, int], bytes] = {}
+        for level in reversed(tile_levels(width, height, tile_size)):
+            if source.size != (level["width"], level["height"]):
+                source = source.resize(
+                    (level["width"], level["height"]), PILImage.LANCZOS)
+            for column in range(level["columns"]):
+                for row in range(level["rows"]):
+                    left = max(0, column * tile_size - overlap)
+                    top = max(0, row * tile_size - overlap)
+                    right = min(level["width"], (column + 1)
+                                * tile_size + overlap)
+                    bottom = min(level["height"], (row + 1)
+                                 * tile_size + overlap)
+                    buffer = io.BytesIO()
+                    tile = source.crop((left, top, right, bottom))
+                    if tile_format == "jpeg":
+                        tile.save(buffer, "JPEG", quality=quality)
+                    elif tile_format == "webp":
+                        tile.save(buffer, "WEBP", quality=quality, method=4)
+                    else:
+                        tile.save(buffer, "PNG", optimize=True)
+                    tiles[(level["level"], column, row)] = buffer.getvalue()
+        return width, height, tiles
+
+
+class TileService:
+    """
+    図面の画像からDeep Zoom（DZI）形式のタイルのピラミッドを生成する
+
+    図面（平面図・断面図・立面図）は大きなスキャン画像のため、ビューアが表示範囲のタイルだけを
+    取得できるようにします。タイルは元画像と同じ場所（<元画像のキー>_files/<レベル>/<列>_<行>.jpg）に保存し、
+    グリッドの情報をImage.tilesに記録します。
+    画像の変換は派生画像と同じプロセスプール・ストレージを使用します。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        derivatives: DerivativeService = derivative_service,
+        storage: Optional[ObjectStorage] = None,
+        tile_size: int = settings.DRAWING_TILE_SIZE,
+        overlap: int = settings.DRAWING_TILE_OVERLAP,
+        tile_format: str = settings.DRAWING_TILE_FORMAT,
+        upload_concurrency: int = settings.DRAWING_TILE_UPLOAD_CONCURRENCY,
+        max_pixels: int = settings.DRAWING_TILE_MAX_PIXELS,
+        signed_urls: SignedURLService = signed_url_service,
+        enabled: bool = True
+    ):
+        if tile_format not in _EXTENSIONS:
+            raise ValueError(
+                f"Invalid tile format: {tile_format}. Must be one of: {', '.join(_EXTENSIONS)}")
+        self.session_factory = session_factory
+        self.derivatives = derivatives
+        self.signed_urls = signed_urls
+        self._storage = storage
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.tile_format = tile_format
+        self.upload_concurrency = upload_concurrency
+        self.max_pixels = max_pixels
+        self.enabled = enabled
+
+    @property
+    def storage(self) -> ObjectStorage:
+        return self._storage or self.derivatives.storage
+
+    def submit(self, image_ids: Iterable[int]) -> None:
+        """
+        タイルの生成をバックグラウンドで開始する
+
+        図面に紐づかない画像は生成時に除外されるため、完了した画像のIDをそのまま渡して構いません。
+        """
+        if not self.enabled:
+            return
+        for image_id in image_ids:
+            self.derivatives.executor.submit(self.generate, image_id)
+
+    def generate(self, image_id: int) -> Optional[Dict[str, Any]]:
+        """
+        1枚の図面の画像のタイルを生成して保存し、Image.tilesを更新する
+
+        図面の画像以外と生成済みの画像は対象外です。
+
+        Returns:
+            Optional[Dict[str, Any]]: 記録したtiles（対象外の場合はNone）
+        """
+        db = self.session_factory()
+        try:
+            image = db.get(Image, image_id)
+            if not image or not image.s3_key or not image.drawing_id or image.tiles:
+                return None
+
+            data = self.storage.get(image.s3_key)
+            width, height, tiles = self.derivatives.process_pool.submit(
+                render_tiles,
+                data,
+                self.tile_size,
+                self.overlap,
+                self.tile_format,
+                settings.IMAGE_DERIVATIVE_QUALITY,
+                self.max_pixels
+            ).result()
+            del data
+
+            # タイルは数百〜数千枚になるため、アップロードは並列に行う
+            content_type = _CONTENT_TYPES[self.tile_format]
+            with ThreadPoolExecutor(
+                max_workers=self.upload_concurrency,
+                thread_name_prefix="drawing-tiles"
+            ) as uploader:
+                list(uploader.map(
+                    lambda item: self.storage.put(
+                        tile_key(image.s3_key, *item[0], self.tile_format),
+                        item[1],
+                        content_type
+                    ),
+                    tiles.items()
+                ))
+            # ディスクリプタは全てのタイルが揃ってから保存する
+            self.storage.put(
+                descriptor_key(image.s3_key),
+                render_descriptor(width, height, self.tile_size,
+                                  self.overlap, self.tile_format),
+                "application/xml"
+            )
+
+            image.tiles = {
+                "width": width,
+                "height": height,
+                "tile_size": self.tile_size,
+                "overlap": self.overlap,
+                "format": self.tile_format,
+            }
+            # 同じオブジェクトを参照する画像（重複排除）にも記録し、削除時にタイルのキーを求められるようにする
+            db.execute(
+                update(Image)
+                .where(Image.s3_key == image.s3_key, Image.id != image.id)
+                .values(tiles=image.tiles)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return image.tiles
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to generate tiles for image {image_id}: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def get_tile_sources(
+        self,
+        db: Session,
+        drawing_id: int,
+        user_id: Optional[int] = None,
+        paid_tile_base_url: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        図面の画像ごとのタイルのグリッドの情報を返す
+
+        タイルが未生成の画像は tiles_ready=False とし、元画像のURLのみを返します。
+        有料画像（PAID）は画像一覧と同じく、閲覧できないユーザーにはURLとタイルを返しません。
+        閲覧できる有料画像は元画像とディスクリプタを署名付きURLで返し、タイルのURLは
+        paid_tile_base_url/<画像ID>/{level}/{column}_{row}.<拡張子>（get_tile_urlで
+        閲覧できるかを確認してから署名付きURLにリダイレクトするエンドポイント）にします。
+        """
+        images = db.query(Image)\
+            .filter(Image.drawing_id == drawing_id)\
+            .order_by(Image.id)\
+            .all()
+        granted = self.signed_urls.get_granted_image_ids(
+            db, [image.id for image in images if image.image_type == ImageType.PAID], user_id)
+        signed_keys = []
+        for image in images:
+            if image.id in granted and image.s3_key:
+                signed_keys.append(image.s3_key)
+                if image.tiles:
+                    signed_keys.append(descriptor_key(image.s3_key))
+        signed = self.signed_urls.sign_urls(
+            signed_keys, user_id) if signed_keys else {}
+
+        sources = []
+        for image in images:
+            paid = image.image_type == ImageType.PAID
+            if paid and image.id not in granted:
+                sources.append(
+                    {"image_id": image.id, "url": None, "tiles_ready": False})
+                continue
+            source: Dict[str, Any] = {
+                "image_id": image.id,
+                "url": signed.get(image.s3_key, image.url),
+                "tiles_ready": bool(image.tiles),
+            }
+            if image.tiles:
+                tiles = image.tiles
+                extension = _EXTENSIONS[tiles["format"]]
+                tile_path = "/{level}/{column}_{row}." + extension
+                if paid:
+                    descriptor_url = signed[descriptor_key(image.s3_key)]
+                    tile_url_template = f"{paid_tile_base_url}/{image.id}" + tile_path \
+                        if paid_tile_base_url else None
+                else:
+                    descriptor_url = self.storage.url(
+                        descriptor_key(image.s3_key))
+                    tile_url_template = self.storage.url(
+                        tiles_prefix(image.s3_key)) + tile_path
+                source.update(
+                    width=tiles["width"],
+                    height=tiles["height"],
+                    tile_size=tiles["tile_size"],
+                    overlap=tiles["overlap"],
+                    format=extension,
+                    descriptor_url=descriptor_url,
+                    tile_url_template=tile_url_template,
+                    levels=tile_levels(
+                        tiles["width"], tiles["height"], tiles["tile_size"]),
+                )
+            sources.append(source)
+        return sources
+
+    def get_tile_url(
+        self,
+        db: Session,
+        drawing_id: int,
+        image_id: int,
+        level: int,
+        column: int,
+        row: int,
+        extension: str,
+        user_id: int
+    ) -> str:
+        """
+        1枚のタイルのURLを返す（有料画像は閲覧できるユーザーにのみ署名付きURLを返す）
+
+        Raises:
+            HTTPException: 画像・タイルが存在しない場合（404）、閲覧できない有料画像の場合（403）
+        """
+        image = db.query(Image)\
+            .filter(Image.id == image_id, Image.drawing_id == drawing_id)\
+            .first()
+        if not image or not image.s3_key or not image.tiles:
+            raise HTTPException(status_code=404, detail="Tile not found")
+        tiles = image.tiles
+        levels = tile_levels(tiles["width"], tiles["height"], tiles["tile_size"])
+        if not (extension == _EXTENSIONS[tiles["format"]]
+                and 0 <= level < len(levels)
+                and 0 <= column < levels[level]["columns"]
+                and 0 <= row < levels[level]["rows"]):
+            raise HTTPException(status_code=404, detail="Tile not found")
+
+        key = tile_key(image.s3_key, level, column, row, tiles["format"])
+        if image.image_type != ImageType.PAID:
+            return self.storage.url(key)
+        if image.id not in self.signed_urls.get_granted_image_ids(db, [image.id], user_id):
+            raise HTTPException(
+                status_code=403, detail="Not authorized to view this drawing")
+        return self.signed_urls.sign_urls([key], user_id)[key]
+
+tile_service = TileService(
+    enabled=settings.DRAWING_TILES_ENABLED and derivative_service.enabled
+)
@@ -1,8 +1,12 @@
 from sqlalchemy.orm import Session
+from app.cache.users import user_cache
+from app.config import get_settings
 from app.crud.user import user as user_crud
 from app.schemas import UserSchema, SellerProfileSchema
 from typing import Optional
 
+settings = get_settings()
+
 
 class UserService:
     def get_user(self, db: Session, user_id: str):
@@ -36,8 +40,20 @@ class UserService:
         return user_crud.create(db, obj_in=user_create)
 
     def get_user_by_clerk_id(self, db: Session, clerk_user_id: str):
-        """Clerk User IDでユーザーを取得"""
-        return user_crud.get_by_clerk_id(db, clerk_user_id)
+        """
+        Clerk User IDでユーザーを取得
+
+        認証のたびに呼ばれるため、解決済みのユーザーはuser_cacheから返します。
+        ユーザー・プロフィールの更新（update_user、Seller登録によるroleの変更など）で
+        該当ユーザーのエントリは自動的に無効化されます。
+        """
+        return user_cache.get_or_load(
+            db,
+            clerk_user_id,
+            lambda: user_crud.get_by_clerk_id(
+                db, clerk_user_id,
+                preload_profiles=settings.USER_CACHE_PRELOAD_PROFILES)
+        )
 
 
 user_service = UserService()
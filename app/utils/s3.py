@@ -2,6 +2,7 @@ import boto3
 from botocore.config import Config
 from datetime import datetime, timedelta
 import uuid
+from typing import Dict, List
 from app.config import get_settings
 
 settings = get_settings()
@@ -37,3 +38,37 @@ def delete_s3_object(bucket: str, key: str):
     except Exception as e:
         print(f"Error deleting S3 object: {e}")
         return False
+
+
+# DeleteObjectsで1回に削除できるオブジェクト数の上限
+DELETE_OBJECTS_MAX_KEYS = 1000
+
+
+def delete_s3_objects(bucket: str, keys: List[str], client=None) -> Dict[str, str]:
+    """
+    S3のオブジェクトをDeleteObjectsで1000件ずつまとめて削除する
+
+    存在しないキーの削除は成功として扱われます。
+
+    Returns:
+        Dict[str, str]: 削除に失敗したキーとエラーメッセージ
+    """
+    client = client or s3_client
+    errors: Dict[str, str] = {}
+    for start in range(0, len(keys), DELETE_OBJECTS_MAX_KEYS):
+        chunk = keys[start:start + DELETE_OBJECTS_MAX_KEYS]
+        try:
+            response = client.delete_objects(
+                Bucket=bucket,
+                Delete={
+                    'Objects': [{'Key': key} for key in chunk],
+                    'Quiet': True
+                }
+            )
+        except Exception as e:
+            print(f"Error deleting S3 objects: {e}")
+            errors.update({key: str(e) for key in chunk})
+            continue
+        for error in response.get('Errors', []):
+            errors[error['Key']] = f"{error.get('Code')}: {error.get('Message')}"
+    return errors
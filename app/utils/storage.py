@@ -0,0 +1,121 @@
+import os
+from typing import Dict, Optional, Type
+
+from app.config import get_settings
+from app.utils.s3 import s3_client
+
+settings = get_settings()
+
+
+class ObjectStorage:
+    """
+    画像の派生ファイル（サムネイル・タイルなど）を保存するストレージの基底クラス
+
+    キーはS3のキーと同じ形式（"uploads/<uuid>/photo.jpg"）で扱います。
+    """
+
+    name = "base"
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """キーに対応する公開URLを返す"""
+        raise NotImplementedError
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        """非公開のオブジェクトをexpires_in秒間だけ取得できるURLを返す"""
+        raise NotImplementedError
+
+
+class S3Storage(ObjectStorage):
+    name = "s3"
+
+    def __init__(self, bucket: Optional[str] = None, region: Optional[str] = None, client=None):
+        self.bucket = bucket or settings.AWS_S3_BUCKET
+        self.region = region or settings.AWS_REGION
+        self.client = client or s3_client
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            # キーは元画像ごとに一意で内容が変わらないため、長期間キャッシュさせる
+            CacheControl="public, max-age=31536000, immutable"
+        )
+
+    def url(self, key: str) -> str:
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        # 署名はローカルで計算されるため、S3へのリクエストは発生しない
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expires_in
+        )
+
+
+class LocalStorage(ObjectStorage):
+    """ローカルのディレクトリに保存するストレージ（開発・テスト用）"""
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None, base_url: Optional[str] = None):
+        self.root = root or settings.LOCAL_STORAGE_ROOT
+        self.base_url = (base_url or settings.LOCAL_STORAGE_BASE_URL).rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        # ローカルのストレージにはアクセス制御がないため、公開URLをそのまま返す
+        return self.url(key)
+
+
+_storages: Dict[str, Type[ObjectStorage]] = {
+    S3Storage.name: S3Storage,
+    LocalStorage.name: LocalStorage,
+}
+
+
+def register_storage(name: str, storage_class: Type[ObjectStorage]) -> None:
+    """設定値から選択できるストレージを登録する"""
+    _storages[name] = storage_class
+
+
+def create_storage(name: str, **kwargs) -> ObjectStorage:
+    """
+    名前を指定してストレージを生成する
+
+    Raises:
+        ValueError: 未登録のストレージ名が指定された場合
+    """
+    if name not in _storages:
+        raise ValueError(
+            f"Unknown storage: {name}. Must be one of: {', '.join(_storages)}")
+    return _storages[name](**kwargs)
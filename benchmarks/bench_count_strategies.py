@@ -0,0 +1,69 @@
+"""
+一覧の総件数（X-Total-Count）の求め方を比較するベンチマーク
+
+GET /properties/by-user/{user_id} と同じクエリで、1ページ分の取得と総件数の計算にかかる
+SQL文の数とレイテンシを方式（separate / window / cached）ごとに計測します。
+
+Usage:
+    python -m benchmarks.bench_count_strategies
+    python -m benchmarks.bench_count_strategies --database-url postgresql://localhost/ielove_bench
+"""
+from datetime import datetime, timedelta
+
+from benchmarks.common import (
+    build_parser,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    StatementRecorder,
+    measure,
+    print_table
+)
+from app.crud.counting import CountStrategy, count_cache
+from app.crud.property import property as property_crud
+
+
+def main() -> None:
+    parser = build_parser(__doc__)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user_id = seed_user(db).id
+    base = datetime(2024, 1, 1)
+    rows = [
+        {"user_id": user_id, "name": f"物件{i}", "prefecture": "東京都" if i % 2 else "大阪府",
+         "property_type": "HOUSE", "created_at": base + timedelta(minutes=i)}
+        for i in range(args.properties)
+    ]
+    for start in range(0, len(rows), 5000):
+        property_crud.create_many(db, rows=rows[start:start + 5000])
+    db.commit()
+
+    results = []
+    for strategy in CountStrategy:
+        def run():
+            db.expunge_all()
+            return property_crud.get_by_user_with_filters(
+                db, user_id, skip=args.skip, limit=args.limit,
+                filters={"prefecture": "東京都"}, count_strategy=strategy)
+
+        count_cache.clear()
+        run()  # ウォームアップ（cachedの場合はキャッシュが作成される）
+        with StatementRecorder(engine) as recorder:
+            _, total = run()
+        timings = measure(run, args.repeat)
+        results.append([strategy.value, recorder.statements, total,
+                        timings["median_ms"], timings["min_ms"]])
+
+    print(f"properties={args.properties} skip={args.skip} limit={args.limit} "
+          f"database={engine.dialect.name} repeat={args.repeat}")
+    print_table(["strategy", "statements", "total",
+                "median_ms", "min_ms"], results)
+
+
+if __name__ == "__main__":
+    main()
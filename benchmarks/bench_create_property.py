@@ -0,0 +1,92 @@
+"""
+物件作成時のデフォルト部屋・製品の作成方式を比較するベンチマーク
+
+- legacy: 部屋・製品を1件ずつCRUDBase.createで作成し、その都度commit/refreshする（従来の実装）
+- bulk: 部屋・製品をそれぞれ1回の複数行INSERT ... RETURNINGで作成し、最後に1回だけcommitする
+
+commitのコストを含めて計測するため、既定では一時ディレクトリ上のSQLiteファイルを使用します。
+
+Usage:
+    python -m benchmarks.bench_create_property
+    python -m benchmarks.bench_create_property --database-url postgresql://localhost/ielove_bench
+"""
+from benchmarks.common import (
+    build_parser,
+    temporary_sqlite_url,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    seed_categories,
+    StatementRecorder,
+    measure,
+    print_table
+)
+from app.crud.property import property as property_crud
+from app.crud.room import room as room_crud
+from app.crud.product import product as product_crud
+from app.models import ProductCategory
+from app.schemas import PropertySchema, RoomSchema, ProductSchema
+from app.services.property_service import (
+    property_service,
+    DEFAULT_ROOMS,
+    DEFAULT_ROOM_PRODUCT_CATEGORIES
+)
+
+
+def create_property_legacy(db, property_data: PropertySchema):
+    """従来の実装（1件ごとにcommit）"""
+    db_property = property_crud.create(db, obj_in=property_data)
+    category_dict = {cat.id: cat.name for cat in db.query(
+        ProductCategory).all()}
+    for room_name in DEFAULT_ROOMS:
+        db_room = room_crud.create(db, obj_in=RoomSchema(
+            name=room_name,
+            property_id=db_property.id,
+            description=f"{room_name}の説明"
+        ))
+        for category_id in DEFAULT_ROOM_PRODUCT_CATEGORIES.get(room_name, [1, 2, 3, 4, 5]):
+            if category_id in category_dict:
+                product_crud.create(db, obj_in=ProductSchema(
+                    name=category_dict[category_id],
+                    room_id=db_room.id,
+                    product_category_id=category_id,
+                    description=f"{category_dict[category_id]}の説明"
+                ))
+    return db_property
+
+
+def main() -> None:
+    parser = build_parser(
+        __doc__, default_database_url=temporary_sqlite_url("ielove_bench_create.db"))
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user = seed_user(db)
+    seed_categories(db)
+
+    def property_data() -> PropertySchema:
+        return PropertySchema(user_id=user.id, name="Bench Property",
+                              property_type="HOUSE", prefecture="東京都")
+
+    cases = {
+        "legacy": lambda: create_property_legacy(db, property_data()),
+        "bulk": lambda: property_service.create_property(db, property_data()),
+    }
+
+    rows = []
+    for name, run in cases.items():
+        run()  # ウォームアップ
+        with StatementRecorder(engine) as recorder:
+            run()
+        timings = measure(run, args.repeat)
+        rows.append([name, recorder.statements, timings["median_ms"],
+                    timings["min_ms"], timings["max_ms"]])
+
+    print(f"database={engine.dialect.name} repeat={args.repeat}")
+    print_table(["path", "statements", "median_ms",
+                "min_ms", "max_ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
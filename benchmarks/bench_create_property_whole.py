@@ -0,0 +1,145 @@
+"""
+物件全体の一括作成（/properties/whole）の書き込み方式を比較するベンチマーク
+
+- legacy: エンティティごとにCRUDBase.createを呼び出し、その都度commit/refreshする（従来の実装）
+- bulk: 階層・エンティティ種別ごとに1回の複数行INSERT ... RETURNINGで作成し、最後に1回だけcommitする
+
+合成した物件データを作成し、1秒あたりに作成できたエンティティ数を計測します。
+
+SQLiteは入力順を保証したINSERT ... RETURNINGの一括実行に対応していないため、
+bulkでも1行ずつINSERTが発行されます（commitは1回）。PostgreSQLでは階層・種別ごとに
+1回のINSERTにまとめられるため、--database-urlで本番と同じデータベースを指定してください。
+
+Usage:
+    python -m benchmarks.bench_create_property_whole
+    python -m benchmarks.bench_create_property_whole --rooms 20 --products-per-room 20
+"""
+from benchmarks.common import (
+    build_parser,
+    temporary_sqlite_url,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    StatementRecorder,
+    measure,
+    print_table
+)
+from app.crud.property import property as property_crud
+from app.crud.room import room as room_crud
+from app.crud.product import product as product_crud
+from app.crud.product_specification import product_specification as spec_crud
+from app.crud.product_dimension import product_dimension as dim_crud
+from app.crud.image import image as image_crud
+from app.schemas import (
+    PropertySchema,
+    PropertyWholeSchema,
+    RoomSchema,
+    ProductSchema,
+    ProductSpecificationSchema,
+    ProductDimensionSchema,
+    ImageSchema
+)
+from app.services.property_service import property_service
+
+
+def build_payload(user_id: int, rooms: int, products_per_room: int, children: int) -> PropertyWholeSchema:
+    """rooms部屋×products_per_room製品、各製品に仕様・寸法・画像をchildren件ずつ持つ物件データ"""
+    return PropertyWholeSchema.model_validate({
+        "user_id": user_id,
+        "name": "Bench Property",
+        "property_type": "HOUSE",
+        "prefecture": "東京都",
+        "images": [{"url": f"https://example.com/p/{i}.jpg"} for i in range(children)],
+        "rooms": [
+            {
+                "name": f"部屋{r}",
+                "images": [{"url": f"https://example.com/r/{r}/{i}.jpg"} for i in range(children)],
+                "products": [
+                    {
+                        "name": f"製品{r}-{p}",
+                        "specifications": [
+                            {"spec_type": f"仕様{i}", "spec_value": "値"} for i in range(children)],
+                        "dimensions": [
+                            {"dimension_type": f"寸法{i}", "value": 100.0, "unit": "mm"} for i in range(children)],
+                        "images": [
+                            {"url": f"https://example.com/pr/{r}/{p}/{i}.jpg"} for i in range(children)]
+                    }
+                    for p in range(products_per_room)
+                ]
+            }
+            for r in range(rooms)
+        ]
+    })
+
+
+def create_property_whole_legacy(db, property_data: PropertyWholeSchema) -> int:
+    """従来の実装（エンティティごとにcommit）"""
+    db_property = property_crud.create(db, obj_in=PropertySchema(
+        **property_data.model_dump(exclude={"rooms", "images"})))
+    for image in property_data.images:
+        image_crud.create(db, obj_in=ImageSchema(
+            **{**image.model_dump(), "property_id": db_property.id}))
+    for room in property_data.rooms:
+        db_room = room_crud.create(db, obj_in=RoomSchema(
+            **{**room.model_dump(exclude={"products", "images"}), "property_id": db_property.id}))
+        for image in room.images:
+            image_crud.create(db, obj_in=ImageSchema(
+                **{**image.model_dump(), "room_id": db_room.id}))
+        for product in room.products:
+            db_product = product_crud.create(db, obj_in=ProductSchema(
+                **{**product.model_dump(exclude={"specifications", "dimensions", "images"}),
+                   "room_id": db_room.id}))
+            for image in product.images:
+                image_crud.create(db, obj_in=ImageSchema(
+                    **{**image.model_dump(), "product_id": db_product.id}))
+            for spec in product.specifications:
+                spec_crud.create(db, obj_in=ProductSpecificationSchema(
+                    **{**spec.model_dump(), "product_id": db_product.id}))
+            for dim in product.dimensions:
+                dim_crud.create(db, obj_in=ProductDimensionSchema(
+                    **{**dim.model_dump(), "product_id": db_product.id}))
+    return db_property.id
+
+
+def main() -> None:
+    parser = build_parser(
+        __doc__, default_database_url=temporary_sqlite_url("ielove_bench_whole.db"))
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--products-per-room", type=int, default=10)
+    parser.add_argument("--children", type=int, default=2,
+                        help="各製品の仕様・寸法・画像の件数")
+    parser.set_defaults(repeat=5)
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user = seed_user(db)
+    payload = build_payload(user.id, args.rooms,
+                            args.products_per_room, args.children)
+    _, counts = property_service.write_property_tree(db, payload)
+    entities = sum(counts.values())
+
+    cases = {
+        "legacy": lambda: create_property_whole_legacy(db, payload),
+        "bulk": lambda: property_service.create_property_whole(db, payload),
+    }
+
+    rows = []
+    for name, run in cases.items():
+        with StatementRecorder(engine) as recorder:
+            run()
+        timings = measure(run, args.repeat)
+        rows.append([
+            name,
+            recorder.statements,
+            timings["median_ms"],
+            entities / (timings["median_ms"] / 1000),
+        ])
+
+    print(f"entities={entities} ({', '.join(f'{k}={v}' for k, v in counts.items())}) "
+          f"database={engine.dialect.name} repeat={args.repeat}")
+    print_table(["path", "statements", "median_ms", "entities_per_sec"], rows)
+
+
+if __name__ == "__main__":
+    main()
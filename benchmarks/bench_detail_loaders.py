@@ -0,0 +1,78 @@
+"""
+物件・部屋・製品詳細の読み込み方式（joined / selectin / subquery）を比較するベンチマーク
+
+20部屋×10製品（各製品に仕様3件・寸法3件）の合成物件を作成し、
+方式ごとにSQL文の数、データベースから返された行数、レイテンシを計測します。
+
+Usage:
+    python -m benchmarks.bench_detail_loaders
+    python -m benchmarks.bench_detail_loaders --database-url postgresql://localhost/ielove_bench
+"""
+from benchmarks.common import (
+    build_parser,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    seed_property,
+    StatementRecorder,
+    measure,
+    print_table
+)
+from app.crud.loading import LoaderStrategy
+from app.models import Room
+from app.services.property_service import property_service
+from app.services.room_service import room_service
+from app.services.product_service import product_service
+
+
+def main() -> None:
+    parser = build_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--products-per-room", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user = seed_user(db)
+    property_id = seed_property(
+        db, user, rooms=args.rooms, products_per_room=args.products_per_room)
+    room_id = db.query(Room.id).filter(
+        Room.property_id == property_id).first()[0]
+
+    cases = {
+        "property_details": lambda strategy: property_service.get_property_details(
+            db, property_id, loader_strategy=strategy),
+        "room_details": lambda strategy: room_service.get_room_details(
+            db, room_id, loader_strategy=strategy),
+        "products_by_property": lambda strategy: product_service.get_products_by_property(
+            db, property_id, loader_strategy=strategy),
+    }
+
+    rows = []
+    for name, run in cases.items():
+        for strategy in LoaderStrategy:
+            def call():
+                db.expunge_all()
+                run(strategy)
+
+            call()  # ウォームアップ
+            with StatementRecorder(engine) as recorder:
+                call()
+            timings = measure(call, args.repeat)
+            rows.append([
+                name,
+                strategy.value,
+                recorder.statements,
+                recorder.rows,
+                timings["median_ms"],
+                timings["min_ms"],
+            ])
+
+    print(f"rooms={args.rooms} products={args.rooms * args.products_per_room} "
+          f"database={engine.dialect.name}")
+    print_table(["case", "strategy", "statements", "rows",
+                "median_ms", "min_ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+物件ツリーの画像の取得方式を比較するベンチマーク
+
+大きな合成物件（既定: 50部屋×20製品、各製品に仕様3件、各エンティティに画像2枚）を作成し、
+以下の方式でSQL文の数とレイテンシを計測します。
+
+- per_entity: 物件・部屋・製品・製品仕様ごとにget_imagesを呼び出す（従来のクライアントの回避策）
+- subtree: include_children=Trueで下位階層の画像を1回のクエリで取得する
+- subtree_page: 所有者順で1ページ（--limit件）だけ取得する
+
+Usage:
+    python -m benchmarks.bench_image_subtree
+    python -m benchmarks.bench_image_subtree --rooms 100 --database-url postgresql://localhost/ielove_bench
+"""
+from benchmarks.common import (
+    build_parser,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    seed_property,
+    StatementRecorder,
+    measure,
+    print_table
+)
+from app.crud.image import image as image_crud
+from app.models import Image, Product, ProductSpecification, Room
+from app.schemas.image_schemas import ImageOrder
+from app.services.image_service import image_service
+
+
+def seed_spec_images(db, property_id: int, images_per_entity: int) -> None:
+    spec_ids = db.query(ProductSpecification.id)\
+        .join(Product, ProductSpecification.product_id == Product.id)\
+        .join(Room, Product.room_id == Room.id)\
+        .filter(Room.property_id == property_id)\
+        .all()
+    image_crud.create_many(db, rows=[
+        {"url": f"https://example.com/s/{spec_id}/{i}.jpg",
+         "product_specification_id": spec_id, "status": "completed"}
+        for (spec_id,) in spec_ids
+        for i in range(images_per_entity)
+    ])
+    db.commit()
+
+
+def main() -> None:
+    parser = build_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--products-per-room", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user = seed_user(db)
+    property_id = seed_property(
+        db, user, rooms=args.rooms, products_per_room=args.products_per_room)
+    seed_spec_images(db, property_id, images_per_entity=2)
+
+    room_ids = [room_id for (room_id,) in db.query(Room.id).filter(
+        Room.property_id == property_id)]
+    product_ids = [product_id for (product_id,) in db.query(Product.id).filter(
+        Product.room_id.in_(room_ids))]
+    spec_ids = [spec_id for (spec_id,) in db.query(ProductSpecification.id).filter(
+        ProductSpecification.product_id.in_(product_ids))]
+
+    def per_entity():
+        images = image_service.get_images(
+            db, property_id=property_id, include_children=False)
+        for room_id in room_ids:
+            images += image_service.get_images(
+                db, room_id=room_id, include_children=False)
+        for product_id in product_ids:
+            images += image_service.get_images(
+                db, product_id=product_id, include_children=False)
+        for spec_id in spec_ids:
+            images += image_service.get_images(
+                db, product_specification_id=spec_id, include_children=False)
+        return images
+
+    cases = {
+        "per_entity": per_entity,
+        "subtree": lambda: image_service.get_images(db, property_id=property_id),
+        "subtree_page": lambda: image_service.get_images(
+            db, property_id=property_id, order=ImageOrder.OWNER, limit=args.limit),
+    }
+
+    total = db.query(Image).count()
+    assert len(per_entity()) == len(cases["subtree"]()) == total
+
+    rows = []
+    for name, run in cases.items():
+        def call():
+            db.expunge_all()
+            return run()
+
+        call()  # ウォームアップ
+        with StatementRecorder(engine) as recorder:
+            images = call()
+        timings = measure(call, args.repeat)
+        rows.append([name, recorder.statements, len(images),
+                    timings["median_ms"], timings["min_ms"]])
+
+    print(f"rooms={len(room_ids)} products={len(product_ids)} specs={len(spec_ids)} "
+          f"images={total} database={engine.dialect.name}")
+    print_table(["case", "statements", "images",
+                "median_ms", "min_ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
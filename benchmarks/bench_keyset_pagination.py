@@ -0,0 +1,86 @@
+"""
+一覧のページネーション方式（OFFSET / キーセット）を比較するベンチマーク
+
+物件を大量に作成し、GET /properties と同じ並び順（購入件数・作成日時・IDの降順）で
+指定したページを取得するレイテンシを計測します。OFFSETはページが深くなるほど
+読み飛ばす行が増えますが、キーセットはカーソル以降の行をインデックスから直接読みます。
+
+Usage:
+    python -m benchmarks.bench_keyset_pagination
+    python -m benchmarks.bench_keyset_pagination --pages 1 100 1000 --database-url postgresql://localhost/ielove_bench
+"""
+from datetime import datetime, timedelta
+
+from benchmarks.common import (
+    build_parser,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    measure,
+    print_table
+)
+from app.crud.base import encode_cursor
+from app.crud.property import property as property_crud
+
+
+def seed_properties(db, user_id: int, count: int) -> None:
+    base = datetime(2024, 1, 1)
+    rows = [
+        {
+            "user_id": user_id,
+            "name": f"物件{i}",
+            "prefecture": "東京都",
+            "property_type": "HOUSE",
+            "purchase_count": i % 7,
+            "created_at": base + timedelta(minutes=i // 3)
+        }
+        for i in range(count)
+    ]
+    for start in range(0, count, 5000):
+        property_crud.create_many(db, rows=rows[start:start + 5000])
+    db.commit()
+
+
+def main() -> None:
+    parser = build_parser(__doc__)
+    parser.add_argument("--properties", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000])
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user = seed_user(db)
+    seed_properties(db, user.id, args.properties)
+
+    rows = []
+    for page in args.pages:
+        skip = (page - 1) * args.limit
+        cursor = None
+        if skip:
+            # 前のページの最後の物件からカーソルを作成する
+            last = property_crud.get_multi(db, skip=skip - 1, limit=1)[0]
+            cursor = encode_cursor(
+                [last.purchase_count, last.created_at, last.id])
+
+        def by_offset():
+            db.expunge_all()
+            return property_crud.get_multi(db, skip=skip, limit=args.limit)
+
+        def by_cursor():
+            db.expunge_all()
+            return property_crud.get_multi(db, limit=args.limit, cursor=cursor)
+
+        assert [p.id for p in by_offset()] == [p.id for p in by_cursor()]
+        offset_timings = measure(by_offset, args.repeat)
+        cursor_timings = measure(by_cursor, args.repeat)
+        rows.append([page, offset_timings["median_ms"],
+                    cursor_timings["median_ms"]])
+
+    print(f"properties={args.properties} limit={args.limit} "
+          f"database={engine.dialect.name} repeat={args.repeat}")
+    print_table(["page", "offset_median_ms", "cursor_median_ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+複数画像のアップロードURL発行を、1件ずつの呼び出しとまとめての呼び出しで比較するベンチマーク
+
+- single: POST /images/presigned-url 相当をN回呼び出す（1件ごとにINSERTとcommit）
+- batch: POST /images/presigned-urls 相当を1回呼び出す（1回の複数行INSERTとcommit）
+
+いずれも署名はローカルで計算されるため、S3への通信は発生しません。
+commitのコストを含めて計測するため、既定では一時ディレクトリ上のSQLiteファイルを使用します。
+
+Usage:
+    python -m benchmarks.bench_presigned_urls
+    python -m benchmarks.bench_presigned_urls --database-url postgresql://localhost/ielove_bench
+"""
+from benchmarks.common import (
+    build_parser,
+    temporary_sqlite_url,
+    create_bench_engine,
+    create_bench_session,
+    seed_user,
+    seed_property,
+    StatementRecorder,
+    measure,
+    print_table
+)
+from app.schemas.image_schemas import CreatePresignedUrlRequest, CreatePresignedUrlsRequest
+from app.services.image_service import image_service
+
+
+def main() -> None:
+    parser = build_parser(
+        __doc__, default_database_url=temporary_sqlite_url("ielove_bench_presigned.db"))
+    parser.add_argument("--images", type=int, default=50,
+                        help="1回のアップロードの画像枚数")
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.database_url)
+    db = create_bench_session(engine)
+    user = seed_user(db)
+    property_id = seed_property(db, user, rooms=1, products_per_room=1)
+
+    files = [
+        CreatePresignedUrlRequest(
+            file_name=f"photo_{i}.jpg",
+            content_type="image/jpeg",
+            property_id=property_id
+        )
+        for i in range(args.images)
+    ]
+
+    def single():
+        for file in files:
+            image_service.create_presigned_url(db, file)
+
+    def batch():
+        image_service.create_presigned_urls(
+            db, CreatePresignedUrlsRequest(files=files))
+
+    rows = []
+    for name, run in {"single": single, "batch": batch}.items():
+        run()  # ウォームアップ
+        with StatementRecorder(engine) as recorder:
+            run()
+        timings = measure(run, args.repeat)
+        rows.append([name, recorder.statements, timings["median_ms"],
+                    timings["min_ms"], timings["max_ms"]])
+
+    print(f"images={args.images} database={engine.dialect.name} repeat={args.repeat}")
+    print_table(["path", "statements", "median_ms",
+                "min_ms", "max_ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+ベンチマーク共通のユーティリティ
+
+アプリケーションの設定読み込みに必要な環境変数が未設定の場合はダミー値を設定するため、
+.envファイルがなくても実行できます。既定ではインメモリのSQLiteを使用し、
+--database-urlを指定するとPostgreSQLなど任意のデータベースで計測できます。
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ielove_bench.db')}")
+os.environ.setdefault("STRIPE_CONNECT_RETURN_URL", "http://localhost")
+os.environ.setdefault("STRIPE_CONNECT_REFRESH_URL", "http://localhost")
+os.environ.setdefault("BASE_URL", "http://localhost")
+# 署名付きURLの生成はローカルで計算されるため、ダミーの認証情報で計測できる
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("AWS_S3_BUCKET", "ielove-bench")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import (  # noqa: E402
+    User,
+    Property,
+    Room,
+    Product,
+    ProductCategory,
+    ProductSpecification,
+    ProductDimension,
+    Image
+)
+from app.enums import PropertyType  # noqa: E402
+
+
+def build_parser(description: str, default_database_url: str = "sqlite://") -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=description,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=default_database_url,
+                        help=f"計測に使用するデータベースURL（既定: {default_database_url}）")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="各ケースの計測回数")
+    return parser
+
+
+def temporary_sqlite_url(name: str) -> str:
+    """コミットのコストも計測できるよう、一時ディレクトリ上のSQLiteファイルのURLを返す"""
+    return f"sqlite:///{os.path.join(tempfile.gettempdir(), name)}"
+
+
+def create_bench_engine(database_url: str) -> Engine:
+    """計測用のエンジンを作成し、テーブルを作り直す"""
+    if database_url == "sqlite://":
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    elif database_url.startswith("sqlite"):
+        engine = create_engine(
+            database_url, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def create_bench_session(engine: Engine) -> Session:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def seed_user(db: Session) -> User:
+    user = User(
+        clerk_user_id=f"bench_{time.time_ns()}",
+        email=f"bench_{time.time_ns()}@example.com",
+        name="Bench User",
+        user_type="individual",
+        role="seller"
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def seed_categories(db: Session, count: int = 14) -> None:
+    """デフォルト部屋・製品の作成に必要な製品カテゴリを作成する"""
+    if db.query(ProductCategory).count():
+        return
+    db.add_all([
+        ProductCategory(id=i, name=f"カテゴリ{i}") for i in range(1, count + 1)
+    ])
+    db.commit()
+
+
+def seed_property(
+    db: Session,
+    user: User,
+    rooms: int = 20,
+    products_per_room: int = 10,
+    specs_per_product: int = 3,
+    dimensions_per_product: int = 3,
+    images_per_entity: int = 2
+) -> int:
+    """合成データの物件ツリーを作成し、物件IDを返す"""
+    db_property = Property(user_id=user.id, name="Bench Property",
+                           prefecture="東京都", property_type=PropertyType.HOUSE)
+    db.add(db_property)
+    db.flush()
+    for i in range(images_per_entity):
+        db.add(Image(url=f"https://example.com/p/{i}.jpg",
+               property_id=db_property.id, status="completed"))
+
+    for r in range(rooms):
+        room = Room(property_id=db_property.id, name=f"部屋{r}")
+        db.add(room)
+        db.flush()
+        for i in range(images_per_entity):
+            db.add(Image(url=f"https://example.com/r/{r}/{i}.jpg",
+                   room_id=room.id, status="completed"))
+        for p in range(products_per_room):
+            product = Product(room_id=room.id, name=f"製品{r}-{p}")
+            db.add(product)
+            db.flush()
+            db.add_all([
+                ProductSpecification(product_id=product.id,
+                                     spec_type=f"仕様{s}", spec_value="値")
+                for s in range(specs_per_product)
+            ])
+            db.add_all([
+                ProductDimension(product_id=product.id,
+                                 dimension_type=f"寸法{d}", value=100.0, unit="mm")
+                for d in range(dimensions_per_product)
+            ])
+            db.add_all([
+                Image(url=f"https://example.com/pr/{product.id}/{i}.jpg",
+                      product_id=product.id, status="completed")
+                for i in range(images_per_entity)
+            ])
+    db.commit()
+    return db_property.id
+
+
+class StatementRecorder:
+    """
+    実行されたSQL文の数と、各SELECTが返した行数を記録する
+
+    行数を数えるために同じ文を再実行するため、レイテンシの計測とは別に使用してください。
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements = 0
+        self.rows = 0
+
+    def _callback(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        if statement.lstrip().upper().startswith("SELECT"):
+            recount = conn.connection.dbapi_connection.cursor()
+            recount.execute(statement, parameters)
+            self.rows += len(recount.fetchall())
+            recount.close()
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._callback)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, "after_cursor_execute", self._callback)
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """fnを繰り返し実行し、レイテンシ（ミリ秒）の中央値・最小値・最大値を返す"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+    }
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    """計測結果を整形して表示する"""
+    def fmt(value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return str(value)
+
+    cells = [[fmt(value) for value in row] for row in rows]
+    widths = [
+        max(len(str(header)), *(len(row[i]) for row in cells))
+        for i, header in enumerate(headers)
+    ]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(value.ljust(w) for value, w in zip(row, widths)))
@@ -0,0 +1,187 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.orm import Session
+
+from app.enums import ImageType
+from app.models import Drawing, Image, Property, Room, User
+from app.services.signed_url_service import signed_url_service
+from app.services.tile_service import tile_service
+from app.utils.storage import ObjectStorage
+
+
+class FakeStorage(ObjectStorage):
+    def url(self, key: str) -> str:
+        return f"https://public.example.com/{key}"
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        return f"https://private.example.com/{key}?expires={expires_in}"
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch) -> FakeStorage:
+    storage = FakeStorage()
+    monkeypatch.setattr(signed_url_service, "_storage", storage)
+    monkeypatch.setattr(tile_service, "_storage", storage)
+    signed_url_service.cache.clear()
+    yield storage
+    signed_url_service.cache.clear()
+
+
+@pytest.fixture
+def images(db: Session, test_property: Property) -> dict:
+    room = Room(property_id=test_property.id, name="リビング")
+    db.add(room)
+    db.flush()
+
+    def image(key, image_type, **parent):
+        return Image(url=f"https://public.example.com/{key}", s3_key=key,
+                     image_type=image_type, status="completed", **parent)
+
+    images = {
+        "public": image("uploads/a/main.jpg", ImageType.MAIN, property_id=test_property.id),
+        "paid": image("uploads/b/paid.jpg", ImageType.PAID, property_id=test_property.id),
+        "room_paid": image("uploads/c/paid.jpg", ImageType.PAID, room_id=room.id),
+    }
+    images["room_paid"].variants = {"thumb": {
+        "width": 320, "height": 240, "webp": "https://public.example.com/uploads/c/paid.thumb.webp"}}
+    db.add_all(images.values())
+    db.commit()
+    return images
+
+
+def assert_hidden(image: dict) -> None:
+    assert (image["url"], image["s3_key"], image["variants"]) == (None, None, None)
+
+
+@pytest.mark.asyncio
+async def test_anonymous_image_list_hides_paid_images(
+    async_client: AsyncClient, test_property: Property, images: dict
+):
+    response = await async_client.get(
+        "/api/images", params={"property_id": test_property.id, "size": "thumb"})
+    assert response.status_code == 200
+    by_id = {image["id"]: image for image in response.json()}
+    assert by_id[images["public"].id]["url"] == "https://public.example.com/uploads/a/main.jpg"
+    assert_hidden(by_id[images["paid"].id])
+    assert_hidden(by_id[images["room_paid"].id])
+
+    response = await async_client.get(f"/api/images/{images['room_paid'].id}")
+    assert_hidden(response.json())
+
+    response = await async_client.get(
+        "/api/images/by-owner", params={"property_id": test_property.id})
+    grouped = [image for group in response.json() for image in group["images"]]
+    assert all(image["url"] is None for image in grouped
+               if image["image_type"] == ImageType.PAID.value)
+    assert "uploads/b/paid.jpg" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_owner_gets_signed_urls_for_paid_images(
+    async_client: AsyncClient, test_user: User, test_property: Property, images: dict
+):
+    response = await async_client.get(
+        "/api/images", params={"property_id": test_property.id, "size": "thumb"},
+        headers={"x-clerk-user-id": test_user.clerk_user_id})
+
+    by_id = {image["id"]: image for image in response.json()}
+    # sizeを指定した場合は、派生画像の署名付きURLを返す
+    assert by_id[images["room_paid"].id]["url"].startswith(
+        "https://private.example.com/uploads/c/paid.thumb.webp")
+    assert by_id[images["paid"].id]["url"].startswith(
+        "https://private.example.com/uploads/b/paid.jpg")
+
+
+@pytest.mark.asyncio
+async def test_image_updates_hide_paid_urls_from_anonymous_users(
+    async_client: AsyncClient, images: dict
+):
+    response = await async_client.patch(
+        f"/api/images/{images['public'].id}/type", json=ImageType.PAID.value)
+    assert response.status_code == 200
+    assert_hidden(response.json())
+
+    response = await async_client.patch(
+        f"/api/images/{images['room_paid'].id}/status", json={"status": "completed"})
+    assert_hidden(response.json())
+
+
+@pytest.fixture
+def drawing_images(db: Session, test_property: Property) -> dict:
+    drawing = Drawing(property_id=test_property.id, name="平面図")
+    db.add(drawing)
+    db.flush()
+    tiles = {"width": 600, "height": 300, "tile_size": 254, "overlap": 1, "format": "jpeg"}
+    images = {
+        image_type: Image(url=f"https://public.example.com/uploads/d/{image_type.value}.png",
+                          s3_key=f"uploads/d/{image_type.value}.png", drawing_id=drawing.id,
+                          image_type=image_type, status="completed", tiles=tiles)
+        for image_type in (ImageType.SUB, ImageType.PAID)
+    }
+    db.add_all(images.values())
+    db.commit()
+    return {"drawing": drawing, **images}
+
+
+@pytest.mark.asyncio
+async def test_drawing_tiles_hide_paid_images_from_anonymous_users(
+    async_client: AsyncClient, drawing_images: dict
+):
+    response = await async_client.get(
+        f"/api/drawings/{drawing_images['drawing'].id}/tiles")
+    assert response.status_code == 200
+    public, paid = response.json()
+
+    assert public["tiles_ready"] is True
+    assert public["descriptor_url"] == "https://public.example.com/uploads/d/SUB.dzi"
+    assert (paid["url"], paid["tiles_ready"], paid["descriptor_url"],
+            paid["tile_url_template"], paid["levels"]) == (None, False, None, None, [])
+    assert "uploads/d/PAID" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_drawing_tiles_are_returned_to_property_owner(
+    async_client: AsyncClient, test_user: User, drawing_images: dict
+):
+    response = await async_client.get(
+        f"/api/drawings/{drawing_images['drawing'].id}/tiles",
+        headers={"x-clerk-user-id": test_user.clerk_user_id})
+
+    public, paid = response.json()
+    assert paid["tiles_ready"] is True
+    assert paid["levels"][-1]["width"] == 600
+    # 有料画像は署名付きURLと、認証を確認してリダイレクトするタイルのエンドポイントを返す
+    assert paid["url"].startswith("https://private.example.com/uploads/d/PAID.png?")
+    assert paid["descriptor_url"].startswith("https://private.example.com/uploads/d/PAID.dzi?")
+    assert paid["tile_url_template"] == (
+        f"http://test/api/drawings/{drawing_images['drawing'].id}/tiles/"
+        f"{paid['image_id']}/{{level}}/{{column}}_{{row}}.jpg")
+    assert public["tile_url_template"] == \
+        "https://public.example.com/uploads/d/SUB_files/{level}/{column}_{row}.jpg"
+
+
+@pytest.mark.asyncio
+async def test_paid_drawing_tile_redirects_only_granted_users(
+    async_client: AsyncClient, db: Session, test_user: User, drawing_images: dict
+):
+    path = (f"/api/drawings/{drawing_images['drawing'].id}/tiles/"
+            f"{drawing_images[ImageType.PAID].id}/10/2_1.jpg")
+
+    response = await async_client.get(
+        path, headers={"x-clerk-user-id": test_user.clerk_user_id})
+    assert response.status_code == 307
+    assert response.headers["location"].startswith(
+        "https://private.example.com/uploads/d/PAID_files/10/2_1.jpg?")
+
+    response = await async_client.get(
+        path.replace("/2_1.jpg", "/3_0.jpg"),
+        headers={"x-clerk-user-id": test_user.clerk_user_id})
+    assert response.status_code == 404
+
+    other = User(clerk_user_id="other_clerk_user_id", email="other@example.com",
+                 name="Other User", user_type="individual", role="buyer", is_active=True)
+    db.add(other)
+    db.commit()
+    response = await async_client.get(
+        path, headers={"x-clerk-user-id": other.clerk_user_id})
+    assert response.status_code == 403
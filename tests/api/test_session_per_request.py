@@ -0,0 +1,54 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import Base, get_db
+from app.main import app
+from app.models import User, SellerProfile
+
+
+@pytest.fixture
+def pooled_engine(tmp_path, monkeypatch):
+    """
+    コネクションプールを使用するエンジンにSessionLocalを差し替える
+
+    依存関係の上書きは行わず、本番と同じget_dbでセッションを作成させる。
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(
+        autocommit=False, autoflush=False, bind=engine))
+    monkeypatch.delitem(app.dependency_overrides, get_db, raising=False)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_authenticated_request_checks_out_one_connection(
+    pooled_engine, async_client: AsyncClient
+):
+    """認証（get_current_user）とエンドポイントが1つのセッションを共有すること"""
+    db = database.SessionLocal()
+    user = User(clerk_user_id="pool_user", email="pool@example.com",
+                name="Pool User", user_type="individual", role="seller")
+    db.add(user)
+    db.flush()
+    db.add(SellerProfile(user_id=user.id, stripe_account_id="acct_pool"))
+    db.commit()
+    db.close()
+
+    checkouts = []
+    event.listen(pooled_engine, "checkout",
+                 lambda *args: checkouts.append(args))
+
+    response = await async_client.get(
+        "/api/users/me/seller", headers={"x-clerk-user-id": "pool_user"})
+
+    assert response.status_code == 200
+    assert response.json()["stripe_account_id"] == "acct_pool"
+    assert len(checkouts) == 1
@@ -0,0 +1,26 @@
+import pytest
+from httpx import AsyncClient
+
+from app.models import User
+
+
+@pytest.mark.asyncio
+async def test_event_stats_require_login(async_client: AsyncClient, test_user: User):
+    response = await async_client.get("/api/events/stats")
+    assert response.status_code in (401, 422)
+
+    response = await async_client.get(
+        "/api/events/stats", headers={"x-clerk-user-id": test_user.clerk_user_id})
+    assert response.status_code == 200
+    assert "subscriptions" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_require_login(async_client: AsyncClient, test_user: User):
+    response = await async_client.get("/api/cache/stats")
+    assert response.status_code in (401, 422)
+
+    response = await async_client.get(
+        "/api/cache/stats", headers={"x-clerk-user-id": test_user.clerk_user_id})
+    assert response.status_code == 200
+    assert "property_details" in response.json()
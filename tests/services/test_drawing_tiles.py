@@ -0,0 +1,103 @@
+import io
+
+import pytest
+from PIL import Image as PILImage
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.enums import ImageType
+from app.models import Drawing, Image, Property
+from app.services.derivative_service import DerivativeService
+from app.services.tile_service import TileService, render_tiles, tile_keys, tile_levels
+from app.utils.storage import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path) -> LocalStorage:
+    return LocalStorage(root=str(tmp_path), base_url="http://cdn.example.com")
+
+
+@pytest.fixture
+def drawing_image(db: Session, test_property: Property, storage: LocalStorage) -> Image:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (600, 300), (255, 255, 255)).save(buffer, "PNG")
+    storage.put("uploads/abc/plan.png", buffer.getvalue(), "image/png")
+
+    drawing = Drawing(property_id=test_property.id, name="平面図")
+    db.add(drawing)
+    db.flush()
+    image = Image(url=storage.url("uploads/abc/plan.png"), s3_key="uploads/abc/plan.png",
+                  drawing_id=drawing.id, image_type=ImageType.SUB, status="completed")
+    db.add(image)
+    db.commit()
+    return image
+
+
+@pytest.fixture
+def service(db: Session, storage: LocalStorage):
+    derivatives = DerivativeService(
+        session_factory=sessionmaker(bind=db.get_bind()), storage=storage, max_workers=1)
+    yield TileService(session_factory=sessionmaker(bind=db.get_bind()),
+                      derivatives=derivatives, tile_size=254, overlap=1)
+    derivatives.shutdown()
+
+
+def test_tile_levels_halve_down_to_one_pixel():
+    levels = tile_levels(600, 300, 254)
+
+    assert len(levels) == 11  # ceil(log2(600)) + 1
+    assert levels[0] == {"level": 0, "width": 1,
+                         "height": 1, "columns": 1, "rows": 1}
+    assert levels[-1] == {"level": 10, "width": 600,
+                          "height": 300, "columns": 3, "rows": 2}
+    assert (levels[9]["width"], levels[9]["height"]) == (300, 150)
+
+
+@pytest.mark.asyncio
+async def test_generate_stores_pyramid_and_descriptor(db: Session, drawing_image: Image,
+                                                      service: TileService, storage: LocalStorage):
+    tiles = service.generate(drawing_image.id)
+
+    assert tiles == {"width": 600, "height": 300,
+                     "tile_size": 254, "overlap": 1, "format": "jpeg"}
+    assert b'TileSize="254"' in storage.get("uploads/abc/plan.dzi")
+    # 端のタイルは隣接する側にだけ重なりを持つ
+    with PILImage.open(io.BytesIO(storage.get("uploads/abc/plan_files/10/0_0.jpg"))) as tile:
+        assert tile.size == (255, 255)
+    with PILImage.open(io.BytesIO(storage.get("uploads/abc/plan_files/10/2_1.jpg"))) as tile:
+        assert tile.size == (600 - 507, 300 - 253)
+
+    db.expire_all()
+    keys = tile_keys(drawing_image)
+    assert len(keys) == 1 + 6 + 2 + 9  # ディスクリプタ + レベル10, 9, 0〜8
+    assert all(storage.get(key) for key in keys)
+
+
+@pytest.mark.asyncio
+async def test_tile_sources_describe_grid(db: Session, drawing_image: Image, service: TileService):
+    assert service.get_tile_sources(db, drawing_image.drawing_id)[0]["tiles_ready"] is False
+
+    service.generate(drawing_image.id)
+    db.expire_all()
+    source = service.get_tile_sources(db, drawing_image.drawing_id)[0]
+
+    assert source["tiles_ready"] is True
+    assert source["descriptor_url"] == "http://cdn.example.com/uploads/abc/plan.dzi"
+    assert source["tile_url_template"] == \
+        "http://cdn.example.com/uploads/abc/plan_files/{level}/{column}_{row}.jpg"
+    assert source["levels"][-1]["columns"] == 3
+
+
+def test_render_tiles_keeps_pillow_pixel_limit_for_other_images():
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (600, 300), (255, 255, 255)).save(buffer, "PNG")
+    default = PILImage.MAX_IMAGE_PIXELS
+
+    width, height, _ = render_tiles(
+        buffer.getvalue(), 254, 1, "jpeg", 80, max_pixels=default * 4)
+    assert (width, height) == (600, 300)
+    # 派生画像の生成と共有するワーカーでは、既定の上限が維持される
+    assert PILImage.MAX_IMAGE_PIXELS == default
+
+    with pytest.raises(ValueError):
+        render_tiles(buffer.getvalue(), 254, 1, "jpeg", 80, max_pixels=100_000)
+    assert PILImage.MAX_IMAGE_PIXELS == default
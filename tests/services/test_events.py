@@ -0,0 +1,135 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.event_endpoints import format_event
+from app.enums import ImageType, ListingStatus, ListingType, TransactionStatus
+from app.events import publishers
+from app.events.backplanes import LocalBackplane
+from app.events.broker import EventBroker
+from app.models import Image, ListingItem, Property, Transaction, User
+from app.schemas.image_schemas import CompleteImagesRequest
+from app.services.image_service import image_service
+from app.services.stripe_service import stripe_service
+
+
+class RecordingBackplane(LocalBackplane):
+    """送信されたイベントを記録する"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def publish(self, message):
+        self.messages.append(message)
+        super().publish(message)
+
+
+@pytest.fixture
+def backplane() -> RecordingBackplane:
+    return RecordingBackplane()
+
+
+@pytest.fixture
+def broker(backplane: RecordingBackplane, monkeypatch) -> EventBroker:
+    broker = EventBroker(backplane=backplane, queue_size=2)
+    broker.start()
+    monkeypatch.setattr(publishers, "event_broker", broker)
+    return broker
+
+
+@pytest.mark.asyncio
+async def test_events_are_fanned_out_to_each_users_subscriptions(broker: EventBroker):
+    tabs = [broker.subscribe(1), broker.subscribe(1)]
+    other = broker.subscribe(2)
+
+    # ワーカースレッドからpublishしてもイベントループのキューに届く
+    thread = threading.Thread(
+        target=broker.publish, args=(1, "image.status", {"image_id": 10}))
+    thread.start()
+    thread.join()
+
+    for tab in tabs:
+        message = await tab.get(timeout=1)
+        assert (message["type"], message["data"]) == ("image.status", {"image_id": 10})
+    assert await other.get(timeout=0.01) is None
+
+    broker.unsubscribe(tabs[0])
+    broker.unsubscribe(tabs[1])
+    assert broker.get_stats()["subscriptions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_subscription_keeps_latest_events(broker: EventBroker):
+    subscription = broker.subscribe(1)
+    for number in range(3):
+        broker.publish(1, "import_job.status", {"number": number})
+    await asyncio.sleep(0)
+
+    assert [(await subscription.get(timeout=1))["data"]["number"]
+            for _ in range(2)] == [1, 2]
+    assert broker.get_stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_events_are_published_only_after_commit(
+    db: Session, broker: EventBroker, backplane: RecordingBackplane, test_property: Property
+):
+    db.add(Image(url="https://example.com/rollback.jpg", property_id=test_property.id))
+    db.flush()
+    broker.publish_on_commit(db, 1, "image.status", {"image_id": 1})
+    db.rollback()
+    broker.publish_on_commit(db, 1, "image.status", {"image_id": 2})
+    assert backplane.messages == []
+
+    db.commit()
+    assert [message["data"]["image_id"] for message in backplane.messages] == [2]
+
+
+@pytest.mark.asyncio
+async def test_completed_uploads_notify_property_owner(
+    db: Session, backplane: RecordingBackplane, broker: EventBroker,
+    test_user: User, test_property: Property
+):
+    images = [Image(url=f"https://example.com/{i}.jpg", property_id=test_property.id,
+                    image_type=ImageType.SUB) for i in range(2)]
+    db.add_all(images)
+    db.commit()
+
+    image_service.complete_uploads(
+        db, CompleteImagesRequest(image_ids=[image.id for image in images]), test_user.id)
+
+    assert [(message["user_id"], message["data"]["image_id"], message["data"]["status"])
+            for message in backplane.messages] == [
+        (test_user.id, images[0].id, "completed"),
+        (test_user.id, images[1].id, "completed")]
+    assert format_event(backplane.messages[0]).startswith(
+        "event: image.status\ndata: {")
+
+
+@pytest.mark.asyncio
+async def test_checkout_completion_notifies_buyer_once(
+    db: Session, backplane: RecordingBackplane, broker: EventBroker,
+    test_user: User, test_property: Property
+):
+    listing = ListingItem(seller_user_id=test_user.id, property_id=test_property.id,
+                          title="出品", price=1000, listing_type=ListingType.PROPERTY_SPECS,
+                          status=ListingStatus.PUBLISHED)
+    db.add(listing)
+    db.flush()
+    transaction = Transaction(buyer_user_id=test_user.id, seller_user_id=test_user.id,
+                              listing_id=listing.id, total_amount=1000, platform_fee=100,
+                              seller_amount=900, transaction_status=TransactionStatus.PENDING)
+    db.add(transaction)
+    db.commit()
+
+    session = {"id": "cs_test", "metadata": {"transaction_id": str(transaction.id)}}
+    await stripe_service.handle_checkout_completed(db, session)
+    # Webhookの再送では通知しない
+    await stripe_service.handle_checkout_completed(db, session)
+
+    assert [(message["type"], message["data"]["transaction_id"], message["data"]["role"])
+            for message in backplane.messages] == [
+        ("checkout.completed", transaction.id, "buyer")]
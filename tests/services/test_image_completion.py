@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache.property_details import property_detail_cache
+from app.enums import ImageType
+from app.models import Image, Property, Room, User
+from app.schemas.image_schemas import CompleteImagesRequest, ImageStatus
+from app.services.image_service import image_service
+from app.services.property_service import property_service
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    property_detail_cache.clear()
+    yield
+    property_detail_cache.clear()
+
+
+@pytest.fixture
+def images(db: Session, test_property: Property) -> list:
+    room = Room(property_id=test_property.id, name="リビング")
+    db.add(room)
+    db.flush()
+    images = [
+        Image(url="https://example.com/1.jpg", property_id=test_property.id,
+              image_type=ImageType.SUB),
+        Image(url="https://example.com/2.jpg", room_id=room.id,
+              image_type=ImageType.SUB),
+    ]
+    db.add_all(images)
+    db.commit()
+    return images
+
+
+@pytest.fixture
+def other_image(db: Session) -> Image:
+    user = User(clerk_user_id="completion_other", email="completion@example.com",
+                name="Other", user_type="individual")
+    db.add(user)
+    db.flush()
+    other = Property(user_id=user.id, name="Other",
+                     prefecture="Osaka", property_type="HOUSE")
+    db.add(other)
+    db.flush()
+    image = Image(url="https://example.com/other.jpg", property_id=other.id)
+    db.add(image)
+    db.commit()
+    return image
+
+
+@pytest.mark.asyncio
+async def test_completes_owned_images_in_one_update(
+    db: Session, test_user: User, images: list, other_image: Image, engine
+):
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE images"):
+            updates.append(statement)
+
+    ids = [image.id for image in images] + [other_image.id, 999999]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = image_service.complete_uploads(
+            db, CompleteImagesRequest(image_ids=ids), test_user.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert [image.id for image in result] == [image.id for image in images]
+    assert all(image.status == ImageStatus.COMPLETED for image in result)
+    assert len(updates) == 1
+
+    db.expire_all()
+    assert db.get(Image, other_image.id).status == "pending"
+    assert all(db.get(Image, image.id).status ==
+               "completed" for image in images)
+
+
+@pytest.mark.asyncio
+async def test_completion_invalidates_property_details(
+    db: Session, test_user: User, test_property: Property, images: list
+):
+    document = property_service.get_property_details_document(
+        db, test_property.id)
+    assert document["images"] == []
+
+    image_service.complete_uploads(
+        db, CompleteImagesRequest(image_ids=[images[0].id]), test_user.id)
+
+    document = property_service.get_property_details_document(
+        db, test_property.id)
+    assert [image["id"] for image in document["images"]] == [images[0].id]
@@ -0,0 +1,161 @@
+import boto3
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.enums import ImageType
+from app.models import Image, Property, StorageDeletion, StoredObject, User
+from app.schemas.image_schemas import (
+    CreatePresignedUrlRequest,
+    CreatePresignedUrlsRequest,
+    ImageStatus
+)
+from app.services import image_service as image_service_module
+from app.services.content_store_service import ContentStoreService, content_hash
+from app.services.derivative_service import DerivativeService
+from app.services.image_service import image_service
+from app.services.storage_cleanup_service import StorageCleanupService
+from app.services.tile_service import TileService
+from app.utils.storage import LocalStorage
+
+CONTENT = b"catalog photo"
+
+
+@pytest.fixture
+def storage(tmp_path) -> LocalStorage:
+    return LocalStorage(root=str(tmp_path), base_url="http://cdn.example.com")
+
+
+@pytest.fixture
+def service(db: Session, storage: LocalStorage, monkeypatch) -> ContentStoreService:
+    session_factory = sessionmaker(bind=db.get_bind())
+    derivatives = DerivativeService(
+        session_factory=session_factory, storage=storage, enabled=False)
+    service = ContentStoreService(
+        session_factory=session_factory,
+        derivatives=derivatives,
+        tiles=TileService(session_factory=session_factory,
+                          derivatives=derivatives, enabled=False),
+        cleanup=StorageCleanupService(bucket="test-bucket")
+    )
+    # バックグラウンドの処理はテストの中で直接呼び出す
+    monkeypatch.setattr(service, "submit", lambda image_ids: None)
+    monkeypatch.setattr(image_service_module, "content_store_service", service)
+    monkeypatch.setattr(image_service_module.settings,
+                        "AWS_S3_BUCKET", "test-bucket")
+    monkeypatch.setattr(image_service, "s3_client", boto3.client(
+        "s3", aws_access_key_id="test", aws_secret_access_key="test",
+        region_name="ap-northeast-1"))
+    return service
+
+
+def upload(db: Session, storage: LocalStorage, property_id: int, key: str, **columns) -> Image:
+    storage.put(key, CONTENT, "image/jpeg")
+    image = Image(url=storage.url(key), s3_key=key, property_id=property_id,
+                  image_type=ImageType.SUB, status="completed", **columns)
+    db.add(image)
+    db.commit()
+    return image
+
+
+def deleted_keys(db: Session) -> list:
+    return sorted(row.s3_key for row in db.query(StorageDeletion).all())
+
+
+@pytest.mark.asyncio
+async def test_duplicate_upload_is_repointed_to_existing_object(
+    db: Session, service: ContentStoreService, storage: LocalStorage, test_property: Property
+):
+    first = upload(db, storage, test_property.id, "uploads/a/photo.jpg",
+                   variants={"thumb": {"width": 320, "height": 240,
+                                       "webp": "http://cdn.example.com/uploads/a/photo.thumb.webp"}})
+    second = upload(db, storage, test_property.id, "uploads/b/copy.jpg")
+
+    assert service.deduplicate(first.id) == "uploads/a/photo.jpg"
+    assert service.deduplicate(second.id) == "uploads/a/photo.jpg"
+
+    db.expire_all()
+    assert (second.s3_key, second.url) == (first.s3_key, first.url)
+    # 既存のオブジェクトの派生画像を引き継ぎ、生成し直さない
+    assert second.variants == first.variants
+    assert second.content_hash == first.content_hash == content_hash(CONTENT)
+    stored = db.query(StoredObject).one()
+    assert (stored.s3_key, stored.ref_count) == ("uploads/a/photo.jpg", 2)
+    assert deleted_keys(db) == ["uploads/b/copy.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_known_hash_skips_upload(
+    db: Session, service: ContentStoreService, storage: LocalStorage,
+    test_user: User, test_property: Property
+):
+    existing = upload(db, storage, test_property.id, "uploads/a/photo.jpg")
+    service.deduplicate(existing.id)
+
+    responses = image_service.create_presigned_urls(db, CreatePresignedUrlsRequest(files=[
+        CreatePresignedUrlRequest(file_name="same.jpg", content_type="image/jpeg",
+                                  property_id=test_property.id, content_hash=content_hash(CONTENT)),
+        CreatePresignedUrlRequest(file_name="other.jpg", content_type="image/jpeg",
+                                  property_id=test_property.id, content_hash="0" * 64),
+    ]), test_user.id)
+
+    assert responses[0].duplicate and responses[0].upload_url is None
+    assert responses[0].image_metadata.status == ImageStatus.COMPLETED
+    assert not responses[1].duplicate and "Signature" in responses[1].upload_url
+
+    duplicate = db.get(Image, responses[0].image_id)
+    assert (duplicate.s3_key, duplicate.status) == (
+        "uploads/a/photo.jpg", "completed")
+    assert db.query(StoredObject).one().ref_count == 2
+    # クライアントが送ったハッシュは登録しない
+    assert db.get(Image, responses[1].image_id).content_hash is None
+
+
+@pytest.mark.asyncio
+async def test_known_hash_requires_owner_of_target(
+    db: Session, service: ContentStoreService, storage: LocalStorage, test_property: Property
+):
+    """他人の物件には、既存のオブジェクトを参照する画像も作成できないこと"""
+    existing = upload(db, storage, test_property.id, "uploads/a/photo.jpg")
+    service.deduplicate(existing.id)
+    other = User(clerk_user_id="other_clerk_user_id", email="other@example.com",
+                 name="Other User", user_type="individual", role="buyer", is_active=True)
+    db.add(other)
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        image_service.create_presigned_url(db, CreatePresignedUrlRequest(
+            file_name="same.jpg", content_type="image/jpeg", property_id=test_property.id,
+            image_type=ImageType.MAIN, content_hash=content_hash(CONTENT)), other.id)
+
+    assert exc_info.value.status_code == 403
+    assert db.query(Image).count() == 1
+    assert db.query(StoredObject).one().ref_count == 1
+    assert test_property.main_image_id is None
+
+
+@pytest.mark.asyncio
+async def test_shared_object_is_deleted_with_last_reference(
+    db: Session, service: ContentStoreService, storage: LocalStorage, test_property: Property
+):
+    images = [upload(db, storage, test_property.id, f"uploads/{i}/photo.jpg")
+              for i in range(3)]
+    for image in images:
+        service.deduplicate(image.id)
+    db.expire_all()
+    # 物件の一括作成などでs3_keyを共有しているだけの画像
+    legacy = [upload(db, storage, test_property.id, "uploads/legacy/photo.jpg")
+              for _ in range(2)]
+
+    image_service.delete_image(db, images[0].id)
+    image_service.delete_image(db, legacy[0].id)
+    assert deleted_keys(db) == ["uploads/1/photo.jpg", "uploads/2/photo.jpg"]
+    assert db.query(StoredObject).one().ref_count == 2
+
+    image_service.delete_image(db, images[1].id)
+    image_service.delete_image(db, images[2].id)
+    image_service.delete_image(db, legacy[1].id)
+    assert deleted_keys(db) == [
+        "uploads/0/photo.jpg", "uploads/1/photo.jpg", "uploads/2/photo.jpg",
+        "uploads/legacy/photo.jpg"]
+    assert db.query(StoredObject).count() == 0
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from PIL import Image as PILImage
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.enums import ImageType
+from app.models import Image, Property
+from app.services.derivative_service import (
+    DerivativeService,
+    ImageFormat,
+    ImageSize,
+    variant_key,
+    variant_keys,
+    variant_url
+)
+from app.utils.storage import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path) -> LocalStorage:
+    return LocalStorage(root=str(tmp_path), base_url="http://cdn.example.com")
+
+
+@pytest.fixture
+def uploaded_image(db: Session, test_property: Property, storage: LocalStorage) -> Image:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (1200, 900), (200, 120, 40)).save(buffer, "JPEG")
+    storage.put("uploads/abc/photo.jpg", buffer.getvalue(), "image/jpeg")
+
+    image = Image(url=storage.url("uploads/abc/photo.jpg"), s3_key="uploads/abc/photo.jpg",
+                  property_id=test_property.id, image_type=ImageType.SUB, status="completed")
+    db.add(image)
+    db.commit()
+    return image
+
+
+@pytest.fixture
+def service(db: Session, storage: LocalStorage):
+    service = DerivativeService(
+        session_factory=sessionmaker(bind=db.get_bind()), storage=storage, max_workers=1)
+    yield service
+    service.shutdown()
+
+
+def test_variant_key_is_next_to_original():
+    assert variant_key("uploads/abc/photo.jpg", ImageSize.THUMB, ImageFormat.WEBP) == \
+        "uploads/abc/photo.thumb.webp"
+    assert variant_key("uploads/abc/photo.png", ImageSize.CARD, ImageFormat.JPEG) == \
+        "uploads/abc/photo.card.jpg"
+
+
+@pytest.mark.asyncio
+async def test_generate_stores_resized_variants(db: Session, uploaded_image: Image,
+                                                service: DerivativeService, storage: LocalStorage):
+    variants = service.generate(uploaded_image.id)
+
+    assert (variants["thumb"]["width"], variants["thumb"]["height"]) == (320, 240)
+    assert (variants["card"]["width"], variants["card"]["height"]) == (800, 600)
+    # 元画像より大きくはしない
+    assert (variants["full"]["width"], variants["full"]["height"]) == (1200, 900)
+    assert variants["thumb"]["webp"] == "http://cdn.example.com/uploads/abc/photo.thumb.webp"
+
+    with PILImage.open(io.BytesIO(storage.get("uploads/abc/photo.thumb.webp"))) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (320, 240)
+
+    db.expire_all()
+    assert uploaded_image.variants == variants
+    assert len(variant_keys(uploaded_image)) == 6
+    # 生成済みの画像は再生成しない
+    assert service.generate(uploaded_image.id) is None
+
+
+@pytest.mark.asyncio
+async def test_variant_url_falls_back_to_original(uploaded_image: Image):
+    assert variant_url(uploaded_image, ImageSize.THUMB) == uploaded_image.url
+
+    uploaded_image.variants = {"thumb": {"width": 320, "height": 240,
+                                         "jpeg": "http://cdn.example.com/t.jpg"}}
+    assert variant_url(uploaded_image, ImageSize.THUMB) == "http://cdn.example.com/t.jpg"
+    assert variant_url(uploaded_image, None) == uploaded_image.url
@@ -0,0 +1,157 @@
+import json
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud.image import image as image_crud
+from app.enums import ImageType
+from app.schemas.image_schemas import ImageOrder
+from app.models import (
+    Drawing, Image, Product, ProductSpecification, Property, Room
+)
+from app.services.image_service import image_service
+from app.services.product_service import product_service
+from app.services.property_service import property_service
+from app.services.room_service import room_service
+
+
+@pytest.fixture
+def tree(db: Session, test_property: Property) -> dict:
+    """実行計画を確認するため、複数の物件・部屋・製品に画像を登録する"""
+    rooms = [Room(property_id=test_property.id, name=f"部屋{i}")
+             for i in range(3)]
+    db.add_all(rooms)
+    db.flush()
+    products = [Product(room_id=room.id, name=f"製品{i}")
+                for i, room in enumerate(rooms)]
+    db.add_all(products)
+    db.flush()
+    spec = ProductSpecification(
+        product_id=products[0].id, spec_type="色", spec_value="白")
+    drawing = Drawing(property_id=test_property.id, name="平面図")
+    db.add_all([spec, drawing])
+    db.flush()
+
+    parents = [
+        {"property_id": test_property.id},
+        *({"room_id": room.id} for room in rooms),
+        *({"product_id": product.id} for product in products),
+        {"product_specification_id": spec.id},
+        {"drawing_id": drawing.id},
+    ]
+    db.add_all([
+        Image(url=f"https://example.com/{i}.jpg", image_type=ImageType.SUB,
+              status="completed" if i % 4 else "pending", **parents[i % len(parents)])
+        for i in range(400)
+    ])
+    db.commit()
+    return {"property": test_property, "rooms": rooms, "products": products,
+            "spec": spec, "drawing": drawing}
+
+
+@contextmanager
+def captured_statements(engine) -> Iterator[List[Tuple[str, tuple]]]:
+    statements: List[Tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "images" in statement and not statement.startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def images_full_scans(db: Session, statement: str, parameters) -> List[str]:
+    """文の実行計画のうち、imagesテーブルを全件走査する箇所を返す"""
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        # 小さなテーブルではインデックスがあってもSeq Scanが選ばれるため、
+        # 使用できるインデックスがない場合にのみSeq Scanになるようにする
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        nodes, scans = [plan[0]["Plan"]], []
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "images":
+                scans.append(json.dumps(node))
+        return scans
+
+    rows = connection.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows if row[-1].startswith("SCAN images")]
+
+
+def assert_no_full_scan(db: Session, statements: List[Tuple[str, tuple]]) -> None:
+    assert statements, "imagesへのクエリが実行されていません"
+    for statement, parameters in statements:
+        scans = images_full_scans(db, statement, parameters)
+        assert not scans, f"{statement}\n-> {scans}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parent", ["property", "room", "product", "spec", "drawing"])
+async def test_get_images_uses_index(db: Session, engine, tree: dict, parent: str):
+    kwargs = {
+        "property": {"property_id": tree["property"].id},
+        "room": {"room_id": tree["rooms"][0].id},
+        "product": {"product_id": tree["products"][0].id},
+        "spec": {"product_specification_id": tree["spec"].id},
+        "drawing": {"drawing_id": tree["drawing"].id},
+    }[parent]
+
+    with captured_statements(engine) as statements:
+        assert image_crud.get_images(db, **kwargs)
+
+    assert_no_full_scan(db, statements)
+
+
+@pytest.mark.asyncio
+async def test_detail_services_use_index(db: Session, engine, tree: dict):
+    with captured_statements(engine) as statements:
+        property_service.get_property_details(db, tree["property"].id)
+        room_service.get_room_details(db, tree["rooms"][0].id)
+        product_service.get_product_details(db, tree["products"][0].id)
+
+    assert_no_full_scan(db, statements)
+
+
+@pytest.mark.asyncio
+async def test_set_as_main_image_uses_index(db: Session, engine, tree: dict):
+    room_image = image_crud.get_images(db, room_id=tree["rooms"][1].id)[0]
+    spec_image = image_crud.get_images(
+        db, product_specification_id=tree["spec"].id)[0]
+
+    with captured_statements(engine) as statements:
+        image_service.set_as_main_image(
+            db, room_image.id, room_id=tree["rooms"][1].id)
+        image_service.set_as_main_image(
+            db, spec_image.id, product_specification_id=tree["spec"].id)
+        image_service.update_image_type(db, room_image.id, ImageType.SUB)
+
+    assert_no_full_scan(db, statements)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parent", ["property", "room", "product"])
+async def test_subtree_images_use_index(db: Session, engine, tree: dict, parent: str):
+    kwargs = {
+        "property": {"property_id": tree["property"].id},
+        "room": {"room_id": tree["rooms"][0].id},
+        "product": {"product_id": tree["products"][0].id},
+    }[parent]
+
+    with captured_statements(engine) as statements:
+        for order in ImageOrder:
+            assert image_crud.get_subtree_images(
+                db, order=order, limit=20, **kwargs)
+
+    assert_no_full_scan(db, statements)
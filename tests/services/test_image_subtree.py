@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud.image import image as image_crud
+from app.enums import ImageType
+from app.models import Image, Product, ProductSpecification, Property, Room, User
+from app.schemas.image_schemas import ImageOrder, ImageOwnerType
+from app.services.image_service import image_service
+
+
+@pytest.fixture
+def tree(db: Session, test_property: Property) -> dict:
+    rooms = [Room(property_id=test_property.id, name=f"部屋{i}")
+             for i in range(2)]
+    deleted_room = Room(property_id=test_property.id,
+                        name="削除済み", is_deleted=True)
+    db.add_all([*rooms, deleted_room])
+    db.flush()
+    product = Product(room_id=rooms[0].id, name="キッチン")
+    db.add(product)
+    db.flush()
+    spec = ProductSpecification(
+        product_id=product.id, spec_type="色", spec_value="白")
+    db.add(spec)
+    db.flush()
+
+    def image(name, status="completed", **parent):
+        return Image(url=f"https://example.com/{name}.jpg", image_type=ImageType.SUB,
+                     status=status, **parent)
+
+    # 所有者順と異なる順番で作成する
+    images = {
+        "spec": image("spec", product_specification_id=spec.id),
+        "room1": image("room1", room_id=rooms[1].id),
+        "property": image("property", property_id=test_property.id),
+        "product": image("product", product_id=product.id),
+        "room0": image("room0", room_id=rooms[0].id),
+        "pending": image("pending", status="pending", room_id=rooms[0].id),
+        "deleted": image("deleted", room_id=deleted_room.id),
+    }
+    db.add_all(images.values())
+    db.commit()
+    return {"property": test_property, "rooms": rooms, "product": product,
+            "spec": spec, "images": images}
+
+
+def names(tree: dict, images) -> list:
+    by_id = {image.id: name for name, image in tree["images"].items()}
+    return [by_id[image.id] for image in images]
+
+
+@pytest.mark.asyncio
+async def test_property_includes_whole_subtree_in_one_query(db: Session, engine, tree: dict):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        images = image_service.get_images(
+            db, property_id=tree["property"].id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert names(tree, images) == [
+        "spec", "room1", "property", "product", "room0"]
+
+
+@pytest.mark.asyncio
+async def test_room_and_product_subtrees(db: Session, tree: dict):
+    assert names(tree, image_service.get_images(db, room_id=tree["rooms"][0].id)) == [
+        "spec", "product", "room0"]
+    assert names(tree, image_service.get_images(db, product_id=tree["product"].id)) == [
+        "spec", "product"]
+    assert names(tree, image_service.get_images(
+        db, room_id=tree["rooms"][0].id, include_children=False)) == ["room0"]
+
+
+@pytest.mark.asyncio
+async def test_owner_order_paginates_with_stable_cursor(db: Session, tree: dict):
+    expected = ["property", "room0", "room1", "product", "spec"]
+    assert names(tree, image_crud.get_subtree_images(
+        db, property_id=tree["property"].id, order=ImageOrder.OWNER)) == expected
+
+    collected, cursor = [], None
+    while True:
+        page = image_crud.get_subtree_images(
+            db, property_id=tree["property"].id, order=ImageOrder.OWNER,
+            limit=2, cursor=cursor)
+        collected.extend(page)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    assert names(tree, collected) == expected
+
+
+@pytest.mark.asyncio
+async def test_group_by_owner(db: Session, tree: dict):
+    groups, next_cursor = image_service.get_images_by_owner(
+        db, property_id=tree["property"].id, limit=3)
+
+    assert [(group.owner_type, group.owner_id) for group in groups] == [
+        (ImageOwnerType.PROPERTY, tree["property"].id),
+        (ImageOwnerType.ROOM, tree["rooms"][0].id),
+        (ImageOwnerType.ROOM, tree["rooms"][1].id),
+    ]
+    assert next_cursor
+
+    groups, next_cursor = image_service.get_images_by_owner(
+        db, property_id=tree["property"].id, limit=3, cursor=next_cursor)
+    assert [(group.owner_type, len(group.images)) for group in groups] == [
+        (ImageOwnerType.PRODUCT, 1), (ImageOwnerType.PRODUCT_SPECIFICATION, 1)]
+    assert next_cursor is None
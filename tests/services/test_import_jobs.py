@@ -0,0 +1,177 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.enums import ImportJobStatus
+from app.models import User, ImportJob, Property, Room
+from app.schemas import PropertyWholeSchema
+from app.services.import_job_service import ImportJobService
+from app.services.property_service import property_service
+
+
+@pytest.fixture
+def session_factory():
+    """ワーカースレッドからも使用するため、テスト用のdbとは別のデータベースを使用する"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def user_id(session_factory) -> int:
+    db = session_factory()
+    user = User(clerk_user_id="import_job_user", email="import@example.com",
+                name="Import User", user_type="individual", role="seller")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def payload(room_names) -> PropertyWholeSchema:
+    return PropertyWholeSchema.model_validate({
+        "name": "ジョブ物件",
+        "property_type": "HOUSE",
+        "prefecture": "東京都",
+        "rooms": [{"name": name} for name in room_names]
+    })
+
+
+def test_job_runs_in_background(session_factory, user_id):
+    """ジョブが実行され、作成件数と物件IDが記録されること"""
+    service = ImportJobService(session_factory=session_factory, max_workers=1)
+    db = session_factory()
+    job = service.submit(db, user_id, payload(["リビング", "寝室"]))
+    assert job.status == ImportJobStatus.PENDING
+    service.shutdown(wait=True)
+
+    db.expire_all()
+    job = service.get_job(db, job.id, user_id)
+    assert job.status == ImportJobStatus.SUCCEEDED
+    assert job.counts["rooms"] == 2
+    assert db.query(Room).filter(Room.property_id ==
+                                 job.property_id).count() == 2
+    assert job.started_at is not None and job.finished_at is not None
+    db.close()
+
+
+def test_failed_job_records_error(session_factory, user_id):
+    """作成に失敗したジョブはFAILEDとなり、エラー内容が記録されること"""
+    service = ImportJobService(session_factory=session_factory, max_workers=1)
+    db = session_factory()
+    data = payload(["リビング"])
+    data.images = [{"description": "URLなし"}]
+    job = service.submit(db, user_id, data)
+    service.shutdown(wait=True)
+
+    db.expire_all()
+    job = service.get_job(db, job.id, user_id)
+    assert job.status == ImportJobStatus.FAILED
+    assert job.error
+    assert job.property_id is None
+    db.close()
+
+
+class Crash(BaseException):
+    """プロセスの強制終了の代わりに送出する（ジョブのエラー処理では捕捉されない）"""
+
+
+def test_job_interrupted_after_writing_tree_is_rerun_once(session_factory, user_id, monkeypatch):
+    """物件の作成後、ジョブの完了を記録する前に中断されても、再実行で物件が重複しないこと"""
+    service = ImportJobService(session_factory=session_factory, max_workers=1)
+    db = session_factory()
+    data = payload(["リビング"])
+    data.user_id = user_id
+    job = ImportJob(user_id=user_id, status=ImportJobStatus.PENDING,
+                    payload=data.model_dump(mode="json"))
+    db.add(job)
+    db.commit()
+
+    write_property_tree = property_service.write_property_tree
+
+    def crash_after_write(*args, **kwargs):
+        write_property_tree(*args, **kwargs)
+        raise Crash()
+
+    monkeypatch.setattr(property_service, "write_property_tree", crash_after_write)
+    with pytest.raises(Crash):
+        service.run(job.id)
+    monkeypatch.undo()
+
+    db.expire_all()
+    assert job.status == ImportJobStatus.RUNNING
+    assert db.query(Property).count() == 0
+
+    assert service.resume_unfinished_jobs() == [job.id]
+    service.shutdown(wait=True)
+
+    db.expire_all()
+    assert job.status == ImportJobStatus.SUCCEEDED
+    assert db.query(Property).count() == 1
+    db.close()
+
+
+def test_job_is_claimed_by_one_worker(session_factory, user_id):
+    """同じ状態のジョブを読み込んだワーカーのうち、1つだけがジョブを取得・完了できること"""
+    service = ImportJobService(session_factory=session_factory, max_workers=1)
+    db = session_factory()
+    job = ImportJob(user_id=user_id, status=ImportJobStatus.PENDING, payload={})
+    db.add(job)
+    db.commit()
+    workers = [session_factory() for _ in range(2)]
+    jobs = [worker.get(ImportJob, job.id) for worker in workers]
+
+    assert service._claim(workers[0], jobs[0]) == 1
+    workers[0].commit()
+    assert service._claim(workers[1], jobs[1]) is None
+    workers[1].rollback()
+
+    # 中断されたとみなして再取得された場合、元のワーカーは完了を記録できない
+    assert service._claim(workers[1], jobs[1]) == 2
+    workers[1].commit()
+    assert not service._finish(
+        workers[0], jobs[0], 1, status=ImportJobStatus.SUCCEEDED)
+    workers[0].rollback()
+
+    service.run(job.id)
+    db.expire_all()
+    assert (job.status, job.attempts) == (ImportJobStatus.FAILED, 3)
+    for worker in [db, *workers]:
+        worker.close()
+
+
+def test_job_is_visible_only_to_owner(session_factory, user_id):
+    service = ImportJobService(session_factory=session_factory, max_workers=1)
+    db = session_factory()
+    job = service.submit(db, user_id, payload([]))
+    service.shutdown(wait=True)
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_job(db, job.id, user_id + 1)
+    assert exc_info.value.status_code == 403
+    db.close()
+
+
+def test_submit_rejects_when_queue_is_full(session_factory, user_id):
+    """未完了のジョブが上限に達している場合は503を返すこと"""
+    service = ImportJobService(
+        session_factory=session_factory, max_workers=1, max_pending=1)
+    db = session_factory()
+    db.add(ImportJob(user_id=user_id,
+           status=ImportJobStatus.RUNNING, payload={}))
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.submit(db, user_id, payload([]))
+    assert exc_info.value.status_code == 503
+    service.shutdown(wait=True)
+    db.close()
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.crud.base import encode_cursor, decode_cursor
+from app.crud.counting import CountStrategy, count_cache
+from app.crud.property import property as property_crud
+from app.crud.room import room as room_crud
+from app.models import User, Property, Room
+
+
+@pytest.fixture
+def properties(db: Session, test_user: User):
+    """作成日時が重複する物件を含む一覧"""
+    base = datetime(2025, 1, 1)
+    items = [
+        Property(user_id=test_user.id, name=f"物件{i}", prefecture="東京都",
+                 property_type="HOUSE", created_at=base + timedelta(days=i // 2),
+                 purchase_count=3 if i == 4 else 0)
+        for i in range(7)
+    ]
+    db.add_all(items)
+    db.commit()
+    return items
+
+
+def collect_pages(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        pages.append([item.id for item in page])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_match_offset_pages(db: Session, properties):
+    """カーソルで取得したページがOFFSETで取得したページと一致すること"""
+    pages = collect_pages(
+        lambda **kwargs: property_crud.get_multi(db, **kwargs), limit=2)
+
+    assert len(pages) == 4
+    for number, page in enumerate(pages):
+        assert page == [p.id for p in property_crud.get_multi(
+            db, skip=number * 2, limit=2)]
+    assert pages[0][0] == properties[4].id
+
+
+@pytest.mark.asyncio
+async def test_ascending_cursor(db: Session, test_property: Property):
+    rooms = [Room(property_id=test_property.id, name=f"部屋{i}")
+             for i in range(5)]
+    db.add_all(rooms)
+    db.commit()
+
+    pages = collect_pages(lambda **kwargs: room_crud.get_multi_by_property(
+        db, property_id=test_property.id, **kwargs), limit=2)
+    assert pages == [[rooms[0].id, rooms[1].id],
+                     [rooms[2].id, rooms[3].id], [rooms[4].id]]
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 1, 2, 3, 4, 5, 678901)
+    cursor = encode_cursor([2, created_at, 10])
+    assert decode_cursor(cursor, (Property.purchase_count, Property.created_at, Property.id)) == [
+        2, created_at, 10]
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor", (Property.id,))
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy", list(CountStrategy))
+async def test_count_strategies_return_total(db: Session, test_user: User, properties, strategy):
+    """いずれの方式でも、ページ位置に関係なく総件数が返されること"""
+    count_cache.clear()
+    first, total = property_crud.get_by_user_with_filters(
+        db, test_user.id, limit=3, count_strategy=strategy)
+    assert total == 7
+
+    _, total = property_crud.get_by_user_with_filters(
+        db, test_user.id, limit=3, cursor=first.next_cursor, count_strategy=strategy)
+    assert total == 7
+
+    _, total = property_crud.get_by_user_with_filters(
+        db, test_user.id, skip=10, limit=3, count_strategy=strategy)
+    assert total == 7
+
+
+@pytest.mark.asyncio
+async def test_cached_count_is_keyed_by_filters(db: Session, test_user: User, properties):
+    count_cache.clear()
+    _, total = property_crud.get_by_user_with_filters(
+        db, test_user.id, filters={"prefecture": "東京都"}, count_strategy=CountStrategy.CACHED)
+    assert total == 7
+    _, total = property_crud.get_by_user_with_filters(
+        db, test_user.id, filters={"prefecture": "大阪府"}, count_strategy=CountStrategy.CACHED)
+    assert total == 0
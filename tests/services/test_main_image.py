@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache.property_details import property_detail_cache
+from app.crud.image import image as image_crud
+from app.enums import ImageType
+from app.models import Image, Property, Room, User
+from app.schemas import PropertySchema
+from app.schemas.image_schemas import CompleteImagesRequest
+from app.services.image_service import image_service
+from app.services.property_service import property_service
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    property_detail_cache.clear()
+    yield
+    property_detail_cache.clear()
+
+
+@pytest.fixture
+def images(db: Session, test_property: Property) -> list:
+    images = [
+        Image(url=f"https://example.com/{i}.jpg", property_id=test_property.id,
+              image_type=ImageType.SUB, status="completed")
+        for i in range(3)
+    ]
+    db.add_all(images)
+    db.commit()
+    return images
+
+
+@pytest.mark.asyncio
+async def test_set_as_main_moves_pointer_without_scanning_images(
+    db: Session, test_property: Property, images: list, engine
+):
+    image_service.set_as_main_image(
+        db, images[0].id, property_id=test_property.id)
+    assert test_property.main_image_id == images[0].id
+
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "image_type" in statement.split("FROM")[1]:
+            selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        image_service.set_as_main_image(
+            db, images[1].id, property_id=test_property.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert selects == []
+    db.expire_all()
+    assert (test_property.main_image_id, test_property.main_image_url) == \
+        (images[1].id, images[1].url)
+    assert [image.image_type for image in images] == [
+        ImageType.SUB, ImageType.MAIN, ImageType.SUB]
+
+
+@pytest.mark.asyncio
+async def test_type_change_and_delete_keep_pointer_consistent(
+    db: Session, test_property: Property, images: list
+):
+    image_service.update_image_type(db, images[0].id, ImageType.MAIN)
+    image_service.update_image_type(db, images[2].id, ImageType.MAIN)
+    db.expire_all()
+    assert test_property.main_image_id == images[2].id
+
+    # メイン画像を削除すると、残っているMAIN画像に付け替える
+    image_service.delete_image(db, images[2].id)
+    db.expire_all()
+    assert test_property.main_image_id == images[0].id
+
+    image_service.update_image_type(db, images[0].id, ImageType.SUB)
+    db.expire_all()
+    assert (test_property.main_image_id, test_property.main_image_url) == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_pending_main_image_becomes_cover_on_completion(
+    db: Session, test_user: User, test_property: Property
+):
+    room = Room(property_id=test_property.id, name="リビング")
+    db.add(room)
+    db.flush()
+    image = Image(url="https://example.com/room.jpg", room_id=room.id,
+                  image_type=ImageType.MAIN, status="pending")
+    db.add(image)
+    db.commit()
+    assert room.main_image_id is None
+
+    image_service.complete_uploads(
+        db, CompleteImagesRequest(image_ids=[image.id]), test_user.id)
+    db.expire_all()
+    assert (room.main_image_id, room.main_image_url) == (image.id, image.url)
+
+
+@pytest.mark.asyncio
+async def test_set_as_main_demotes_pending_main_image(
+    db: Session, test_user: User, test_property: Property, images: list
+):
+    pending = Image(url="https://example.com/pending.jpg", property_id=test_property.id,
+                    image_type=ImageType.MAIN, status="pending")
+    db.add(pending)
+    db.commit()
+    image_service.set_as_main_image(
+        db, images[0].id, property_id=test_property.id)
+
+    # アップロード中のMAIN画像はmain_image_idに含まれないが、サブに変更される
+    db.expire_all()
+    assert pending.image_type == ImageType.SUB
+
+    # 後からアップロードが完了しても、選択したメイン画像は置き換えられない
+    image_service.complete_uploads(
+        db, CompleteImagesRequest(image_ids=[pending.id]), test_user.id)
+    db.expire_all()
+    assert test_property.main_image_id == images[0].id
+    assert [image.image_type for image in images] == [
+        ImageType.MAIN, ImageType.SUB, ImageType.SUB]
+
+
+@pytest.mark.asyncio
+async def test_refresh_all_backfills_pointers(db: Session, test_property: Property, images: list):
+    images[1].image_type = ImageType.MAIN
+    db.commit()
+    assert test_property.main_image_id is None
+
+    image_crud.refresh_main_images(db, Property)
+    db.commit()
+    db.expire_all()
+    assert test_property.main_image_id == images[1].id
+
+
+@pytest.mark.asyncio
+async def test_property_input_cannot_set_main_image(
+    db: Session, test_user: User, test_property: Property, images: list
+):
+    """メイン画像は作成・更新の入力からは指定できないこと"""
+    data = {"user_id": test_user.id, "name": "物件", "property_type": "HOUSE",
+            "prefecture": "東京都", "main_image_id": images[0].id,
+            "main_image_url": images[0].url}
+
+    created = property_service.create_property(db, PropertySchema.model_validate(data))
+    assert (created.main_image_id, created.main_image_url) == (None, None)
+
+    await property_service.update_property(
+        db, test_property.id, PropertySchema.model_validate(data))
+    assert test_property.main_image_id is None
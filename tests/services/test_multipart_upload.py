@@ -0,0 +1,120 @@
+import boto3
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models import Image, Property, User
+from app.schemas.image_schemas import (
+    CompleteMultipartUploadRequest,
+    CreateMultipartUploadRequest,
+    ImageStatus
+)
+from app.services import image_service as image_service_module
+from app.services.image_service import image_service
+from app.services.multipart_upload_service import (
+    MIN_PART_SIZE,
+    MultipartUploadService,
+    plan_parts
+)
+
+BUCKET = "test-bucket"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    moto = pytest.importorskip("moto")
+    mock = getattr(moto, "mock_aws", None) or moto.mock_s3
+    with mock():
+        client = boto3.client("s3", region_name="us-east-1",
+                              aws_access_key_id="test", aws_secret_access_key="test")
+        client.create_bucket(Bucket=BUCKET)
+        monkeypatch.setattr(image_service_module.settings, "AWS_S3_BUCKET", BUCKET)
+        monkeypatch.setattr(image_service, "s3_client", client)
+        yield client
+
+
+@pytest.fixture
+def service() -> MultipartUploadService:
+    return MultipartUploadService(part_size=MIN_PART_SIZE)
+
+
+def request(property_id: int, file_size: int) -> CreateMultipartUploadRequest:
+    return CreateMultipartUploadRequest(
+        file_name="plan.pdf", content_type="application/pdf",
+        property_id=property_id, file_size=file_size)
+
+
+def upload_part(s3, image: Image, part_number: int, size: int) -> None:
+    """クライアントが署名付きURLにPUTするのと同じく、パートをアップロードする"""
+    s3.upload_part(Bucket=BUCKET, Key=image.s3_key, PartNumber=part_number,
+                   UploadId=image.multipart_upload["upload_id"], Body=b"x" * size)
+
+
+def test_plan_parts_respects_s3_limits():
+    assert plan_parts(1, 8 * 1024 * 1024) == (8 * 1024 * 1024, 1)
+    assert plan_parts(20 * 1024 * 1024, 1024) == (MIN_PART_SIZE, 4)
+    # パート数が10000を超える場合はパートを大きくする
+    part_size, part_count = plan_parts(100 * 1024 ** 3, MIN_PART_SIZE)
+    assert part_count <= 10000 and part_size * part_count >= 100 * 1024 ** 3
+
+
+@pytest.mark.asyncio
+async def test_upload_can_be_resumed_and_completed(
+    db: Session, s3, service: MultipartUploadService, test_user: User, test_property: Property
+):
+    started = service.initiate(
+        db, request(test_property.id, MIN_PART_SIZE + 10), test_user.id)
+    assert (started.part_count, len(started.parts)) == (2, 2)
+    assert all("uploadId=" in part.upload_url for part in started.parts)
+
+    image = db.get(Image, started.image_id)
+    assert image.status == ImageStatus.PENDING.value
+    upload_part(s3, image, 1, MIN_PART_SIZE)
+
+    # 再開時はアップロード済みのパートを除いたURLだけが返される
+    resumed = service.get_status(db, image.id, test_user.id)
+    assert [part.part_number for part in resumed.uploaded_parts] == [1]
+    assert [part.part_number for part in resumed.parts] == [2]
+
+    with pytest.raises(HTTPException) as error:
+        service.complete(db, image.id, CompleteMultipartUploadRequest(), test_user.id)
+    assert error.value.status_code == 400
+
+    upload_part(s3, image, 2, 10)
+    completed = service.complete(
+        db, image.id, CompleteMultipartUploadRequest(), test_user.id)
+
+    assert completed.status == ImageStatus.COMPLETED.value
+    db.expire_all()
+    assert image.multipart_upload is None
+    assert s3.head_object(Bucket=BUCKET, Key=image.s3_key)[
+        "ContentLength"] == MIN_PART_SIZE + 10
+
+
+@pytest.mark.asyncio
+async def test_abort_removes_parts_and_pending_image(
+    db: Session, s3, service: MultipartUploadService, test_user: User, test_property: Property
+):
+    started = service.initiate(
+        db, request(test_property.id, MIN_PART_SIZE), test_user.id)
+    image = db.get(Image, started.image_id)
+    upload_part(s3, image, 1, MIN_PART_SIZE)
+
+    assert service.abort(db, started.image_id, test_user.id) == {"status": "success"}
+
+    assert db.get(Image, started.image_id) is None
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+
+@pytest.mark.asyncio
+async def test_only_owner_can_upload(
+    db: Session, s3, service: MultipartUploadService, test_user: User, test_property: Property
+):
+    with pytest.raises(HTTPException) as error:
+        service.initiate(db, request(test_property.id, 100), test_user.id + 1)
+    assert error.value.status_code == 403
+
+    started = service.initiate(db, request(test_property.id, 100), test_user.id)
+    with pytest.raises(HTTPException) as error:
+        service.get_status(db, started.image_id, test_user.id + 1)
+    assert error.value.status_code == 404
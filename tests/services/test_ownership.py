@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud.ownership import OwnedEntity
+from app.models import (
+    User,
+    Property,
+    Room,
+    Product,
+    ProductSpecification,
+    ProductDimension,
+    Drawing,
+    Image
+)
+from app.services.ownership_service import ownership_service
+from app.services.drawing_service import drawing_service
+
+
+@pytest.fixture
+def tree(db: Session, test_property: Property) -> dict:
+    room = Room(property_id=test_property.id, name="リビング")
+    db.add(room)
+    db.flush()
+    product = Product(room_id=room.id, name="照明")
+    drawing = Drawing(property_id=test_property.id, name="平面図")
+    db.add_all([product, drawing])
+    db.flush()
+    spec = ProductSpecification(
+        product_id=product.id, spec_type="色", spec_value="白")
+    dimension = ProductDimension(
+        product_id=product.id, dimension_type="幅", value=100.0, unit="mm")
+    db.add_all([spec, dimension])
+    db.flush()
+    images = [
+        Image(url="https://example.com/1.jpg", property_id=test_property.id),
+        Image(url="https://example.com/2.jpg", room_id=room.id),
+        Image(url="https://example.com/3.jpg", product_id=product.id),
+        Image(url="https://example.com/4.jpg",
+              product_specification_id=spec.id),
+        Image(url="https://example.com/5.jpg", drawing_id=drawing.id),
+    ]
+    db.add_all(images)
+    db.commit()
+    return {
+        OwnedEntity.PROPERTY: [test_property.id],
+        OwnedEntity.ROOM: [room.id],
+        OwnedEntity.PRODUCT: [product.id],
+        OwnedEntity.SPECIFICATION: [spec.id],
+        OwnedEntity.DIMENSION: [dimension.id],
+        OwnedEntity.DRAWING: [drawing.id],
+        OwnedEntity.IMAGE: [image.id for image in images],
+    }
+
+
+@pytest.fixture
+def other_user(db: Session) -> User:
+    user = User(clerk_user_id="ownership_other", email="other@example.com",
+                name="Other", user_type="individual")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_every_entity_type_resolves_to_owner(db: Session, test_user: User, other_user: User, tree: dict):
+    for entity, ids in tree.items():
+        assert ownership_service.check_many(db, entity, ids, test_user.id) == {
+            entity_id: True for entity_id in ids}, entity
+        assert ownership_service.check_many(db, entity, ids, other_user.id) == {
+            entity_id: False for entity_id in ids}, entity
+
+
+@pytest.mark.asyncio
+async def test_deleted_property_is_not_owned(db: Session, test_user: User, test_property: Property, tree: dict):
+    test_property.is_deleted = True
+    db.commit()
+
+    assert not drawing_service.is_my_drawing(
+        db, tree[OwnedEntity.DRAWING][0], test_user.id)
+    assert not ownership_service.is_owner(
+        db, OwnedEntity.ROOM, tree[OwnedEntity.ROOM][0], test_user.id)
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_one_query_and_memoizes(db: Session, test_user: User, tree: dict, statements):
+    """まとめての判定は1クエリで行われ、同じセッション内の再確認ではSQLを発行しないこと"""
+    image_ids = tree[OwnedEntity.IMAGE]
+
+    result = ownership_service.check_many(
+        db, OwnedEntity.IMAGE, image_ids + [999999], test_user.id)
+    assert result[999999] is False
+    assert len(statements) == 1
+
+    assert ownership_service.is_owner(
+        db, OwnedEntity.IMAGE, image_ids[0], test_user.id)
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_memo_is_cleared_on_commit(db: Session, test_user: User, test_property: Property):
+    assert ownership_service.is_owner(
+        db, OwnedEntity.PROPERTY, test_property.id, test_user.id)
+
+    test_property.is_deleted = True
+    db.commit()
+
+    assert not ownership_service.is_owner(
+        db, OwnedEntity.PROPERTY, test_property.id, test_user.id)
@@ -0,0 +1,78 @@
+import boto3
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Image, Property, User
+from app.schemas.image_schemas import (
+    CreatePresignedUrlRequest,
+    CreatePresignedUrlsRequest,
+    ImageStatus,
+    ImageType
+)
+from app.services import image_service as image_service_module
+from app.services.image_service import image_service
+
+
+@pytest.fixture(autouse=True)
+def s3_client(monkeypatch):
+    """ダミーの認証情報でローカルに署名するクライアントに差し替える"""
+    monkeypatch.setattr(image_service_module.settings,
+                        "AWS_S3_BUCKET", "test-bucket")
+    monkeypatch.setattr(image_service, "s3_client", boto3.client(
+        "s3",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        region_name="ap-northeast-1"
+    ))
+
+
+def files(property_id: int, count: int):
+    return [
+        CreatePresignedUrlRequest(
+            file_name=f"photo_{i}.jpg",
+            content_type="image/jpeg",
+            property_id=property_id,
+            image_type=ImageType.MAIN if i == 0 else ImageType.SUB
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_creates_pending_images_in_order(
+    db: Session, test_user: User, test_property: Property, engine
+):
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO images"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        responses = image_service.create_presigned_urls(
+            db, CreatePresignedUrlsRequest(files=files(test_property.id, 3)), test_user.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(responses) == 3
+    images = {image.id: image for image in db.query(Image).all()}
+    for i, response in enumerate(responses):
+        image = images[response.image_id]
+        assert image.status == ImageStatus.PENDING.value
+        assert image.property_id == test_property.id
+        assert image.s3_key.endswith(f"/photo_{i}.jpg")
+        assert response.image_url.endswith(image.s3_key)
+        assert image.s3_key in response.upload_url
+        assert "Signature" in response.upload_url
+    assert images[responses[0].image_id].image_type.value == "MAIN"
+    # SQLiteではRETURNINGを伴う複数行INSERTが1行ずつ実行されるため、上限のみ確認する
+    assert 1 <= len(inserts) <= 3
+
+
+def test_batch_size_is_limited():
+    with pytest.raises(ValueError):
+        CreatePresignedUrlsRequest(files=[])
+    with pytest.raises(ValueError):
+        CreatePresignedUrlsRequest(files=files(1, 101))
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models import User, Property, Room, Product, ProductCategory
+from app.schemas import PropertySchema
+from app.services import property_service as property_service_module
+from app.services.property_service import (
+    property_service,
+    DEFAULT_ROOMS,
+    DEFAULT_ROOM_PRODUCT_CATEGORIES
+)
+
+
+@pytest.fixture
+def categories(db: Session):
+    db.add_all([ProductCategory(id=i, name=f"カテゴリ{i}")
+               for i in range(1, 15)])
+    db.commit()
+
+
+def property_data(user: User) -> PropertySchema:
+    return PropertySchema(user_id=user.id, name="テスト物件",
+                          property_type="HOUSE", prefecture="東京都")
+
+
+@pytest.mark.asyncio
+async def test_create_property_creates_default_rooms_and_products(
+    db: Session, test_user: User, categories
+):
+    """デフォルトの部屋と製品が部屋の順序どおりに作成されること"""
+    db_property = property_service.create_property(db, property_data(test_user))
+
+    rooms = db.query(Room).filter(
+        Room.property_id == db_property.id).order_by(Room.id).all()
+    assert [room.name for room in rooms] == DEFAULT_ROOMS
+    for room in rooms:
+        category_ids = sorted(product.product_category_id for product in
+                              db.query(Product).filter(Product.room_id == room.id))
+        assert category_ids == DEFAULT_ROOM_PRODUCT_CATEGORIES[room.name]
+
+
+@pytest.mark.asyncio
+async def test_create_property_rolls_back_on_failure(
+    db: Session, test_user: User, categories, monkeypatch
+):
+    """製品の作成に失敗した場合、物件と部屋も作成されないこと"""
+    def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(
+        property_service_module.product_crud, "create_many", fail)
+
+    with pytest.raises(HTTPException) as exc_info:
+        property_service.create_property(db, property_data(test_user))
+
+    assert exc_info.value.status_code == 500
+    assert db.query(Property).count() == 0
+    assert db.query(Room).count() == 0
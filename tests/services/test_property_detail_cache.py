@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.cache.backends import InMemoryLRUBackend
+from app.cache.property_details import property_detail_cache
+from app.crud.image import image as image_crud
+from app.models import Property, Room, Product, ProductSpecification
+from app.schemas import ImageSchema, RoomSchema
+from app.services.property_service import property_service
+from app.services.room_service import room_service
+from app.services.product_service import product_service
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    property_detail_cache.clear()
+    property_detail_cache.stats.reset()
+    yield
+    property_detail_cache.clear()
+
+
+@pytest.fixture
+def room(db: Session, test_property: Property) -> Room:
+    room = Room(property_id=test_property.id, name="リビング")
+    db.add(room)
+    db.commit()
+    return room
+
+
+@pytest.fixture
+def product(db: Session, room: Room) -> Product:
+    product = Product(room_id=room.id, name="照明")
+    db.add(product)
+    db.commit()
+    return product
+
+
+@pytest.mark.asyncio
+async def test_details_are_cached(db: Session, test_property: Property, room: Room):
+    """2回目以降はキャッシュから返されること"""
+    first = property_service.get_property_details_document(
+        db, test_property.id)
+    second = property_service.get_property_details_document(
+        db, test_property.id)
+
+    assert first == second
+    assert first["rooms"][0]["name"] == "リビング"
+    stats = property_detail_cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_room_update_invalidates(db: Session, test_property: Property, room: Room):
+    """部屋の更新でキャッシュが無効化されること"""
+    property_service.get_property_details_document(db, test_property.id)
+
+    await room_service.update_room(db, room.id, RoomSchema(
+        property_id=test_property.id, name="寝室"))
+
+    document = property_service.get_property_details_document(
+        db, test_property.id)
+    assert document["rooms"][0]["name"] == "寝室"
+    assert property_detail_cache.get_stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_image_create_invalidates(db: Session, test_property: Property, product: Product):
+    """製品への画像追加で物件のキャッシュが無効化されること"""
+    property_service.get_property_details_document(db, test_property.id)
+
+    image_crud.create(db, obj_in=ImageSchema(
+        url="https://example.com/a.jpg", product_id=product.id, status="completed"))
+
+    document = property_service.get_property_details_document(
+        db, test_property.id)
+    images = document["rooms"][0]["products"][0]["images"]
+    assert [image["url"] for image in images] == ["https://example.com/a.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_spec_replace_invalidates(db: Session, test_property: Property, product: Product):
+    """仕様の一括置き換え（query.delete()を含む）でキャッシュが無効化されること"""
+    db.add(ProductSpecification(
+        product_id=product.id, spec_type="色", spec_value="白"))
+    db.commit()
+    property_service.get_property_details_document(db, test_property.id)
+
+    await product_service.update_product_specifications(db, product.id, [])
+    db.expire_all()
+
+    document = property_service.get_property_details_document(
+        db, test_property.id)
+    assert document["rooms"][0]["products"][0]["specifications"] == []
+
+
+@pytest.mark.asyncio
+async def test_other_property_is_not_invalidated(db: Session, test_property: Property, room: Room):
+    """別の物件への書き込みではキャッシュが無効化されないこと"""
+    property_service.get_property_details_document(db, test_property.id)
+
+    other = Property(user_id=test_property.user_id, name="Other",
+                     prefecture="Osaka", property_type=test_property.property_type)
+    db.add(other)
+    db.commit()
+    db.add(Room(property_id=other.id, name="キッチン"))
+    db.commit()
+
+    property_service.get_property_details_document(db, test_property.id)
+    assert property_detail_cache.get_stats()["hits"] == 1
+
+
+def test_lru_backend_evicts_least_recently_used():
+    backend = InMemoryLRUBackend(maxsize=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+    assert backend.get("c") == 3
+
+
+def test_backend_ttl_expires_entries():
+    backend = InMemoryLRUBackend(maxsize=2, ttl=0)
+    backend.set("a", 1)
+
+    assert backend.get("a") is None
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Property, Room, Product, Image
+from app.services.property_service import property_service
+from app.services.room_service import room_service
+
+
+class QueryCounter:
+    """エンジン上で実行されたSQL文の数を数える"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _callback(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._callback)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, "before_cursor_execute", self._callback)
+
+
+def seed_rooms(db: Session, property: Property, room_count: int, products_per_room: int):
+    """指定数の部屋・製品と、それぞれの画像を作成する"""
+    db.add(Image(url="https://example.com/property.jpg",
+           property_id=property.id, status="completed"))
+    for i in range(room_count):
+        room = Room(property_id=property.id, name=f"部屋{i}")
+        db.add(room)
+        db.flush()
+        db.add(Image(url=f"https://example.com/room{i}.jpg",
+               room_id=room.id, status="completed"))
+        for j in range(products_per_room):
+            product = Product(room_id=room.id, name=f"製品{i}-{j}")
+            db.add(product)
+            db.flush()
+            db.add(Image(url=f"https://example.com/product{i}-{j}.jpg",
+                   product_id=product.id, status="completed"))
+            # pendingの画像は結果に含まれない
+            db.add(Image(url=f"https://example.com/pending{i}-{j}.jpg",
+                   product_id=product.id, status="pending"))
+    db.commit()
+    db.expire_all()
+
+
+def count_detail_queries(engine, db: Session, property_id: int) -> int:
+    db.expire_all()
+    with QueryCounter(engine) as counter:
+        property_service.get_property_details(db, property_id)
+    return counter.count
+
+
+@pytest.mark.asyncio
+async def test_property_details_query_count_is_constant(engine, db: Session, test_property: Property):
+    """部屋・製品の数に関係なく、物件詳細の取得クエリ数が一定であること"""
+    seed_rooms(db, test_property, room_count=1, products_per_room=1)
+    small = count_detail_queries(engine, db, test_property.id)
+
+    seed_rooms(db, test_property, room_count=6, products_per_room=8)
+    large = count_detail_queries(engine, db, test_property.id)
+
+    assert small == large
+
+
+@pytest.mark.asyncio
+async def test_property_details_groups_images(db: Session, test_property: Property):
+    """画像が物件・部屋・製品ごとに正しく振り分けられること"""
+    seed_rooms(db, test_property, room_count=2, products_per_room=3)
+
+    result = property_service.get_property_details(db, test_property.id)
+
+    assert [image.url for image in result["images"]] == [
+        "https://example.com/property.jpg"]
+    for room in result["rooms"]:
+        assert len(room["images"]) == 1
+        assert room["images"][0].room_id == room["id"]
+        for product in room["products"]:
+            assert len(product["images"]) == 1
+            assert product["images"][0].product_id == product["id"]
+            assert product["images"][0].status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_room_details_query_count_is_constant(engine, db: Session, test_property: Property):
+    """製品の数に関係なく、部屋詳細の取得クエリ数が一定であること"""
+    seed_rooms(db, test_property, room_count=2, products_per_room=1)
+    rooms = db.query(Room).filter(Room.property_id == test_property.id)\
+        .order_by(Room.id).all()
+    db.add_all([Product(room_id=rooms[1].id, name=f"追加製品{i}")
+               for i in range(10)])
+    db.commit()
+
+    counts = []
+    for room in rooms:
+        db.expire_all()
+        with QueryCounter(engine) as counter:
+            result = room_service.get_room_details(db, room.id)
+        counts.append(counter.count)
+
+    assert len(result["products"]) == 11
+    assert counts[0] == counts[1]
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import User, Property, Room, Product, ProductSpecification, ProductDimension, Image
+from app.schemas import PropertyWholeSchema
+from app.services.property_service import property_service
+
+
+def whole_payload(user: User, image_url: str = "https://example.com/p.jpg") -> PropertyWholeSchema:
+    return PropertyWholeSchema.model_validate({
+        "user_id": user.id,
+        "name": "一括作成物件",
+        "property_type": "HOUSE",
+        "prefecture": "東京都",
+        "images": [{"url": image_url, "status": "completed"}],
+        "rooms": [
+            {
+                "name": f"部屋{r}",
+                "images": [{"url": f"https://example.com/r{r}.jpg"}],
+                "products": [
+                    {
+                        "name": f"製品{r}-{p}",
+                        "specifications": [{"spec_type": "色", "spec_value": "白"}],
+                        "dimensions": [{"dimension_type": "幅", "value": 900.0, "unit": "mm"}],
+                        "images": [{"url": f"https://example.com/r{r}p{p}.jpg"}]
+                    }
+                    for p in range(3)
+                ]
+            }
+            for r in range(2)
+        ]
+    })
+
+
+@pytest.mark.asyncio
+async def test_write_property_tree_links_children(db: Session, test_user: User):
+    """各階層の子が、RETURNINGで得た親のIDに紐づいて作成されること"""
+    property_id, counts = property_service.write_property_tree(
+        db, whole_payload(test_user))
+
+    assert counts == {"properties": 1, "rooms": 2, "products": 6,
+                      "specifications": 6, "dimensions": 6, "images": 9}
+    rooms = db.query(Room).filter(Room.property_id ==
+                                  property_id).order_by(Room.id).all()
+    assert [room.name for room in rooms] == ["部屋0", "部屋1"]
+    for r, room in enumerate(rooms):
+        products = db.query(Product).filter(
+            Product.room_id == room.id).order_by(Product.id).all()
+        assert [product.name for product in products] == [
+            f"製品{r}-{p}" for p in range(3)]
+        for p, product in enumerate(products):
+            assert db.query(ProductSpecification).filter(
+                ProductSpecification.product_id == product.id).count() == 1
+            assert db.query(ProductDimension).filter(
+                ProductDimension.product_id == product.id).count() == 1
+            image = db.query(Image).filter(Image.product_id == product.id).one()
+            assert image.url == f"https://example.com/r{r}p{p}.jpg"
+        assert db.query(Image).filter(Image.room_id == room.id).one(
+        ).url == f"https://example.com/r{r}.jpg"
+
+
+@pytest.mark.asyncio
+async def test_write_property_tree_is_atomic(db: Session, test_user: User):
+    """最後の画像の作成に失敗した場合、物件全体が作成されないこと"""
+    with pytest.raises(Exception):
+        property_service.write_property_tree(
+            db, whole_payload(test_user, image_url=None))
+
+    assert db.query(Property).count() == 0
+    assert db.query(Product).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_write_property_tree_ignores_client_parent_ids_and_status(
+    db: Session, test_user: User, test_property: Property
+):
+    """画像はクライアントが指定した他の親やステータスに関係なく、書き込み対象の親にpendingで作成されること"""
+    payload = whole_payload(test_user)
+    payload.rooms[0].images[0] = payload.rooms[0].images[0].model_copy(update={
+        "property_id": test_property.id, "status": "completed"})
+    payload.images[0] = payload.images[0].model_copy(update={"description": "外観"})
+
+    property_id, _ = property_service.write_property_tree(db, payload)
+
+    assert db.query(Image).filter(Image.property_id == test_property.id).count() == 0
+    images = db.query(Image).filter(Image.property_id == property_id).all()
+    assert [(image.room_id, image.description) for image in images] == [(None, "外観")]
+    assert {image.status for image in db.query(Image).all()} == {"pending"}
+    assert db.get(Property, property_id).status == "default"
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.crud.property import property as property_crud
+from app.enums import ListingType, ListingStatus, TransactionStatus
+from app.models import User, Property, ListingItem, Transaction
+from app.services.stripe_service import stripe_service
+
+
+@pytest.fixture
+def listing(db: Session, test_property: Property, test_user: User) -> ListingItem:
+    listing = ListingItem(
+        seller_user_id=test_user.id,
+        property_id=test_property.id,
+        title="Test Listing",
+        price=10000,
+        listing_type=ListingType.PROPERTY_SPECS,
+        status=ListingStatus.PUBLISHED
+    )
+    db.add(listing)
+    db.commit()
+    return listing
+
+
+def create_transaction(db: Session, listing: ListingItem, status=TransactionStatus.PENDING) -> Transaction:
+    transaction = Transaction(
+        buyer_user_id=listing.seller_user_id,
+        seller_user_id=listing.seller_user_id,
+        listing_id=listing.id,
+        total_amount=10000,
+        platform_fee=2000,
+        seller_amount=8000,
+        transaction_status=status
+    )
+    db.add(transaction)
+    db.commit()
+    return transaction
+
+
+def checkout_session(transaction: Transaction) -> dict:
+    return {"id": "cs_test", "metadata": {"transaction_id": str(transaction.id)}}
+
+
+@pytest.mark.asyncio
+async def test_checkout_completed_increments_purchase_count_once(
+    db: Session, test_property: Property, listing: ListingItem
+):
+    """チェックアウト完了で購入件数が加算され、イベントの再送では加算されないこと"""
+    transaction = create_transaction(db, listing)
+
+    await stripe_service.handle_checkout_completed(db, checkout_session(transaction))
+    await stripe_service.handle_checkout_completed(db, checkout_session(transaction))
+
+    db.refresh(test_property)
+    assert test_property.purchase_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_multi_orders_by_purchase_count(
+    db: Session, test_property: Property, listing: ListingItem
+):
+    """購入件数の多い物件が先に並ぶこと"""
+    newer = Property(user_id=test_property.user_id, name="Newer",
+                     prefecture="Osaka", property_type=test_property.property_type)
+    db.add(newer)
+    db.commit()
+    property_crud.increment_purchase_count(db, listing_id=listing.id)
+    db.commit()
+
+    properties = property_crud.get_multi(db)
+    assert [p.id for p in properties] == [test_property.id, newer.id]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_purchase_counts(db: Session, test_property: Property, listing: ListingItem):
+    """完了した取引の件数から購入件数が再計算されること"""
+    create_transaction(db, listing, TransactionStatus.COMPLETED)
+    create_transaction(db, listing, TransactionStatus.COMPLETED)
+    create_transaction(db, listing, TransactionStatus.CANCELLED)
+
+    assert property_crud.rebuild_purchase_counts(db) == 1
+    db.refresh(test_property)
+    assert test_property.purchase_count == 2
+    assert property_crud.rebuild_purchase_counts(db) == 0
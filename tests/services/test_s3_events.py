@@ -0,0 +1,122 @@
+import json
+from typing import List
+from urllib.parse import quote_plus
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.enums import ImageType
+from app.models import Image, Property
+from app.services.s3_event_service import S3EventService, parse_object_created_keys
+
+
+def s3_event(*keys: str, event_name: str = "ObjectCreated:Put", bucket: str = "test-bucket") -> dict:
+    """S3のイベント通知と同じ形式のメッセージを作成する（キーはS3と同様にURLエンコードする）"""
+    return {
+        "Records": [
+            {
+                "eventVersion": "2.1",
+                "eventSource": "aws:s3",
+                "awsRegion": "ap-northeast-1",
+                "eventName": event_name,
+                "s3": {
+                    "bucket": {"name": bucket},
+                    "object": {"key": quote_plus(key, safe="/"), "size": 1024}
+                }
+            }
+            for key in keys
+        ]
+    }
+
+
+def sns_notification(message: dict) -> dict:
+    return {"Type": "Notification", "MessageId": "1", "Message": json.dumps(message)}
+
+
+class LocalQueue:
+    """SQSのreceive_message/delete_message_batchを再現するローカルのキュー"""
+
+    def __init__(self):
+        self.messages: List[dict] = []
+
+    def publish(self, body) -> None:
+        body = body if isinstance(body, str) else json.dumps(body)
+        self.messages.append({
+            "MessageId": str(len(self.messages)),
+            "ReceiptHandle": f"handle-{len(self.messages)}",
+            "Body": body
+        })
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, WaitTimeSeconds):
+        return {"Messages": self.messages[:MaxNumberOfMessages]}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        handles = {entry["ReceiptHandle"] for entry in Entries}
+        self.messages = [
+            message for message in self.messages
+            if message["ReceiptHandle"] not in handles
+        ]
+
+
+@pytest.fixture
+def images(db: Session, test_property: Property) -> List[Image]:
+    images = [
+        Image(url=f"https://example.com/{name}", s3_key=f"uploads/{i}/{name}",
+              property_id=test_property.id, image_type=ImageType.SUB, status="pending")
+        for i, name in enumerate(["living room.jpg", "kitchen.jpg", "bath.jpg"])
+    ]
+    db.add_all(images)
+    db.commit()
+    return images
+
+
+@pytest.fixture
+def service(db: Session) -> S3EventService:
+    return S3EventService(session_factory=sessionmaker(bind=db.get_bind()), batch_size=2)
+
+
+def test_parse_accepts_raw_sns_and_sqs_bodies():
+    event = s3_event("uploads/1/living room.jpg")
+
+    assert parse_object_created_keys(event) == ["uploads/1/living room.jpg"]
+    assert parse_object_created_keys(sns_notification(event)) == [
+        "uploads/1/living room.jpg"]
+    assert parse_object_created_keys(json.dumps(sns_notification(event))) == [
+        "uploads/1/living room.jpg"]
+
+
+def test_parse_ignores_other_events_and_buckets():
+    assert parse_object_created_keys(
+        s3_event("a.jpg", event_name="ObjectRemoved:Delete")) == []
+    assert parse_object_created_keys(
+        s3_event("a.jpg", bucket="other"), bucket="test-bucket") == []
+    assert parse_object_created_keys(
+        {"Service": "Amazon S3", "Event": "s3:TestEvent"}) == []
+
+
+@pytest.mark.asyncio
+async def test_ingest_completes_matching_images(db: Session, images: List[Image], service: S3EventService):
+    event = s3_event(images[0].s3_key, images[1].s3_key, "uploads/unknown.jpg")
+
+    assert service.ingest(db, sns_notification(event)) == 2
+    # 重複して配信されても再度更新されないこと
+    assert service.ingest(db, event) == 0
+
+    db.expire_all()
+    assert [image.status for image in images] == [
+        "completed", "completed", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_poll_once_deletes_processed_messages(db: Session, images: List[Image], service: S3EventService):
+    queue = LocalQueue()
+    queue.publish(sns_notification(s3_event(images[0].s3_key)))
+    queue.publish(s3_event(images[1].s3_key, images[2].s3_key))
+    queue.publish("not json")
+
+    assert service.poll_once(queue, "local-queue") == 3
+
+    # 解析できなかったメッセージはキューに残る
+    assert [message["Body"] for message in queue.messages] == ["not json"]
+    db.expire_all()
+    assert all(image.status == "completed" for image in images)
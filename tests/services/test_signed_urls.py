@@ -0,0 +1,171 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.cache.signed_urls import SignedURLCache
+from app.enums import ImageType, ListingStatus, ListingType, TransactionStatus
+from app.models import ListingItem, Property, Room, Transaction, User
+from app.services.signed_url_service import SignedURLService
+from app.utils.storage import ObjectStorage
+
+
+class FakeStorage(ObjectStorage):
+    def __init__(self):
+        self.signed = []
+
+    def url(self, key: str) -> str:
+        return f"https://public.example.com/{key}"
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        self.signed.append(key)
+        return f"https://private.example.com/{key}?n={len(self.signed)}&expires={expires_in}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def storage() -> FakeStorage:
+    return FakeStorage()
+
+
+@pytest.fixture
+def service(storage: FakeStorage, clock: FakeClock) -> SignedURLService:
+    cache = SignedURLCache(expires_in=3600, refresh_margin=300, clock=clock)
+    return SignedURLService(cache=cache, storage=storage)
+
+
+@pytest.fixture
+def buyer(db: Session) -> User:
+    user = User(clerk_user_id="buyer_clerk_id", email="buyer@example.com",
+                name="Buyer", user_type="individual", role="buyer", is_active=True)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def room(db: Session, test_property: Property) -> Room:
+    room = Room(property_id=test_property.id, name="リビング")
+    db.add(room)
+    db.commit()
+    return room
+
+
+def document(test_property: Property, room: Room) -> dict:
+    def image(id, key, image_type):
+        return {"id": id, "url": f"https://public.example.com/{key}", "s3_key": key,
+                "image_type": image_type, "variants": None}
+
+    return {
+        "id": test_property.id,
+        "images": [image(1, "uploads/a/main.jpg", ImageType.MAIN.value),
+                   image(2, "uploads/b/paid.jpg", ImageType.PAID.value)],
+        "rooms": [{
+            "id": room.id,
+            "property_id": test_property.id,
+            "images": [{
+                **image(3, "uploads/c/paid.jpg", ImageType.PAID.value),
+                "variants": {"thumb": {"width": 320, "height": 240,
+                                       "webp": "https://public.example.com/uploads/c/paid.thumb.webp"}}
+            }],
+            "products": [],
+        }],
+    }
+
+
+def purchase(db: Session, buyer: User, seller_id: int, status=TransactionStatus.COMPLETED, **target) -> None:
+    listing = ListingItem(seller_user_id=seller_id, title="出品", price=1000,
+                          listing_type=ListingType.ROOM_SPECS, status=ListingStatus.PUBLISHED, **target)
+    db.add(listing)
+    db.flush()
+    db.add(Transaction(buyer_user_id=buyer.id, seller_user_id=seller_id, listing_id=listing.id,
+                       total_amount=1000, platform_fee=100, seller_amount=900,
+                       transaction_status=status))
+    db.commit()
+
+
+@pytest.mark.asyncio
+async def test_paid_images_are_hidden_without_purchase(
+    db: Session, service: SignedURLService, storage: FakeStorage,
+    test_property: Property, room: Room, buyer: User
+):
+    source = document(test_property, room)
+    purchase(db, buyer, test_property.user_id,
+             status=TransactionStatus.PENDING, property_id=test_property.id)
+
+    for user_id in (None, buyer.id):
+        signed = service.sign_tree(db, source, user_id)
+        paid = [signed["images"][1], signed["rooms"][0]["images"][0]]
+        assert all(image["url"] is None and image["s3_key"] is None and image["variants"] is None
+                   for image in paid)
+        assert signed["images"][0]["url"] == "https://public.example.com/uploads/a/main.jpg"
+
+    assert storage.signed == []
+    # キャッシュされたドキュメントは変更しない
+    assert source == document(test_property, room)
+
+
+@pytest.mark.asyncio
+async def test_room_purchase_signs_only_room_images_in_one_batch(
+    db: Session, service: SignedURLService, storage: FakeStorage,
+    test_property: Property, room: Room, buyer: User
+):
+    purchase(db, buyer, test_property.user_id,
+             property_id=test_property.id, room_id=room.id)
+
+    signed = service.sign_tree(db, document(test_property, room), buyer.id)
+
+    assert signed["images"][1]["url"] is None
+    room_image = signed["rooms"][0]["images"][0]
+    assert room_image["url"].startswith(
+        "https://private.example.com/uploads/c/paid.jpg")
+    assert room_image["variants"]["thumb"]["webp"].startswith(
+        "https://private.example.com/uploads/c/paid.thumb.webp")
+    assert sorted(storage.signed) == [
+        "uploads/c/paid.jpg", "uploads/c/paid.thumb.webp"]
+
+
+@pytest.mark.asyncio
+async def test_owner_sees_all_paid_images(
+    db: Session, service: SignedURLService, test_property: Property, room: Room
+):
+    signed = service.sign_tree(
+        db, document(test_property, room), test_property.user_id)
+
+    assert signed["images"][1]["url"].startswith("https://private.example.com/")
+    assert signed["rooms"][0]["images"][0]["url"].startswith(
+        "https://private.example.com/")
+
+
+@pytest.mark.asyncio
+async def test_signed_urls_are_cached_and_refreshed_before_expiry(
+    db: Session, service: SignedURLService, storage: FakeStorage, clock: FakeClock,
+    test_property: Property, room: Room, buyer: User
+):
+    purchase(db, buyer, test_property.user_id, property_id=test_property.id)
+
+    first = service.sign_tree(db, document(test_property, room), buyer.id)
+    clock.now += 3600 - 301
+    second = service.sign_tree(db, document(test_property, room), buyer.id)
+    assert second == first
+    assert len(storage.signed) == 3
+
+    # 残りの有効期間が猶予を下回ったURLは返さずに再発行する
+    clock.now += 2
+    third = service.sign_tree(db, document(test_property, room), buyer.id)
+    assert third["images"][1]["url"] != first["images"][1]["url"]
+    assert len(storage.signed) == 6
+
+    # URLは購入者ごとにキャッシュされる
+    service.sign_tree(db, document(test_property, room), test_property.user_id)
+    assert len(storage.signed) == 9
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.enums import ImageType
+from app.models import Image, Property, StorageDeletion
+from app.services.image_service import image_service
+from app.services.storage_cleanup_service import StorageCleanupService, storage_cleanup_service
+
+
+class LocalS3:
+    """DeleteObjectsの呼び出しを記録するS3のローカルの代替"""
+
+    def __init__(self, failing_keys=()):
+        self.calls: List[List[str]] = []
+        self.failing_keys = set(failing_keys)
+        self.aborted: List[str] = []
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [obj["Key"] for obj in Delete["Objects"]]
+        self.calls.append(keys)
+        return {
+            "Errors": [
+                {"Key": key, "Code": "AccessDenied", "Message": "Access Denied"}
+                for key in keys if key in self.failing_keys
+            ]
+        }
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+def make_service(db: Session, s3: LocalS3, **kwargs) -> StorageCleanupService:
+    return StorageCleanupService(
+        session_factory=sessionmaker(bind=db.get_bind()), s3_client=s3,
+        bucket="test-bucket", **kwargs)
+
+
+def add_image(db: Session, property_id: int, key: str, status: str, age: timedelta) -> Image:
+    image = Image(url=f"https://example.com/{key}", s3_key=key, property_id=property_id,
+                  image_type=ImageType.SUB, status=status,
+                  created_at=datetime.now(timezone.utc) - age)
+    db.add(image)
+    db.commit()
+    return image
+
+
+@pytest.mark.asyncio
+async def test_delete_image_enqueues_object_without_calling_s3(db: Session, test_property: Property, monkeypatch):
+    monkeypatch.setattr(storage_cleanup_service, "bucket", "test-bucket")
+    image = add_image(db, test_property.id, "uploads/1/a.jpg",
+                      "completed", timedelta(0))
+
+    assert image_service.delete_image(db, image.id) == {"status": "success"}
+
+    assert db.get(Image, image.id) is None
+    assert [row.s3_key for row in db.query(StorageDeletion).all()] == [
+        "uploads/1/a.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_reaps_only_stale_pending_images(db: Session, test_property: Property):
+    stale = add_image(db, test_property.id, "uploads/stale.jpg",
+                      "pending", timedelta(hours=3))
+    fresh = add_image(db, test_property.id, "uploads/fresh.jpg",
+                      "pending", timedelta(minutes=5))
+    done = add_image(db, test_property.id, "uploads/done.jpg",
+                     "completed", timedelta(hours=3))
+    service = make_service(db, LocalS3())
+
+    assert service.reap_stale_uploads(db) == 1
+
+    remaining = {image.id for image in db.query(Image).all()}
+    assert stale.id not in remaining
+    assert {fresh.id, done.id} <= remaining
+    assert [(row.s3_key, row.reason) for row in db.query(StorageDeletion).all()] == [
+        ("uploads/stale.jpg", "stale_upload")]
+
+
+@pytest.mark.asyncio
+async def test_multipart_uploads_are_kept_longer_and_aborted(db: Session, test_property: Property):
+    resumable = add_image(db, test_property.id, "uploads/resumable.pdf",
+                          "pending", timedelta(hours=3))
+    abandoned = add_image(db, test_property.id, "uploads/abandoned.pdf",
+                          "pending", timedelta(days=2))
+    for image, upload_id in ((resumable, "u1"), (abandoned, "u2")):
+        image.multipart_upload = {"upload_id": upload_id,
+                                  "file_size": 10, "part_size": 5}
+    db.commit()
+    s3 = LocalS3()
+    service = make_service(db, s3)
+
+    assert service.reap_stale_uploads(db) == 1
+
+    assert db.get(Image, resumable.id) is not None
+    assert db.get(Image, abandoned.id) is None
+    assert s3.aborted == ["u2"]
+
+
+@pytest.mark.asyncio
+async def test_flush_outbox_deletes_in_batches_and_retries_failures(db: Session):
+    db.add_all([
+        StorageDeletion(bucket="test-bucket",
+                        s3_key=f"uploads/{i}.jpg", reason="user_delete")
+        for i in range(5)
+    ])
+    db.commit()
+    s3 = LocalS3(failing_keys={"uploads/3.jpg"})
+    service = make_service(db, s3, batch_size=2, max_attempts=2)
+
+    assert service.flush_outbox(db) == {"deleted": 4, "failed": 1}
+    assert [len(keys) for keys in s3.calls] == [2, 2, 1]
+
+    failed = db.query(StorageDeletion).one()
+    assert failed.s3_key == "uploads/3.jpg"
+    assert failed.attempts == 1
+    assert failed.last_error.startswith("AccessDenied")
+
+    # max_attempts回失敗した行は再試行されない
+    service.flush_outbox(db)
+    assert service.flush_outbox(db) == {"deleted": 0, "failed": 0}
+    assert db.query(StorageDeletion).one().attempts == 2
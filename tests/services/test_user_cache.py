@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache.users import user_cache
+from app.models import User, SellerProfile
+from app.schemas import UserSchema, SellerProfileSchema
+from app.services.seller_profile_service import register_seller
+from app.services.user_service import user_service
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    user_cache.clear()
+    user_cache.stats.reset()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def resolve(db: Session, clerk_user_id: str) -> User:
+    """リクエストごとの新しいセッションを想定して、識別マップを空にしてから解決する"""
+    db.expunge_all()
+    return user_service.get_user_by_clerk_id(db, clerk_user_id)
+
+
+@pytest.mark.asyncio
+async def test_second_lookup_is_served_from_cache(db: Session, test_user: User, test_seller_profile: SellerProfile, statements):
+    """2回目以降はSQLを発行せず、プロフィールも読み込み済みで返されること"""
+    resolve(db, test_user.clerk_user_id)
+    statements.clear()
+
+    user = resolve(db, test_user.clerk_user_id)
+
+    assert user.id == test_user.id
+    assert user.seller_profile.stripe_account_id == test_seller_profile.stripe_account_id
+    assert user.buyer_profile is None
+    assert user in db
+    assert statements == []
+    stats = user_cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_is_not_cached(db: Session):
+    assert resolve(db, "unknown") is None
+    assert resolve(db, "unknown") is None
+    assert user_cache.get_stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates(db: Session, test_user: User):
+    """update_userでエントリが無効化されること"""
+    resolve(db, test_user.clerk_user_id)
+
+    user_service.update_user(db, test_user.id, UserSchema(
+        clerk_user_id=test_user.clerk_user_id, email=test_user.email,
+        name="Renamed", user_type="individual"))
+
+    assert resolve(db, test_user.clerk_user_id).name == "Renamed"
+    assert user_cache.get_stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_seller_registration_invalidates(db: Session, test_user: User):
+    """Seller登録（プロフィール作成とroleの変更）でエントリが無効化されること"""
+    current_user = resolve(db, test_user.clerk_user_id)
+    assert current_user.seller_profile is None
+
+    register_seller(db, SellerProfileSchema(), current_user)
+
+    user = resolve(db, test_user.clerk_user_id)
+    assert user.role == "both"
+    assert user.seller_profile is not None